@@ -0,0 +1,49 @@
+import os
+import sys
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from car_core import frame_codec
+
+# ------------------------------------------------------------------------------------
+# 프레임 코덱 인코딩/디코딩 벤치마크
+#   python benchmarks/bench_frame_codec.py [--count 반복 횟수]
+# ------------------------------------------------------------------------------------
+CASES = [
+    ('peer list', '3', '12가3456,34나5678,56다7890,78라1234'),
+    ('short msg', '2', '12가3456,먼저 가세요'),
+    ('long msg', '2', '12가3456,' + '트렁크가 열려 있어요. 안전한 곳에 정차해서 확인해 주세요. ' * 6),
+    ('response', '4', '12가3456,1'),
+]
+
+
+def bench(codec_cls, flag, content, number):
+    enc = codec_cls()
+    data = enc.encode(flag, content, 1)
+    t_enc = timeit.timeit(lambda: enc.encode(flag, content, 1), number=number) / number
+
+    def decode():
+        codec_cls().feed(data)
+    t_dec = timeit.timeit(decode, number=number) / number
+
+    # 왕복 검증 (legacy는 길이 한도에서 잘릴 수 있으므로 앞부분만 비교)
+    msg = codec_cls().feed(data)[0]
+    assert msg.flag == flag and content.startswith(msg.content), (codec_cls.name, flag)
+    return len(data), t_enc, t_dec
+
+
+def main():
+    ap = argparse.ArgumentParser(description='프레임 코덱 인코딩/디코딩 벤치마크')
+    ap.add_argument('--count', type=int, default=2000, help='반복 횟수 (기본 2000)')
+    number = ap.parse_args().count
+    print(f"{'case':<10} {'codec':<7} {'bytes':>6} {'encode us':>10} {'decode us':>10} {'decode MB/s':>12}")
+    for name, flag, content in CASES:
+        for codec_cls in (frame_codec.LegacyCodec, frame_codec.BinaryCodec):
+            size, t_enc, t_dec = bench(codec_cls, flag, content, number)
+            print(f"{name:<10} {codec_cls.name:<7} {size:>6} {t_enc * 1e6:>10.1f} {t_dec * 1e6:>10.1f} "
+                  f"{size / t_dec / 1e6:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import argparse
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from car_core import hangul_codec
+
+# ------------------------------------------------------------------------------------
+# 한글 압축 인코딩 압축률/속도 벤치마크
+#   python benchmarks/bench_hangul_codec.py [--count 반복 횟수]
+# ------------------------------------------------------------------------------------
+CORPUS = [
+    '먼저 가세요',
+    '양보해 주셔서 감사합니다',
+    '트렁크가 열려 있어요',
+    '라이트가 꺼져 있어요. 라이트를 켜 주세요',
+    '뒤쪽 타이어 바람이 빠진 것 같아요. 안전한 곳에 정차해서 확인해 주세요',
+    '12가3456 차량 주유구가 열려 있습니다',
+    '상향등 좀 꺼 주세요, 눈이 부셔요!',
+    '앞에 사고가 났어요. 천천히 가세요 🚗',
+    'OK thanks',
+]
+
+
+def main():
+    ap = argparse.ArgumentParser(description='한글 압축 인코딩 압축률/속도 벤치마크')
+    ap.add_argument('--count', type=int, default=2000, help='반복 횟수 (기본 2000)')
+    number = ap.parse_args().count
+    total_utf8 = total_hangul = total_dict = 0
+    print(f"{'utf8':>5} {'hangul':>6} {'+dict':>6} {'ratio':>6} {'enc us':>7} {'dec us':>7}  text")
+    for text in CORPUS:
+        utf8 = len(text.encode('utf-8'))
+        plain = hangul_codec.encode(text, use_dict=False)
+        packed = hangul_codec.encode(text)
+        # 왕복 검증
+        assert hangul_codec.decode(plain) == text, text
+        assert hangul_codec.decode(packed) == text, text
+        t_enc = timeit.timeit(lambda: hangul_codec.encode(text), number=number) / number
+        t_dec = timeit.timeit(lambda: hangul_codec.decode(packed), number=number) / number
+        total_utf8 += utf8
+        total_hangul += len(plain)
+        total_dict += len(packed)
+        print(f"{utf8:>5} {len(plain):>6} {len(packed):>6} {len(packed) / utf8:>6.2f} "
+              f"{t_enc * 1e6:>7.1f} {t_dec * 1e6:>7.1f}  {text}")
+    print(f"total: utf8 {total_utf8} B, hangul {total_hangul} B ({total_hangul / total_utf8:.2f}), "
+          f"hangul+dict {total_dict} B ({total_dict / total_utf8:.2f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import os
+import sys
+import argparse
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from car_core.hangul_ime import HangulComposer, BACKSPACE, to_keys
+
+# ------------------------------------------------------------------------------------
+# 가상 키보드 한글 조합기 검증 + 벤치마크
+#   python benchmarks/bench_hangul_ime.py [--count 반복 횟수]
+#
+#  - 검증: 코퍼스(ime_corpus.json)의 차량번호/문구를 두벌식 키 입력으로 바꿔 넣었을 때 원문이 나오는지,
+#          편집 사례(백스페이스 자모 분리 등)가 기대한 결과인지, 조합기가 알려준 증분 편집만으로
+#          입력 칸 문자열이 조합기 상태와 같게 유지되는지, 끝까지 지우면 빈 문자열이 되는지 — 실패하면 종료 코드 1
+#  - 속도: 키 입력 하나당 조합기 처리 시간, PyQt5가 있으면 QLineEdit 갱신 비용
+#          (VirtualKeyboard가 쓰는 끝만 바꾼 문자열 setText vs QLineEdit의 backspace()/insert() 편집 API)
+# ------------------------------------------------------------------------------------
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ime_corpus.json')
+
+
+def type_keys(keys, on_edit=None):
+    # 키 입력을 조합기에 넣고 증분 편집으로 만든 문자열 반환 (조합기 상태와 다르면 AssertionError)
+    composer = HangulComposer()
+    buf = ''
+    for key in keys:
+        remove, insert = composer.backspace() if key == BACKSPACE else composer.feed(key)
+        buf = buf[:len(buf) - remove] + insert
+        if on_edit:
+            on_edit(remove, insert)
+    assert buf == composer.text(), (keys, buf, composer.text())
+    return buf, composer
+
+
+def check(corpus):
+    failures = []
+    texts = corpus['plates'] + corpus['phrases']
+    for text in texts:
+        try:
+            got, composer = type_keys(to_keys(text))
+            if got != text:
+                failures.append(f"입력 {text!r} → {got!r}")
+                continue
+            # 끝까지 지우기
+            for _ in range(len(to_keys(text)) + 1):
+                composer.backspace()
+            if composer.text():
+                failures.append(f"전부 지운 뒤 {composer.text()!r} 남음 ({text!r})")
+        except AssertionError as e:
+            failures.append(f"증분 편집 불일치 {e}")
+    for case in corpus['edits']:
+        got, _ = type_keys(case['keys'])
+        if got != case['text']:
+            failures.append(f"편집 {case['keys']!r} → {got!r} (기대 {case['text']!r})")
+    return len(texts) + len(corpus['edits']), failures
+
+
+def bench_composer(keysets, number):
+    n_keys = sum(len(k) for k in keysets) * number
+    t = time.perf_counter()
+    for _ in range(number):
+        for keys in keysets:
+            composer = HangulComposer()
+            for key in keys:
+                composer.feed(key)
+    return (time.perf_counter() - t) / n_keys
+
+
+def bench_line_edit(keysets, number):
+    # QLineEdit 갱신: setText vs 편집 API로 끝에서 지우고 넣기 (조합기 처리 시간 제외)
+    try:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtWidgets import QApplication, QLineEdit
+    except ImportError:
+        return None
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    edit = QLineEdit()
+    edit.setReadOnly(True)
+    # 키마다 (지울 글자 수, 넣을 문자열, 입력 후 전체 문자열) 미리 계산
+    scripts = []
+    for keys in keysets:
+        composer, steps = HangulComposer(), []
+        for key in keys:
+            remove, insert = composer.feed(key)
+            steps.append((remove, insert, composer.text()))
+        scripts.append(steps)
+    n_keys = sum(len(s) for s in scripts) * number
+
+    t = time.perf_counter()
+    for _ in range(number):
+        for steps in scripts:
+            edit.clear()
+            for _, _, text in steps:
+                edit.setText(text)
+    full = (time.perf_counter() - t) / n_keys
+
+    t = time.perf_counter()
+    for _ in range(number):
+        for steps in scripts:
+            edit.clear()
+            for remove, insert, _ in steps:
+                edit.end(False)
+                for _ in range(remove):
+                    edit.backspace()
+                if insert:
+                    edit.insert(insert)
+    incremental = (time.perf_counter() - t) / n_keys
+    assert edit.text() == scripts[-1][-1][2]
+    del app
+    return full, incremental
+
+
+def main():
+    ap = argparse.ArgumentParser(description='가상 키보드 한글 조합기 검증 + 벤치마크')
+    ap.add_argument('--count', type=int, default=200, help='반복 횟수 (기본 200)')
+    number = ap.parse_args().count
+    with open(CORPUS_FILE, encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    total, failures = check(corpus)
+    for msg in failures:
+        print(f"FAIL {msg}")
+    print(f"검증 {total - len(failures)}/{total} 통과")
+
+    for name in ('plates', 'phrases'):
+        keysets = [to_keys(t) for t in corpus[name]]
+        per_key = bench_composer(keysets, number)
+        print(f"{name:<8} {len(keysets):>3}개, 키 {sum(map(len, keysets)):>4}개  조합 {per_key * 1e6:6.2f} us/key")
+
+    keysets = [to_keys(t) for t in corpus['plates'] + corpus['phrases']]
+    line_edit = bench_line_edit(keysets, max(1, number // 10))
+    if line_edit:
+        full, incremental = line_edit
+        print(f"QLineEdit  setText {full * 1e6:6.2f} us/key, 편집 API {incremental * 1e6:6.2f} us/key")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
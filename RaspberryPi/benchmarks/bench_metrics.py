@@ -0,0 +1,146 @@
+import os
+import sys
+import argparse
+import time
+import threading
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from car_core import metrics
+from car_core.engine import CarCore
+from device_simulator import DeviceSimulator
+
+# ------------------------------------------------------------------------------------
+# 지표 수집 비용 + 검증
+#   python benchmarks/bench_metrics.py [--count 호출 횟수]
+#
+#  - 검증: 여러 스레드가 동시에 inc()/observe()해도 합계가 빠지지 않는지, 끝난 스레드의 칸이 정리되는지,
+#          시뮬레이터에 연결한 코어의 /metrics 응답에 수신 프레임/피어/대기열/프로세스 지표가 있는지 — 실패하면 종료 코드 1
+#  - 속도: 호출 한 번 비용 (잠금 없는 카운터/레이블 카운터/요약 vs 평범한 += / 잠금 += ), /metrics 생성 시간
+# ------------------------------------------------------------------------------------
+THREADS = 4
+SCRAPE_WAIT = 2.0      # 시뮬레이터 '3' 목록/메시지가 들어올 때까지 기다리는 시간 (초)
+BENCH_PORT = 19464     # 실행 중인 앱(METRICS_PORT)과 겹치지 않는 포트
+
+
+def per_call(fn, number):
+    t = time.perf_counter()
+    fn(number)
+    return (time.perf_counter() - t) / number
+
+
+def bench_calls(number):
+    registry = metrics.Registry()
+    c = registry.counter('bench_counter_total', 'bench')
+    family = registry.counter('bench_labeled_total', 'bench', ('flag',))
+    s = registry.summary('bench_summary', 'bench')
+    lock = threading.Lock()
+    box = [0]
+
+    def plain(n):
+        for _ in range(n):
+            box[0] += 1
+
+    def locked(n):
+        for _ in range(n):
+            with lock:
+                box[0] += 1
+
+    def counter(n):
+        for _ in range(n):
+            c.inc()
+
+    def labeled(n):
+        for _ in range(n):
+            family.labels('2').inc()
+
+    def observe(n):
+        for _ in range(n):
+            s.observe(0.5)
+
+    return [(name, per_call(fn, number)) for name, fn in (
+        ('int +=', plain), ('lock + int +=', locked), ('Counter.inc', counter),
+        ('labels().inc', labeled), ('Summary.observe', observe))]
+
+
+def check_threads(number):
+    registry = metrics.Registry()
+    c = registry.counter('bench_counter_total', 'bench')
+    s = registry.summary('bench_summary', 'bench')
+    box = [0]
+
+    def work():
+        for _ in range(number):
+            c.inc()
+            s.observe(1.0)
+            box[0] += 1    # 비교용: 잠금 없는 += 는 스레드가 섞이면 값이 빠질 수 있음
+
+    threads = [threading.Thread(target=work) for _ in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    expected = THREADS * number
+    failures = []
+    if c.value != expected:
+        failures.append(f"Counter {c.value} != {expected}")
+    if s.value != (expected, float(expected)):
+        failures.append(f"Summary {s.value} != {(expected, float(expected))}")
+    if c._cells or s._cells:
+        failures.append(f"끝난 스레드 칸이 남음: Counter {len(c._cells)}, Summary {len(s._cells)}")
+    return failures, box[0], expected
+
+
+def check_endpoint():
+    # 임시 포트로 코어 + 지표 서버를 띄워 실제 /metrics 응답 확인
+    sim = DeviceSimulator(peers=6, peer_interval=0.2, msg_rate=20).start()
+    core = CarCore('11가1111', port=sim.port)
+    metrics.shutdown()
+    server = metrics.serve(port=BENCH_PORT)
+    core.start(speech=False)
+    time.sleep(SCRAPE_WAIT)
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    t = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=2) as resp:
+        body = resp.read().decode('utf-8')
+    scrape = time.perf_counter() - t
+    t = time.perf_counter()
+    for _ in range(100):
+        metrics.REGISTRY.render()
+    render = (time.perf_counter() - t) / 100
+    core.close()
+    sim.close()
+
+    values, kinds = metrics.parse(body)
+    failures = []
+    for key in ('car_serial_rx_frames_total{flag="2"}', 'car_serial_rx_frames_total{flag="3"}',
+                'car_peers', 'car_outbound_depth', 'car_serial_connected',
+                'process_resident_memory_bytes', 'process_cpu_seconds_total'):
+        if key not in values:
+            failures.append(f"/metrics에 {key} 없음")
+    if values.get('car_peers') != 6:
+        failures.append(f"car_peers = {values.get('car_peers')} (기대 6)")
+    return failures, len(values), scrape, render
+
+
+def main():
+    ap = argparse.ArgumentParser(description='지표 수집 비용 + 검증')
+    ap.add_argument('--count', type=int, default=200000, help='호출 횟수 (기본 200000)')
+    number = ap.parse_args().count
+
+    failures, plain, expected = check_threads(number // 4)
+    print(f"스레드 {THREADS}개 동시 증가: 카운터/요약 {expected}, (비교) 잠금 없는 int += {plain}")
+    endpoint_failures, n_samples, scrape, render = check_endpoint()
+    failures += endpoint_failures
+    for msg in failures:
+        print(f"FAIL {msg}")
+    print(f"/metrics 샘플 {n_samples}개, HTTP 수집 {scrape * 1000:.2f}ms, 생성 {render * 1000:.3f}ms")
+
+    print(f"\n{'call':<18} {'ns/call':>9}")
+    for name, sec in bench_calls(number):
+        print(f"{name:<18} {sec * 1e9:>9.0f}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+import os
+import sys
+import argparse
+import time
+import threading
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PyQt5.QtCore import QObject, QEventLoop, QTimer, pyqtSignal, pyqtSlot
+from PyQt5.QtWidgets import QApplication
+
+import car_device_gui as gui
+from car_core.engine import CarCore
+from car_core.session import SerialSession, FRAME_NEGOTIATE_TIMEOUT
+from car_core.tracing import percentile
+from device_simulator import DeviceSimulator, make_plates
+
+# ------------------------------------------------------------------------------------
+# SerialSession / MainApp 벤치마크 (하드웨어 없이 device_simulator의 pty 사용, Qt offscreen)
+#   python benchmarks/bench_serial_session.py [--count 메시지 수]
+#
+#  - throughput : 시뮬레이터가 '2' 메시지를 한꺼번에 쓰고 GUI 스레드 슬롯까지 도착하는 frames/s
+#  - latency    : 일정 주기로 보낸 메시지의 pty write → GUI 슬롯 도착 시간 분포
+#                 (세션 이벤트 → Qt 시그널 → GUI 스레드, 앱의 CoreSignals와 같은 경로)
+#  - outbound   : 여러 스레드가 동시에 send()한 '2' 메시지가 섞이지 않고 모두 도착하는지,
+#                 호출 스레드 비용(대기열에 넣기)과 쓰기 스레드의 대기+쓰기 지연/대기열 깊이
+#  - delivery   : 시뮬레이터가 '4' 응답 일부를 빠뜨릴 때 전달 추적의 재전송으로 모두 끝나는지
+#                 (대기 중 0건, 차량별 합계 = 보낸 수), 전달률/재전송 수/왕복 지연, send_text 호출 비용
+#                 legacy 응답에는 메시지 ID가 없어 차량별 순서로 연결하므로 응답이 빠지면 왕복 지연이 부풀려지고,
+#                 응답 없음 재전송도 하지 않으므로(중복 방지) 빠진 응답만큼 실패로 끝남
+#  - update_peers / 오버레이 : MainApp 메서드 호출 비용 (오버레이는 미리 만든 페이지로 전환 + 이벤트 처리까지)
+# ------------------------------------------------------------------------------------
+LATENCY_RATE = 200        # latency 측정 시 초당 메시지 수
+OUTBOUND_THREADS = 4      # outbound 측정 시 동시에 보내는 스레드 수
+DELIVERY_LOSS = 0.2       # delivery 측정 시 '4' 응답을 빠뜨리는 비율
+DELIVERY_TIMEOUT = 0.3    # delivery 측정 시 응답 대기 시간 (초, 앱 기본값보다 짧게)
+DELIVERY_RATE = 100       # delivery 측정 시 초당 메시지 수
+
+
+class Receiver(QObject):
+    # 시리얼 스레드의 'message' 이벤트를 시그널로 넘겨받아 GUI 스레드에서 도착 시각 기록 (내용 = 일련번호)
+    message_received = pyqtSignal(str, str)
+
+    def __init__(self, expected):
+        super().__init__()
+        self.expected = expected
+        self.arrivals = {}
+        self.loop = QEventLoop()
+        self.message_received.connect(self.on_message)
+
+    def on_event(self, kind, *args):
+        if kind == 'message':
+            self.message_received.emit(*args)
+
+    @pyqtSlot(str, str)
+    def on_message(self, car, seq):
+        self.arrivals[int(seq)] = time.monotonic()
+        if len(self.arrivals) >= self.expected:
+            self.loop.quit()
+
+    def wait(self, timeout):
+        if len(self.arrivals) < self.expected:
+            QTimer.singleShot(int(timeout * 1000), self.loop.quit)
+            self.loop.exec_()
+
+
+def start_session(sim, receiver):
+    session = SerialSession(port=sim.port, on_event=receiver.on_event).start()
+    # 버전 협상이 끝날 때까지 대기
+    deadline = time.monotonic() + FRAME_NEGOTIATE_TIMEOUT + 1.0
+    while time.monotonic() < deadline and (session.ser is None or session.negotiating):
+        time.sleep(0.01)
+    time.sleep(0.05)
+    return session
+
+
+def bench_throughput(binary, count):
+    sim = DeviceSimulator(peer_interval=0, binary=binary).start()
+    receiver = Receiver(count)
+    session = start_session(sim, receiver)
+    car = sim.peers[0]
+    if sim.codec.name == 'legacy':
+        data = b''.join(f"2{car},{i}\r\n".encode('utf-8') for i in range(count))
+    else:
+        data = b''.join(sim.codec.encode('2', f"{car},{i}", i & 0xFFFF) for i in range(count))
+    t0 = time.monotonic()
+    sim.write(data)
+    receiver.wait(30)
+    elapsed = (max(receiver.arrivals.values()) if receiver.arrivals else time.monotonic()) - t0
+    session.stop()
+    sim.close()
+    assert len(receiver.arrivals) == count, (session.codec.name, len(receiver.arrivals), count)
+    return session.codec.name, count / elapsed, len(data) / elapsed / 1e6
+
+
+def bench_latency(binary, count, rate=LATENCY_RATE):
+    sim = DeviceSimulator(peer_interval=0, binary=binary).start()
+    receiver = Receiver(count)
+    session = start_session(sim, receiver)
+    car = sim.peers[0]
+    sent = {}
+
+    def pace():
+        t0 = time.monotonic()
+        for i in range(count):
+            delay = t0 + i / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            sent[i] = time.monotonic()
+            sim.send('2', f"{car},{i}")
+
+    pacer = threading.Thread(target=pace, daemon=True)
+    pacer.start()
+    receiver.wait(count / rate + 10)
+    pacer.join()
+    session.stop()
+    sim.close()
+    lat = sorted((receiver.arrivals[i] - sent[i]) * 1000 for i in receiver.arrivals)
+    return session.codec.name, len(lat), lat
+
+
+def bench_outbound(binary, count, threads=OUTBOUND_THREADS):
+    sim = DeviceSimulator(peer_interval=0, binary=binary, resp_delay=0).start()
+    receiver = Receiver(0)
+    session = start_session(sim, receiver)
+    car = sim.peers[0]
+    per_thread = count // threads
+    put_sec = [0.0] * threads
+
+    def sender(t):
+        start = time.perf_counter()
+        for i in range(per_thread):
+            session.send('2', f"{car},{t}-{i}")
+        put_sec[t] = time.perf_counter() - start
+
+    workers = [threading.Thread(target=sender, args=(t,)) for t in range(threads)]
+    t0 = time.monotonic()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    expected = {f"{car},{t}-{i}" for t in range(threads) for i in range(per_thread)}
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        got = {m.content for m in sim.received if m.flag == '2'}
+        if got >= expected:
+            break
+        time.sleep(0.01)
+    elapsed = time.monotonic() - t0
+    stats = session.outbound.stats()
+    session.stop()
+    sim.close()
+    assert got == expected, (session.codec.name, len(expected - got), len(got - expected))
+    return session.codec.name, len(expected), len(expected) / elapsed, sum(put_sec) / len(expected), stats
+
+
+def bench_delivery(binary, count, loss=DELIVERY_LOSS):
+    sim = DeviceSimulator(peers=4, peer_interval=0, binary=binary, loss_ratio=loss).start()
+    core = CarCore('11가1111', port=sim.port)
+    core.delivery.timeout = DELIVERY_TIMEOUT
+    core.start(speech=False)
+    deadline = time.monotonic() + FRAME_NEGOTIATE_TIMEOUT + 1.0
+    while time.monotonic() < deadline and not (core.session.connected and not core.session.negotiating):
+        time.sleep(0.01)
+    time.sleep(0.05)
+
+    call_sec = 0.0
+    for i in range(count):
+        t = time.perf_counter()
+        core.send_text(sim.peers[i % len(sim.peers)], f"msg-{i}")
+        call_sec += time.perf_counter() - t
+        time.sleep(1.0 / DELIVERY_RATE)
+    # 재전송을 모두 쓰는 경우까지 기다림
+    deadline = time.monotonic() + DELIVERY_TIMEOUT * (core.delivery.max_retries + 2) + 2.0
+    while len(core.delivery) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    stats = core.delivery.stats()
+    pending = len(core.delivery)
+    name = core.session.codec.name
+    core.delivery.close()
+    core.session.stop()
+    sim.close()
+    assert pending == 0, (name, pending)
+    assert sum(st['delivered'] + st['failed'] for st in stats.values()) == count, (name, stats)
+    total = {k: sum(st[k] for st in stats.values()) for k in ('delivered', 'failed', 'retries')}
+    rtt_p50 = percentile(sorted(st['rtt_p50'] for st in stats.values()), 50)
+    return name, total, rtt_p50, max(st['rtt_p95'] for st in stats.values()), call_sec / count
+
+
+def bench_gui(number):
+    sim = DeviceSimulator(peers=20, peer_interval=0).start()
+    core = CarCore('11가1111', port=sim.port)
+    # 음성 모델은 불러오지 않고 녹음 가능 상태로만 표시
+    window = gui.MainApp('11가1111', core=core, speech=False)
+    window.voice_ready = True
+    app = QApplication.instance()
+    app.processEvents()
+    results = []
+
+    def update_peers(peers):
+        # 코어의 '3' 처리 + 화면 갱신 (목록이 그대로면 코어에서 끝남)
+        changed = core.peers.update(peers)
+        if changed is not None:
+            window.update_peers(changed)
+
+    lists = [make_plates(n, seed) for seed, n in enumerate((8, 12, 20, 35))]
+    t = time.perf_counter()
+    for i in range(number):
+        update_peers(lists[i % len(lists)])
+    results.append(('update_peers (changed)', (time.perf_counter() - t) / number))
+
+    same = lists[(number - 1) % len(lists)]
+    t = time.perf_counter()
+    for _ in range(number):
+        update_peers(same)
+    results.append(('update_peers (same)', (time.perf_counter() - t) / number))
+
+    # 녹음 화면은 음성 모델 없이 상용구만 있는 상태로 측정 (녹음 스레드를 띄우지 않음)
+    window.voice_ready = False
+    overlays = (
+        ('show_response', lambda: window.show_response('[12가3456] 전송 성공'), window.close_overlay),
+        ('show_message_prompt', lambda: window.show_message_prompt('12가3456', '먼저 가세요'), window.on_prompt_no),
+        ('show_tts_dialog', lambda: window.show_tts_dialog('12가3456', '트렁크가 열려 있어요'), window.close_overlay),
+        ('recording', lambda: window.on_peer_selected_by_name('12가3456'),
+         lambda: window.finish_recording(cancel=True)),
+    )
+    for name, show, close in overlays:
+        n = max(1, number // 10)
+        t_show = t_close = 0.0
+        for _ in range(n):
+            t = time.perf_counter()
+            show()
+            app.processEvents()
+            t_show += time.perf_counter() - t
+            t = time.perf_counter()
+            close()
+            app.processEvents()
+            t_close += time.perf_counter() - t
+        results.append((f"{name} show", t_show / n))
+        results.append((f"{name} close", t_close / n))
+
+    window.close()
+    app.processEvents()
+    sim.close()
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description='SerialSession / MainApp 벤치마크')
+    ap.add_argument('--count', type=int, default=2000, help='메시지 수 (기본 2000)')
+    count = ap.parse_args().count
+    app = QApplication(sys.argv[:1])
+
+    print(f"{'codec':<7} {'messages':>9} {'frames/s':>10} {'MB/s':>7}")
+    for binary in (False, True):
+        name, fps, mbps = bench_throughput(binary, count)
+        print(f"{name:<7} {count:>9} {fps:>10.0f} {mbps:>7.2f}")
+
+    print(f"\n{'codec':<7} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}   (@{LATENCY_RATE}/s)")
+    for binary in (False, True):
+        name, n, lat = bench_latency(binary, min(count, 1000))
+        print(f"{name:<7} {n:>5} {percentile(lat, 50):>8.2f} {percentile(lat, 95):>8.2f} "
+              f"{percentile(lat, 99):>8.2f} {lat[-1]:>8.2f}")
+
+    print(f"\n{'codec':<7} {'messages':>9} {'frames/s':>10} {'send us':>8} {'wait p50':>9} "
+          f"{'wait p95':>9} {'depth':>6}   ({OUTBOUND_THREADS} threads)")
+    for binary in (False, True):
+        name, n, fps, put, st = bench_outbound(binary, count)
+        print(f"{name:<7} {n:>9} {fps:>10.0f} {put * 1e6:>8.1f} {st['latency_p50']:>8.2f}ms "
+              f"{st['latency_p95']:>7.2f}ms {st['max_depth']:>6}")
+
+    print(f"\n{'codec':<7} {'messages':>9} {'delivered':>10} {'failed':>7} {'retries':>8} {'rtt p50':>8} "
+          f"{'rtt p95':>8} {'send us':>8}   (응답 {DELIVERY_LOSS:.0%} 손실)")
+    for binary in (False, True):
+        n = min(count, 300)
+        name, total, p50, p95, call = bench_delivery(binary, n)
+        print(f"{name:<7} {n:>9} {total['delivered']:>10} "
+              f"{total['failed']:>7} {total['retries']:>8} {p50:>6.1f}ms {p95:>6.1f}ms {call * 1e6:>8.1f}")
+
+    print(f"\n{'gui':<28} {'us/call':>10}")
+    for name, sec in bench_gui(max(100, count // 10)):
+        print(f"{name:<28} {sec * 1e6:>10.1f}")
+    del app
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import wave
+import argparse
+import resource
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from car_core import stt_backends
+from car_core.tracing import percentile
+
+# ------------------------------------------------------------------------------------
+# STT 백엔드 벤치마크 (실제 기기에서 실행)
+#   python benchmarks/bench_stt.py [--variant 이름=백엔드:키=값,키=값 ...] [--repeat N]
+#
+#  - 비교할 백엔드는 --variant, 없으면 stt_config.json의 "bench" 목록, 그것도 없으면 현재 설정 하나
+#      --variant tiny=whisper:model=tiny --variant tiny-int8=whisper:model=tiny,quantize=true,threads=4
+#  - 백엔드마다 새 프로세스에서 실행해 peak RSS(ru_maxrss)를 서로 섞이지 않게 측정
+#  - 코퍼스(stt_corpus/manifest.json)의 wav가 없으면 pyttsx3(espeak)로 합성해 둠 — 실제 녹음으로 교체 권장
+#  - RTF = 변환 시간 / 오디오 길이, CER = 글자 편집 거리 / 정답 글자 수 (공백·구두점 제외)
+# ------------------------------------------------------------------------------------
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stt_corpus')
+SAMPLERATE = 16000
+_IGNORED = set(' \t\n.,!?~…·\'"')
+
+
+def load_wav(path, samplerate=SAMPLERATE):
+    # 16-bit PCM wav → mono float32 (samplerate로 선형 보간 리샘플링)
+    import numpy as np
+    with wave.open(path, 'rb') as wf:
+        sr, ch = wf.getframerate(), wf.getnchannels()
+        x = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).astype(np.float32) / 32768.0
+    if ch > 1:
+        x = x.reshape(-1, ch).mean(axis=1)
+    if sr != samplerate:
+        n = int(len(x) * samplerate / sr)
+        x = np.interp(np.arange(n) * (sr / samplerate), np.arange(len(x)), x).astype(np.float32)
+    return x
+
+
+def synthesize_missing(items, corpus_dir=CORPUS_DIR):
+    # wav가 없는 항목만 TTS로 합성, 합성한 개수 반환
+    missing = [it for it in items if not os.path.exists(it['wav'])]
+    if not missing:
+        return 0
+    import pyttsx3
+    engine = pyttsx3.init(driverName='espeak')
+    for voice in engine.getProperty('voices'):
+        langs = [l.decode(errors='ignore') if isinstance(l, bytes) else str(l) for l in voice.languages or []]
+        if any('ko' in l for l in langs) or 'korean' in (voice.name or '').lower():
+            engine.setProperty('voice', voice.id)
+            break
+    for it in missing:
+        engine.save_to_file(it['text'], it['wav'])
+    engine.runAndWait()
+    return len(missing)
+
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    with open(os.path.join(corpus_dir, 'manifest.json'), encoding='utf-8') as f:
+        items = json.load(f)['items']
+    for it in items:
+        it['wav'] = os.path.join(corpus_dir, it.get('wav') or f"{it['id']}.wav")
+    return items
+
+
+def normalize(text):
+    return [c for c in text if c not in _IGNORED]
+
+
+def edit_distance(ref, hyp):
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i]
+        for j, h in enumerate(hyp, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h)))
+        prev = cur
+    return prev[-1]
+
+
+def parse_variant(spec):
+    # '이름=백엔드:키=값,키=값' → {'name', 'backend', 'options'}
+    name, _, rest = spec.partition('=')
+    backend, _, opts = rest.partition(':')
+    options = {}
+    for kv in filter(None, opts.split(',')):
+        key, _, value = kv.partition('=')
+        try:
+            options[key] = json.loads(value)
+        except ValueError:
+            options[key] = value
+    return {'name': name, 'backend': backend or stt_backends.DEFAULT_BACKEND, 'options': options}
+
+
+def current_rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_variant(variant, items, repeat, results):
+    # 하위 프로세스 본체: 모델 로딩 → 워밍업 1회 → 코퍼스 변환
+    try:
+        audios = [load_wav(it['wav']) for it in items]
+        base_rss = current_rss_mb()
+        backend = stt_backends.create(variant['backend'], variant['options'])
+        load_sec = sum(backend.load().values())
+        backend.transcribe(audios[0])
+        rows = []
+        for it, audio in zip(items, audios):
+            best = None
+            for _ in range(repeat):
+                text, timings = backend.transcribe(audio)
+                sec = sum(timings.values())
+                if best is None or sec < best[1]:
+                    best = (text, sec)
+            ref, hyp = normalize(it['text']), normalize(best[0])
+            rows.append({'id': it['id'], 'text': best[0], 'sec': best[1], 'audio_sec': len(audio) / SAMPLERATE,
+                         'errors': edit_distance(ref, hyp), 'chars': len(ref)})
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        results.put({'load_sec': load_sec, 'base_rss': base_rss, 'peak_rss': peak, 'rows': rows})
+    except Exception as e:
+        results.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def bench(variant, items, repeat):
+    ctx = mp.get_context('spawn')
+    results = ctx.Queue()
+    proc = ctx.Process(target=run_variant, args=(variant, items, repeat, results))
+    proc.start()
+    res = results.get()
+    proc.join()
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser(description='STT 백엔드 벤치마크 (RTF / peak RSS / CER)')
+    ap.add_argument('--variant', action='append', default=[], help='이름=백엔드:키=값,키=값')
+    ap.add_argument('--config', default=stt_backends.STT_CONFIG_FILE)
+    ap.add_argument('--corpus', default=CORPUS_DIR)
+    ap.add_argument('--repeat', type=int, default=1, help='항목별 반복 횟수 (가장 빠른 값 사용)')
+    ap.add_argument('--verbose', action='store_true', help='항목별 인식 결과 출력')
+    args = ap.parse_args()
+
+    config = stt_backends.load_config(args.config)
+    variants = [parse_variant(v) for v in args.variant] or config.get('bench') or [
+        {'name': 'current', 'backend': config['backend'], 'options': config['options']}]
+
+    items = load_corpus(args.corpus)
+    synthesized = synthesize_missing(items, args.corpus)
+    if synthesized:
+        print(f"wav {synthesized}개를 TTS로 합성했습니다 ({args.corpus})")
+
+    print(f"{'variant':<14} {'backend':<15} {'load s':>7} {'RTF':>6} {'RTF p95':>8} "
+          f"{'p50 ms':>7} {'RSS MB':>7} {'+model':>7} {'CER %':>6}")
+    for v in variants:
+        res = bench(v, items, args.repeat)
+        if 'error' in res:
+            print(f"{v['name']:<14} {v['backend']:<15} 실패 – {res['error']}")
+            continue
+        rows = res['rows']
+        rtf = sorted(r['sec'] / r['audio_sec'] for r in rows)
+        lat = sorted(r['sec'] * 1000 for r in rows)
+        total_rtf = sum(r['sec'] for r in rows) / sum(r['audio_sec'] for r in rows)
+        cer = 100.0 * sum(r['errors'] for r in rows) / max(1, sum(r['chars'] for r in rows))
+        print(f"{v['name']:<14} {v['backend']:<15} {res['load_sec']:>7.2f} {total_rtf:>6.2f} "
+              f"{percentile(rtf, 95):>8.2f} {percentile(lat, 50):>7.0f} {res['peak_rss']:>7.0f} "
+              f"{res['peak_rss'] - res['base_rss']:>7.0f} {cer:>6.1f}")
+        if args.verbose:
+            for r, it in zip(rows, items):
+                print(f"    {r['id']} ({r['errors']}/{r['chars']}) {it['text']} → {r['text']}")
+
+
+if __name__ == '__main__':
+    main()
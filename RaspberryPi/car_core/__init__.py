@@ -0,0 +1,10 @@
+# ------------------------------------------------------------------------------------
+# 차량 통신 코어 패키지 (PyQt 없이 동작)
+#   engine.CarCore      시리얼 세션 + 피어 목록 + 수신 대기열 + 음성 파이프라인
+#   session             Pi ↔ STM32 시리얼 세션 (frame_codec / hangul_codec)
+#   speech              VAD 녹음, Whisper 변환(stt_worker), TTS(tts_engine)
+#   metrics             잠금 없는 카운터/게이지 + loopback HTTP /metrics (python -m car_core.metrics로 tail)
+#   python -m car_core  GUI 없이 데몬/CLI로 실행
+#
+# STT 프로세스(spawn)도 이 패키지를 import하므로 여기서는 아무것도 불러오지 않음
+# ------------------------------------------------------------------------------------
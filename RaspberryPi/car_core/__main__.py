@@ -0,0 +1,114 @@
+import os
+import sys
+import signal
+import logging
+import argparse
+
+from . import device_log
+from .engine import CarCore, CONFIG_FILE
+from .session import SERIAL_PORT, FRAME_MODE
+
+# ------------------------------------------------------------------------------------
+# GUI 없이 코어만 실행 (PyQt를 불러오지 않아 메모리/시작 시간이 적음)
+#   python -m car_core [--plate 12가3456] [--no-speech] [--speak]
+#
+# 표준 입력 명령:
+#   send <차량> <내용>   텍스트 메시지 전송
+#   voice <차량>         녹음해서 음성 메시지 전송
+#   quick <차량> <번호>   상용구 전송 (번호 없이 'quick'만 입력하면 목록 출력)
+#   peers               현재 피어 목록
+#   stats               단계별 지연 시간 요약 + 송신 대기열 통계 + 차량별 전달률/왕복 지연
+#   quit
+#
+# 실행 중에는 http://127.0.0.1:9464/metrics 로 지표 제공 (CAR_METRICS_PORT, 'python -m car_core.metrics'로 확인)
+# ------------------------------------------------------------------------------------
+log = logging.getLogger('car.cli')
+
+
+def read_plate():
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE) as f:
+            return f.read().strip() or None
+    return None
+
+
+def main():
+    ap = argparse.ArgumentParser(prog='python -m car_core', description='차량 통신 코어 (GUI 없음)')
+    ap.add_argument('--plate', help=f'내 차량번호 (기본: {CONFIG_FILE})')
+    ap.add_argument('--port', default=SERIAL_PORT)
+    ap.add_argument('--frame-mode', default=FRAME_MODE, choices=('legacy', 'binary', 'auto'))
+    ap.add_argument('--no-speech', action='store_true', help='음성 기능(Whisper/TTS)을 불러오지 않음')
+    ap.add_argument('--speak', action='store_true', help='수신 메시지를 TTS로 읽어 줌')
+    args = ap.parse_args()
+
+    device_log.setup_logging()
+    signal.signal(signal.SIGUSR1, lambda *_: device_log.dump_ring())
+    plate = args.plate or read_plate()
+    if not plate:
+        log.error("차량번호가 없습니다. --plate로 지정하거나 %s에 저장해 주세요.", CONFIG_FILE)
+        return 1
+
+    core = CarCore(plate, port=args.port, frame_mode=args.frame_mode)
+    signal.signal(signal.SIGUSR2, lambda *_: core.log_stats())
+
+    def on_peers(peers):
+        log.info("피어 %d대: %s", len(peers), ', '.join(peers))
+
+    def on_inbox(kind, car):
+        # 화면이 없으므로 들어오는 대로 꺼내서 출력
+        while True:
+            item = core.inbox.pop()
+            if item is None:
+                break
+            if item.kind == 'message':
+                log.info("MSG [%s] %s", item.car, item.text)
+                if args.speak:
+                    core.speak(item.text)
+            else:
+                log.info("%s", item.text)
+
+    core.on('peers', on_peers)
+    core.on('inbox', on_inbox)
+    core.on('speech_ready', lambda timings: log.info(
+        "음성 준비 완료 (%s)", ', '.join(f"{k} {v:.2f}s" for k, v in timings.items())))
+    core.on('speech_failed', lambda err: log.error("음성 기능 초기화 실패 – %s", err))
+    core.start(speech=not args.no_speech)
+
+    try:
+        for line in sys.stdin:
+            cmd, _, rest = line.strip().partition(' ')
+            if cmd == 'send' and ' ' in rest:
+                car, text = rest.split(' ', 1)
+                core.send_text(car, text)
+            elif cmd == 'voice' and rest:
+                if not core.voice_ready:
+                    log.warning("음성 모델 로딩 중이라 녹음할 수 없습니다")
+                    continue
+                req = core.send_voice(rest, on_status=lambda t: log.info("%s", t))
+                req.wait()
+                log.info("음성 메시지 %s: %s", req.status, req.text)
+            elif cmd == 'quick':
+                car, _, num = rest.partition(' ')
+                if num.isdigit() and 1 <= int(num) <= len(core.quick_phrases):
+                    core.send_quick(car, core.quick_phrases[int(num) - 1])
+                else:
+                    for i, phrase in enumerate(core.quick_phrases, 1):
+                        log.info("%d. %s", i, phrase)
+            elif cmd == 'peers':
+                log.info("피어 %d대: %s", len(core.peers), ', '.join(core.peers.snapshot()))
+            elif cmd == 'stats':
+                core.log_stats()
+            elif cmd in ('quit', 'exit'):
+                break
+            elif cmd:
+                log.warning("알 수 없는 명령: %s", line.strip())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        core.close()
+        device_log.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,280 @@
+import time
+import heapq
+import logging
+import itertools
+import threading
+from collections import deque, OrderedDict
+
+from .tracing import percentile
+
+# ------------------------------------------------------------------------------------
+# '2' 메시지 전달 추적 (송신 → '4' 응답)
+#  - 보낸 메시지를 메시지 ID로 전달 대기 표에 올리고, '4' 응답이 오면 ID로 찾아 완료
+#    (legacy 응답은 ID가 없으므로 해당 차량의 가장 오래된 대기 메시지와 연결, ID가 있는 응답은 ID로만 찾음)
+#  - DELIVERY_TIMEOUT 안에 응답이 없거나 실패('0') 응답이 오면 같은 ID로 다시 보냄 (최대 DELIVERY_MAX_RETRIES번)
+#    응답 없음 재전송은 retry_on_timeout일 때만: 메시지 ID가 없는 legacy 링크에서는 받는 쪽이 중복을 가려낼 수 없고
+#    늦은 응답이 차량별 순서 매칭을 어긋나게 하므로, 코어가 binary 협상이 된 경우에만 켬 (아니면 한 번 기다리고 실패 처리)
+#    재연결 후 저널 재전송으로 ID가 바뀌면(rekey) 이전 ID의 응답이 늦게 와도 같은 메시지로 처리
+#  - 끝난 메시지의 ID는 최근 DELIVERY_RETIRED개까지 기억: 그 ID로 늦게 온 응답은 late로 세고 무시
+#  - 시간 초과 확인/재전송은 전용 타이머 스레드 하나가 하므로 GUI 스레드는 track()만 호출 (잠금 잡고 표에 추가)
+#  - 차량별 전달률(응답 성공 / 끝난 메시지)과 왕복 지연(마지막 송신 → 응답) p50/p95 통계
+#
+#   on_event(kind, delivery)
+#     'delivered' : 성공 응답 받음
+#     'retry'     : 시간 초과/실패 응답으로 같은 ID로 다시 보냄 (delivery.attempts 증가)
+#     'failed'    : 재전송 횟수를 다 써도 성공 응답을 받지 못함 (delivery.status = 'timeout' / 'fail')
+# ------------------------------------------------------------------------------------
+DELIVERY_TIMEOUT = 3.0        # 송신 후 응답을 기다리는 시간 (초)
+DELIVERY_MAX_RETRIES = 2      # 첫 송신 외에 다시 보내는 최대 횟수
+DELIVERY_RETRY_ON_FAIL = True  # 실패('0') 응답도 재전송 대상으로 볼지
+DELIVERY_RETRY_ON_TIMEOUT = True  # 응답이 없을 때도 재전송할지 (메시지 ID가 있는 링크에서만 안전)
+DELIVERY_HISTORY = 128        # 차량별로 남길 최근 왕복 지연 샘플 수
+DELIVERY_RETIRED = 256        # 늦은 응답을 알아보려고 기억하는 끝난 메시지 ID 수
+
+log = logging.getLogger('car.delivery')
+
+
+class Delivery:
+    __slots__ = ('key', 'car', 'content', 'msg_id', 'ids', 'first_sent', 'sent', 'deadline',
+                 'attempts', 'status', 'rtt', 'nacked', 'ctx')
+
+    def __init__(self, key, car, content, msg_id, now, timeout, ctx=None):
+        self.key = key
+        self.car, self.content = car, content
+        self.msg_id = msg_id
+        self.ids = [msg_id]          # 이 메시지에 쓴 모든 ID (늦게 온 이전 응답도 연결)
+        self.first_sent = self.sent = now
+        self.deadline = now + timeout
+        self.attempts = 1
+        self.status = None           # 'ok' / 'timeout' / 'fail'
+        self.rtt = None              # 마지막 송신 → 응답 (초)
+        self.nacked = False          # 실패('0') 응답을 받아 재전송을 기다리는 중
+        self.ctx = ctx               # 호출한 쪽 데이터 (예: Trace)
+
+
+class PeerStats:
+    __slots__ = ('sent', 'delivered', 'failed', 'retries', 'rtt')
+
+    def __init__(self):
+        self.sent = self.delivered = self.failed = self.retries = 0
+        self.rtt = deque(maxlen=DELIVERY_HISTORY)   # ms
+
+
+class DeliveryTracker:
+    def __init__(self, resend, timeout=DELIVERY_TIMEOUT, max_retries=DELIVERY_MAX_RETRIES,
+                 retry_on_fail=DELIVERY_RETRY_ON_FAIL, retry_on_timeout=DELIVERY_RETRY_ON_TIMEOUT,
+                 on_event=None, clock=time.monotonic, ready=lambda: True):
+        # resend(delivery): delivery.msg_id 그대로 다시 보내고 그 ID 반환, 지금 보낼 수 없으면(연결 끊김 등) None
+        #                   → 재전송 횟수를 쓰지 않고 DELIVERY_TIMEOUT 뒤에 다시 확인
+        # ready(): 지금 보낼 수 있는 링크인지, False인 동안은 시간 초과를 세지 않음 (재연결 후 저널이 다시 보냄)
+        self.resend = resend
+        self.ready = ready
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_on_fail = retry_on_fail
+        self.retry_on_timeout = retry_on_timeout   # 링크 상태에 따라 코어가 바꿈
+        self.on_event = on_event
+        self.clock = clock
+        self._by_id = {}                 # msg_id → Delivery (재전송 전 ID 포함)
+        self._by_car = {}                # car → OrderedDict(key → Delivery) (legacy 응답 매칭용)
+        self._retired = OrderedDict()    # 끝난 메시지의 ID → Delivery (최근 DELIVERY_RETIRED개)
+        self._timers = []                # (deadline, 순번, Delivery) 힙, deadline이 바뀐 항목은 꺼낼 때 무시
+        self._peers = {}                 # car → PeerStats
+        self._keys = itertools.count(1)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closing = False
+        self.late = 0                    # 이미 끝난 메시지에 온 응답 수
+        self.unknown = 0                 # 기록에 없는 ID(또는 대기 메시지가 없는 차량)로 온 응답 수
+
+    def __len__(self):
+        return sum(len(v) for v in self._by_car.values())
+
+    def start(self):
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self, timeout=1.0):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    # --- 송신/응답 ---
+    def track(self, car, content, msg_id, ctx=None):
+        now = self.clock()
+        with self._cond:
+            d = Delivery(next(self._keys), car, content, msg_id, now, self.timeout, ctx)
+            self._by_id[msg_id] = d
+            self._retired.pop(msg_id, None)      # 16비트 ID가 한 바퀴 돌아 다시 쓰임
+            self._by_car.setdefault(car, OrderedDict())[d.key] = d
+            self._peer(car).sent += 1
+            self._schedule(d)
+        return d
+
+    def rekey(self, old_id, new_id):
+        # 재연결 후 저널 재전송으로 ID가 바뀜: 새 ID로도 찾을 수 있게 하고 응답 대기 시간을 다시 잼
+        with self._cond:
+            d = self._by_id.get(old_id)
+            if d is None or d.status is not None:
+                return
+            d.msg_id = new_id
+            d.ids.append(new_id)
+            self._by_id[new_id] = d
+            self._retired.pop(new_id, None)
+            d.sent = self.clock()
+            d.deadline = d.sent + self.timeout
+            self._schedule(d)
+
+    def response(self, car, status, msg_id=None):
+        # '4' 응답 처리, 연결된 Delivery 반환 (이미 끝났거나 모르는 메시지면 None → 호출한 쪽은 무시)
+        now = self.clock()
+        with self._cond:
+            if msg_id is not None:
+                d = self._by_id.get(msg_id)
+            else:
+                pending = self._by_car.get(car)
+                d = next(iter(pending.values())) if pending else None
+            if d is None or d.status is not None:
+                if msg_id is not None and msg_id in self._retired:
+                    self.late += 1
+                else:
+                    self.unknown += 1
+                return None
+            d.rtt = now - d.sent
+            self._peer(d.car).rtt.append(d.rtt * 1000)
+            if status == '1':
+                self._finish(d, 'ok')
+                event = 'delivered'
+            elif self.retry_on_fail and d.attempts <= self.max_retries:
+                # 실패 응답: 응답 대기 시간을 기다리지 않고 타이머 스레드가 바로 재전송
+                d.nacked = True
+                d.deadline = now
+                self._schedule(d)
+                return d
+            else:
+                self._finish(d, 'fail')
+                event = 'failed'
+        self._notify(event, d)
+        return d
+
+    # --- 타이머 스레드 ---
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closing:
+                    now = self.clock()
+                    if self._timers and self._timers[0][0] <= now:
+                        break
+                    self._cond.wait(self._timers[0][0] - now if self._timers else None)
+                if self._closing:
+                    return
+                _, _, d = heapq.heappop(self._timers)
+                if d.status is not None or d.deadline > now:
+                    continue      # 이미 끝났거나 응답 대기 시간이 다시 잡힌 항목
+                if not self.ready():
+                    d.deadline = now + self.timeout
+                    self._schedule(d)
+                    continue
+                if d.attempts > self.max_retries or not (d.nacked or self.retry_on_timeout):
+                    self._finish(d, 'timeout')
+                    exhausted = True
+                else:
+                    exhausted = False
+            if exhausted:
+                log.warning("[%s] 응답 없음, %d번 보내고 포기: %s", d.car, d.attempts, d.content)
+                self._notify('failed', d)
+            else:
+                self._retry(d)
+
+    def _retry(self, d):
+        # 잠금 밖에서 resend (송신 대기열이 가득 차면 잠시 막힐 수 있음)
+        sent_id = self.resend(d)
+        with self._cond:
+            if d.status is not None:
+                return        # 재전송하는 사이에 응답이 옴
+            if sent_id is None:
+                d.deadline = self.clock() + self.timeout
+                self._schedule(d)
+                return
+            d.attempts += 1
+            d.nacked = False
+            d.sent = self.clock()
+            d.deadline = d.sent + self.timeout
+            self._peer(d.car).retries += 1
+            self._schedule(d)
+        log.info("[%s] 재전송 %d/%d (id %s): %s",
+                 d.car, d.attempts - 1, self.max_retries, d.msg_id, d.content)
+        self._notify('retry', d)
+
+    # --- 내부 (잠금을 잡은 상태에서 호출) ---
+    def _schedule(self, d):
+        heapq.heappush(self._timers, (d.deadline, next(self._seq), d))
+        if self._timers[0][2] is d:
+            self._cond.notify_all()
+
+    def _finish(self, d, status):
+        d.status = status
+        for msg_id in d.ids:
+            if self._by_id.get(msg_id) is d:
+                del self._by_id[msg_id]
+            self._retired[msg_id] = d
+            self._retired.move_to_end(msg_id)
+        while len(self._retired) > DELIVERY_RETIRED:
+            self._retired.popitem(last=False)
+        pending = self._by_car.get(d.car)
+        if pending is not None:
+            pending.pop(d.key, None)
+            if not pending:
+                del self._by_car[d.car]
+        peer = self._peer(d.car)
+        if status == 'ok':
+            peer.delivered += 1
+        else:
+            peer.failed += 1
+
+    def _peer(self, car):
+        peer = self._peers.get(car)
+        if peer is None:
+            peer = self._peers[car] = PeerStats()
+        return peer
+
+    def _notify(self, kind, d):
+        if self.on_event:
+            try:
+                self.on_event(kind, d)
+            except Exception:
+                log.exception("'%s' 전달 이벤트 콜백 오류", kind)
+
+    # --- 통계 ---
+    def stats(self):
+        # car → {sent, delivered, failed, retries, pending, ratio, rtt_p50, rtt_p95} (ms)
+        with self._cond:
+            snapshot = {car: (p.sent, p.delivered, p.failed, p.retries, sorted(p.rtt),
+                              len(self._by_car.get(car, ())))
+                        for car, p in self._peers.items()}
+        result = {}
+        for car, (sent, delivered, failed, retries, rtt, pending) in snapshot.items():
+            done = delivered + failed
+            result[car] = {
+                'sent': sent, 'delivered': delivered, 'failed': failed, 'retries': retries,
+                'pending': pending, 'ratio': delivered / done if done else None,
+                'rtt_p50': percentile(rtt, 50), 'rtt_p95': percentile(rtt, 95),
+            }
+        return result
+
+    def log_stats(self):
+        stats = self.stats()
+        if not stats:
+            log.info("전달 기록 없음")
+        for car, st in sorted(stats.items()):
+            ratio = f"{st['ratio'] * 100:5.1f}%" if st['ratio'] is not None else '    -'
+            log.info("%-10s 전달 %s (%d/%d, 실패 %d, 대기 %d, 재전송 %d) 왕복 p50=%.0fms p95=%.0fms",
+                     car, ratio, st['delivered'], st['sent'], st['failed'], st['pending'],
+                     st['retries'], st['rtt_p50'], st['rtt_p95'])
+        if self.late or self.unknown:
+            log.info("무시한 응답: 이미 끝난 메시지 %d건, 모르는 메시지 %d건", self.late, self.unknown)
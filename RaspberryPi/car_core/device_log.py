@@ -0,0 +1,139 @@
+import os
+import sys
+import queue
+import logging
+import threading
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+
+# ------------------------------------------------------------------------------------
+# 로깅
+#  - 어느 스레드에서든 logging.getLogger('car.xxx')로 바로 호출 (Qt 시그널 불필요)
+#  - 메시지 포맷은 %-인자로 넘겨 실제 출력할 때만 조립 (꺼진 DEBUG는 레벨 비교만 하고 끝)
+#  - 콘솔/파일 출력은 로깅 전용 스레드가 담당해 호출한 스레드는 I/O를 하지 않음
+#  - 최근 기록은 링 버퍼에 남겨 두었다가 필요할 때 덤프 (SIGUSR1)
+# ------------------------------------------------------------------------------------
+LOG_LEVEL = os.environ.get('CAR_LOG_LEVEL', 'INFO')
+LOG_FILE = os.environ.get('CAR_LOG_FILE')      # 지정하면 파일에도 기록
+LOG_RING_SIZE = 1000                            # 링 버퍼에 남길 최근 기록 수
+LOG_BATCH_SIZE = 64                             # 파일 기록을 모아서 쓰는 단위
+LOG_FLUSH_INTERVAL = 1.0                        # 모인 기록이 적어도 이 주기로 파일에 씀 (초)
+LOG_FORMAT = '[%(asctime)s] %(levelname)s %(name)s: %(message)s'
+LOG_DATEFMT = '%H:%M:%S'
+
+_ring = None
+_listener = None
+
+
+class LazyQueueHandler(QueueHandler):
+    # 기본 QueueHandler는 호출한 스레드에서 메시지를 조립하므로, 조립을 리스너 스레드로 미룸
+    def prepare(self, record):
+        return record
+
+
+class RingBufferHandler(logging.Handler):
+    def __init__(self, capacity=LOG_RING_SIZE, level=logging.NOTSET):
+        super().__init__(level)
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def dump(self, stream=None):
+        # 링 버퍼 내용을 포맷해 stream(기본 stderr)에 출력, 출력한 줄 수 반환
+        stream = stream or sys.stderr
+        fmt = self.formatter or logging.Formatter(LOG_FORMAT, LOG_DATEFMT)
+        records = list(self.records)
+        stream.write(''.join(fmt.format(r) + '\n' for r in records))
+        stream.flush()
+        return len(records)
+
+
+class BatchFileHandler(logging.Handler):
+    # 기록을 모아 두었다가 LOG_BATCH_SIZE개 또는 LOG_FLUSH_INTERVAL마다 한 번에 씀
+    def __init__(self, path, batch_size=LOG_BATCH_SIZE, interval=LOG_FLUSH_INTERVAL):
+        super().__init__()
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []
+        self._file = open(path, 'a', encoding='utf-8')
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, args=(interval,), daemon=True)
+        self._flusher.start()
+
+    def emit(self, record):
+        line = self.format(record) + '\n'
+        with self.lock:
+            self._pending.append(line)
+            if len(self._pending) < self.batch_size:
+                return
+        self.flush()
+
+    def flush(self):
+        with self.lock:
+            lines, self._pending = self._pending, []
+            if lines and not self._file.closed:
+                self._file.write(''.join(lines))
+                self._file.flush()
+
+    def _flush_loop(self, interval):
+        while not self._stop.wait(interval):
+            self.flush()
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        self._file.close()
+        super().close()
+
+
+def setup_logging(level=LOG_LEVEL, file_path=LOG_FILE, ring_size=LOG_RING_SIZE):
+    # 'car' 로거 계층 설정, 두 번 호출해도 한 번만 적용
+    global _ring, _listener
+    root = logging.getLogger('car')
+    if _listener is not None:
+        return root
+    # 레벨은 로거에서만 거름 → 꺼진 레벨의 호출은 레코드도 만들지 않음
+    root.setLevel(level)
+    root.propagate = False
+    formatter = logging.Formatter(LOG_FORMAT, LOG_DATEFMT)
+
+    outputs = []
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(formatter)
+    outputs.append(console)
+    if file_path:
+        file_handler = BatchFileHandler(file_path)
+        file_handler.setFormatter(formatter)
+        outputs.append(file_handler)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(LazyQueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *outputs)
+    _listener.start()
+
+    _ring = RingBufferHandler(ring_size)
+    _ring.setFormatter(formatter)
+    root.addHandler(_ring)
+    return root
+
+
+def set_debug(enabled):
+    # 실행 중에 DEBUG 출력 켜고 끄기
+    logging.getLogger('car').setLevel(logging.DEBUG if enabled else LOG_LEVEL)
+
+
+def dump_ring(stream=None):
+    if _ring is None:
+        return 0
+    return _ring.dump(stream)
+
+
+def shutdown():
+    # 남은 기록을 모두 출력하고 로깅 스레드 종료
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for h in _listener.handlers:
+            h.close()
+        _listener = None
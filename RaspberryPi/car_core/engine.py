@@ -0,0 +1,308 @@
+import time
+import logging
+import threading
+
+from .session import SerialSession, SERIAL_PORT, FRAME_MODE
+from .peers import PeerTable
+from .delivery import DeliveryTracker
+from .inbox import InboundQueue
+from . import tracing
+from . import metrics
+from . import quick_phrases
+
+# ------------------------------------------------------------------------------------
+# 차량 통신 코어 (GUI 없음)
+#  - 시리얼 세션, 피어 목록, 수신 대기열, 음성 파이프라인, 지연 시간 추적을 소유
+#  - 상태가 바뀌면 on(kind, fn)으로 등록한 콜백 호출 (호출 스레드는 시리얼/음성 스레드)
+#  - 대기열 깊이/송신 통계/전달 현황은 metrics 콜백으로 등록해 /metrics를 읽을 때만 계산
+#
+#   'open'                          포트 연결(재연결 포함), '0' 차량번호 전송 완료
+#   'disconnected'  (오류 문자열,)   시리얼 연결 끊김, 세션이 재연결 시도 중
+#   'recovered'     (초, 재전송 수)  재연결 후 보내지 못한 메시지 재전송까지 끝남
+#   'closed'                        시리얼 수신 종료
+#   'peers'         (목록,)         피어 목록이 바뀜 (내 차량 제외)
+#   'inbox'         (kind, 차량)    수신 대기열에 항목 추가 ('message' / 'response')
+#   'delivery'      (kind, Delivery) 보낸 메시지의 전달 결과 ('delivered' / 'retry' / 'failed', delivery.py)
+#   'speech_ready'  (소요 시간,)     음성 기능 준비 완료
+#   'speech_failed' (오류 문자열,)
+#   'stt_event'     (kind, info)    STT 프로세스 상태 (모델 해제/재로딩 등)
+# ------------------------------------------------------------------------------------
+CONFIG_FILE = 'vehicle_info.txt'   # 내 차량번호 저장 파일
+
+log = logging.getLogger('car.core')
+
+VOICE_REQUESTS = metrics.counter('car_voice_requests_total', '음성 메시지 처리 결과', ('status',))
+QUICK_SENT = metrics.counter('car_quick_sent_total', '상용구 전송 수')
+STT_SECONDS = metrics.summary('car_stt_seconds', '녹음 종료 → 최종 텍스트 (초)')
+STT_RTF = metrics.summary('car_stt_rtf', '변환 시간 / 녹음 길이 (실시간 배율)')
+STT_RTF_LAST = metrics.gauge('car_stt_rtf_last', '마지막 음성 메시지의 실시간 배율')
+
+
+class VoiceRequest:
+    # 음성 메시지 한 건 (녹음 → 변환 → 전송), cancel()로 취소
+    def __init__(self, core, car, trace):
+        self.core = core
+        self.car = car
+        self.trace = trace
+        self.session = core.speech.session()
+        self.text = ''
+        self.status = None      # 'sent' / 'dropped' / 'cancelled' / 'no_speech' / 'empty' / 'error'
+        self.done = threading.Event()
+
+    def cancel(self):
+        # 녹음을 멈추고 대기/진행 중인 변환 작업을 취소
+        self.session.cancel()
+        self.core.speech.stop_recording()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class CarCore:
+    def __init__(self, my_plate, port=SERIAL_PORT, frame_mode=FRAME_MODE):
+        self.my_plate = my_plate
+        self.session = SerialSession(port, frame_mode=frame_mode, on_event=self._on_session_event)
+        self.peers = PeerTable(my_plate)
+        self.inbox = InboundQueue()      # 표시 대기 중인 수신 메시지/응답
+        self.tracer = tracing.Tracer()   # 음성 메시지 단계별 지연 시간
+        self.delivery = DeliveryTracker(self._resend, on_event=self._on_delivery,   # '2' 메시지별 '4' 응답 대기/재전송
+                                        ready=lambda: self.session.link_ready)
+        self.speech = None               # 음성 기능 준비 전에는 None
+        self.quick_phrases = quick_phrases.load_phrases()   # 녹음 없이 바로 보내는 상용구
+        self._listeners = {}
+        # 세션 이벤트 → 처리 함수 테이블
+        self._session_handlers = {
+            'open': self._on_open,
+            'closed': lambda: self._emit('closed'),
+            'disconnected': lambda error: self._emit('disconnected', error),
+            'recovered': lambda sec, count: self._emit('recovered', sec, count),
+            'resent': self._on_resent,
+            'peers': self._on_peers,
+            'message': self._on_message,
+            'response': self._on_response,
+        }
+        self._register_metrics()
+
+    # --- 이벤트 ---
+    def on(self, kind, fn):
+        self._listeners.setdefault(kind, []).append(fn)
+        return fn
+
+    def _emit(self, kind, *args):
+        for fn in self._listeners.get(kind, ()):
+            try:
+                fn(*args)
+            except Exception:
+                log.exception("'%s' 이벤트 콜백 오류", kind)
+
+    def _register_metrics(self):
+        outbound, session, delivery = self.session.outbound, self.session, self.delivery
+
+        def delivery_totals():
+            totals = {('delivered',): 0, ('failed',): 0, ('retried',): 0}
+            for st in delivery.stats().values():
+                totals[('delivered',)] += st['delivered']
+                totals[('failed',)] += st['failed']
+                totals[('retried',)] += st['retries']
+            return totals
+
+        callback = metrics.callback
+        callback('car_serial_connected', '시리얼 포트 연결 여부', lambda: session.connected)
+        callback('car_serial_reconnects_total', '시리얼 재연결 횟수', lambda: session.reconnects, 'counter')
+        callback('car_serial_tx_frames_total', '포트에 쓴 프레임 수', lambda: outbound.written, 'counter')
+        callback('car_serial_tx_bytes_total', '포트에 쓴 바이트', lambda: outbound.bytes_written, 'counter')
+        callback('car_outbound_depth', '송신 대기열 깊이', lambda: len(outbound))
+        callback('car_outbound_lost_total', '송신 대기열에서 버리거나 거부한 프레임 수',
+                 lambda: {('dropped',): outbound.dropped, ('rejected',): outbound.rejected,
+                          ('failed',): outbound.failed}, 'counter', ('reason',))
+        callback('car_journal_depth', '송신 저널에 남은 메시지 수', lambda: len(session.journal))
+        callback('car_inbox_depth', '표시 대기 중인 수신 항목 수', lambda: len(self.inbox))
+        callback('car_delivery_pending', "'4' 응답을 기다리는 메시지 수", lambda: len(delivery))
+        callback('car_delivery_total', '전달 결과별 메시지 수', delivery_totals, 'counter', ('result',))
+        callback('car_speech_ready', '음성 기능 준비 여부', lambda: self.speech is not None)
+        callback('car_tts_backlog', '합성/재생 대기 중인 TTS 항목 수',
+                 lambda: self.speech.tts.backlog if self.speech is not None and self.speech.tts else 0)
+
+    # --- 시작/종료 ---
+    def start(self, speech=True):
+        metrics.serve()
+        self.delivery.start()
+        self.session.start()
+        if speech:
+            self.load_speech()
+        return self
+
+    def load_speech(self):
+        # 무거운 음성 라이브러리/모델을 백그라운드 스레드에서 준비
+        threading.Thread(target=self._load_speech, daemon=True).start()
+
+    def _load_speech(self):
+        timings = {}
+        try:
+            t = time.perf_counter()
+            try:
+                from . import speech
+            except ImportError as e:
+                raise RuntimeError(
+                    f"라이브러리가 누락되었습니다({e}). "
+                    "'pip install sounddevice scipy whisper pyttsx3' 명령어로 설치해주세요.")
+            timings['import'] = time.perf_counter() - t
+            pipeline = speech.SpeechPipeline(
+                on_stt_event=lambda kind, info: self._emit('stt_event', kind, info),
+                preload_phrases=self.quick_phrases)
+        except Exception as e:
+            self._emit('speech_failed', str(e))
+            return
+        timings.update(pipeline.timings)
+        self.speech = pipeline
+        self._emit('speech_ready', timings)
+
+    @property
+    def voice_ready(self):
+        return self.speech is not None
+
+    def log_stats(self):
+        self.tracer.log_summary()
+        self.session.outbound.log_stats()
+        self.delivery.log_stats()
+        times = sorted(self.session.recover_times)
+        if times:
+            log.info("시리얼 재연결 %d회, 복구 시간 p50=%.2fs max=%.2fs, 저널 대기 %d건",
+                     self.session.reconnects, tracing.percentile(times, 50), times[-1],
+                     len(self.session.journal))
+
+    def close(self):
+        self.log_stats()
+        self.delivery.close()
+        self.session.stop()
+        metrics.shutdown()
+        if self.speech:
+            self.speech.close()
+
+    # --- 수신 처리 (시리얼 스레드) ---
+    def _on_session_event(self, kind, *args):
+        handler = self._session_handlers.get(kind)
+        if handler:
+            handler(*args)
+
+    def _on_open(self):
+        # 응답 없음 재전송은 메시지 ID가 있는 binary 프레임일 때만 (legacy는 받는 쪽이 중복을 구분할 수 없음)
+        self.delivery.retry_on_timeout = self.session.codec.name == 'binary'
+        self.session.send('0', self.my_plate)
+        log.info("초기 차량번호 전송: %s", self.my_plate)
+        self._emit('open')
+
+    def _on_peers(self, peers):
+        changed = self.peers.update(peers)
+        if changed is not None:
+            self._emit('peers', changed)
+
+    def _on_message(self, car, msg):
+        self.inbox.push('message', car, msg)
+        self._emit('inbox', 'message', car)
+
+    def _on_resent(self, old_id, new_id):
+        self.tracer.rekey(old_id, new_id)
+        self.delivery.rekey(old_id, new_id)
+
+    def _on_response(self, car, status, msg_id):
+        delivery = self.delivery.response(car, status, msg_id)
+        if delivery is None:
+            # 이미 끝난(늦게 온 중복 응답) 또는 모르는 메시지: 결과를 다시 표시하지 않음
+            log.info("RESPONSE: [%s] 대기 중이 아닌 메시지의 응답 무시 (id %s)", car, msg_id)
+            return
+        if delivery.status is None:
+            # 실패 응답이지만 재전송할 예정: 결과는 재전송 뒤의 응답으로 표시
+            log.info("RESPONSE: [%s] 전송 실패, 재전송 예정", car)
+            return
+        result = f"[{car}] 전송 {'성공' if status=='1' else '실패'}"
+        trace = self.tracer.response(car, status, delivery.msg_id)
+        if trace is not None:
+            log.info("RESPONSE: %s (%.0fms)", result, (time.monotonic() - trace.t0) * 1000)
+        else:
+            log.info("RESPONSE: %s", result)
+        self.inbox.push('response', car, result)
+        self._emit('inbox', 'response', car)
+
+    # --- 전달 추적 (타이머 스레드) ---
+    def _resend(self, delivery):
+        # 같은 메시지 ID로 다시 보냄 (응답/Trace는 그 ID로 계속 연결됨)
+        # 연결이 끊겼거나 재연결 후 협상 중이면 저널이 곧 재전송하므로 여기서는 보내지 않음 (중복 방지)
+        if not self.session.link_ready:
+            return None
+        return self.session.send('2', f"{delivery.car},{delivery.content}", delivery.msg_id)
+
+    def _on_delivery(self, kind, delivery):
+        if kind == 'failed' and delivery.status == 'timeout':
+            # 응답 없이 재전송을 다 씀: 응답('4')과 같은 경로로 화면에 알림
+            self.tracer.abandon(delivery.msg_id)
+            self.inbox.push('response', delivery.car, f"[{delivery.car}] 전송 실패 (응답 없음)")
+            self._emit('inbox', 'response', delivery.car)
+        self._emit('delivery', kind, delivery)
+
+    # --- 송신 ---
+    def send_text(self, car, text, trace=None):
+        # '2' 메시지 전송, 메시지 ID 반환 (응답이 오면 trace 종료)
+        # 송신 대기열이 거부하면 trace를 'dropped'로 끝내고 None 반환
+        trace = trace or self.tracer.begin(car)
+        with trace.span('send'):
+            msg_id = self.session.send('2', f"{car},{text}")
+        if msg_id is None:
+            self.tracer.finish(trace, 'dropped')
+            return None
+        self.tracer.sent(trace, msg_id)
+        self.delivery.track(car, text, msg_id)
+        return msg_id
+
+    def send_quick(self, car, phrase):
+        # 상용구는 녹음/STT 없이 호출한 스레드에서 바로 전송 (음성 기능 준비 전에도 가능)
+        trace = self.tracer.begin(car)
+        trace.attrs['kind'] = 'quick'
+        QUICK_SENT.inc()
+        msg_id = self.send_text(car, phrase, trace)
+        if msg_id is None:
+            return None
+        log.info("QUICK: [%s] %s (%.1fms)", car, phrase, (trace.sent_at() - trace.t0) * 1000)
+        return msg_id
+
+    def send_voice(self, car, on_status=None, on_done=None):
+        # 녹음 → 변환 → 전송을 별도 스레드에서 진행, 바로 VoiceRequest 반환
+        # on_status(text): 진행 상황 문구, on_done(request): 끝났을 때 (둘 다 작업 스레드에서 호출)
+        if self.speech is None:
+            raise RuntimeError("음성 기능이 아직 준비되지 않았습니다")
+        req = VoiceRequest(self, car, self.tracer.begin(car))
+        threading.Thread(target=self._run_voice, args=(req, on_status, on_done), daemon=True).start()
+        return req
+
+    def _run_voice(self, req, on_status, on_done):
+        status = 'error'
+        try:
+            req.text, status = self.speech.record(req.session, req.trace, on_status)
+            if status is None:
+                sent = self.send_text(req.car, req.text, req.trace) is not None
+                status = 'sent' if sent else 'dropped'
+            elif status == 'cancelled':
+                log.info("%s 메시지 녹음 취소", req.car)
+        except Exception as e:
+            log.exception("음성 메시지 처리 오류 – %s", e)
+        finally:
+            req.status = status
+            VOICE_REQUESTS.labels(status).inc()
+            rtf = req.trace.attrs.get('stt_rtf')
+            if rtf is not None:
+                STT_RTF.observe(rtf)
+                STT_RTF_LAST.set(rtf)
+                s, e = req.trace.spans['stt']
+                STT_SECONDS.observe(e - s)
+            # 전송까지 간 건은 응답('4')을 받을 때, 대기열이 거부한 건은 send_text에서 종료
+            if status not in ('sent', 'dropped'):
+                self.tracer.finish(req.trace, status)
+            req.done.set()
+            if on_done:
+                on_done(req)
+
+    def speak(self, text):
+        if self.speech is None:
+            log.warning("TTS 엔진이 아직 준비되지 않았습니다")
+            return
+        self.speech.speak(text)
@@ -0,0 +1,240 @@
+import time
+from collections import namedtuple
+
+from . import hangul_codec
+
+# ------------------------------------------------------------------------------------
+# Pi ↔ STM32 프레임 코덱
+#
+# legacy : "<flag><내용>\n" 텍스트 한 줄 (현재 STM32/ESP01 펌웨어가 쓰는 방식)
+# binary : 길이/메시지 ID/CRC가 붙은 바이너리 프레임, 긴 메시지는 조각으로 나눠 전송
+#          펌웨어가 이 프레임과 HELLO를 처리하도록 업데이트되어야 쓸 수 있음 — 현재 펌웨어는 HELLO에 응답하지 않으므로
+#          실제 링크는 legacy로 유지되고, binary는 device_simulator --binary로만 검증됨
+#
+#   SOF(0xA5) | VER | LEN | TYPE | FLAGS | MSG_ID(2, BE) | FRAG_IDX | FRAG_CNT | PAYLOAD(LEN) | CRC16(2, BE)
+#   CRC16은 VER부터 PAYLOAD 끝까지, CRC-16/MODBUS (0xA001, 초기값 0xFFFF — 펌웨어 쪽 구현 시 같은 계산 사용)
+#
+# 버전 협상: Pi가 HELLO 프레임(payload = 지원 버전)을 보내고 같은 HELLO가 돌아오면 binary 사용,
+#           응답이 없으면 legacy 유지. HELLO 뒤에는 '\n'을 붙여 legacy 펌웨어가 한 줄로 버리게 함.
+# ------------------------------------------------------------------------------------
+SOF = 0xA5
+VERSION = 1
+HELLO = 'H'
+HEADER_LEN = 9
+CRC_LEN = 2
+FRAME_MAX = 240                    # ESP-NOW 최대 250바이트에서 펌웨어 플래그/CRC 여유를 뺀 크기
+MAX_PAYLOAD = FRAME_MAX - HEADER_LEN - CRC_LEN
+REASSEMBLY_TIMEOUT = 5.0           # 조각이 다 모이지 않으면 이 시간 후 폐기 (초)
+
+# FLAGS 비트
+FLAG_ENC_HANGUL = 0x01             # payload가 한글 압축 인코딩
+FLAG_ENC_DICT = 0x02               # payload에 상용구 사전 코드(0xC0-0xFE)가 실제로 들어 있음
+
+# binary 모드에서 텍스트 payload를 한글 압축 인코딩할지 (UTF-8보다 짧을 때만 적용)
+HANGUL_COMPRESS = True
+HANGUL_DICT = True
+
+# legacy 모드 한계 (ESP01 UART_LENGTH 256, ESP-NOW 250바이트 - 플래그 1 - CRC 2)
+LEGACY_MAX_LINE = 255
+LEGACY_MAX_TEXT = 250 - 3
+
+Message = namedtuple('Message', 'flag content msg_id flags')
+Frame = namedtuple('Frame', 'type flags msg_id frag_idx frag_cnt payload')
+
+
+def _make_crc_table():
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc16(data, crc=0xFFFF):
+    table = _CRC_TABLE
+    for b in data:
+        crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+    return crc
+
+
+def truncate_utf8(text, max_bytes):
+    # 글자 중간에서 잘리지 않도록 UTF-8 경계에서 자름
+    raw = text.encode('utf-8')
+    if len(raw) <= max_bytes:
+        return text, False
+    return raw[:max_bytes].decode('utf-8', errors='ignore'), True
+
+
+def encode_frames(ftype, payload, msg_id, flags=0, max_payload=MAX_PAYLOAD):
+    # payload를 max_payload 단위 조각 프레임들로 나눠 bytes 리스트 반환
+    count = max(1, -(-len(payload) // max_payload))
+    if count > 255:
+        raise ValueError(f"payload가 너무 깁니다 ({len(payload)} bytes)")
+    frames = []
+    for idx in range(count):
+        part = payload[idx * max_payload:(idx + 1) * max_payload]
+        body = bytes((VERSION, len(part), ord(ftype), flags,
+                      (msg_id >> 8) & 0xFF, msg_id & 0xFF, idx, count)) + part
+        crc = crc16(body)
+        frames.append(bytes((SOF,)) + body + bytes((crc >> 8, crc & 0xFF)))
+    return frames
+
+
+class FrameDecoder:
+    # 바이트 스트림에서 프레임을 찾아냄, SOF/CRC가 맞지 않으면 한 바이트씩 밀며 재동기화
+    def __init__(self):
+        self._buf = bytearray()
+        self.crc_errors = 0
+        self.skipped = 0
+
+    def feed(self, data):
+        buf = self._buf
+        buf += data
+        frames = []
+        pos = 0
+        n = len(buf)
+        while True:
+            sof = buf.find(SOF, pos)
+            if sof < 0:
+                self.skipped += n - pos
+                pos = n
+                break
+            self.skipped += sof - pos
+            pos = sof
+            if n - pos < HEADER_LEN:
+                break
+            length = buf[pos + 2]
+            end = pos + HEADER_LEN + length + CRC_LEN
+            if buf[pos + 1] != VERSION or length > MAX_PAYLOAD:
+                pos += 1
+                continue
+            if n < end:
+                break
+            crc = (buf[end - 2] << 8) | buf[end - 1]
+            if crc16(memoryview(buf)[pos + 1:end - 2]) != crc:
+                self.crc_errors += 1
+                pos += 1
+                continue
+            h = buf[pos + 3:pos + HEADER_LEN]
+            frames.append(Frame(chr(h[0]), h[1], (h[2] << 8) | h[3], h[4], h[5],
+                                bytes(buf[pos + HEADER_LEN:end - 2])))
+            pos = end
+        del buf[:pos]
+        return frames
+
+
+class Reassembler:
+    # 조각 프레임을 msg_id 기준으로 모아 완성되면 (type, flags, msg_id, payload) 반환
+    def __init__(self, timeout=REASSEMBLY_TIMEOUT, clock=time.monotonic):
+        self.timeout = timeout
+        self.clock = clock
+        self._parts = {}
+        self.expired = 0
+
+    def add(self, frame):
+        if frame.frag_cnt <= 1:
+            return frame.type, frame.flags, frame.msg_id, frame.payload
+        now = self.clock()
+        key = (frame.type, frame.msg_id)
+        entry = self._parts.get(key)
+        if entry is None or entry[1] != frame.frag_cnt:
+            entry = self._parts[key] = [now, frame.frag_cnt, {}]
+        entry[2][frame.frag_idx] = frame.payload
+        if len(entry[2]) == frame.frag_cnt:
+            del self._parts[key]
+            payload = b''.join(entry[2][i] for i in range(frame.frag_cnt))
+            return frame.type, frame.flags, frame.msg_id, payload
+        self._expire(now)
+        return None
+
+    def _expire(self, now):
+        for key in [k for k, e in self._parts.items() if now - e[0] > self.timeout]:
+            del self._parts[key]
+            self.expired += 1
+
+
+class LegacyCodec:
+    name = 'legacy'
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.truncated = 0
+
+    def encode(self, flag, content, msg_id=0):
+        if flag == '2' and ',' in content:
+            # 펌웨어가 UART 256자 / ESP-NOW 250바이트에서 말없이 자르던 부분을 글자 단위로 미리 자름
+            car, text = content.split(',', 1)
+            budget = min(LEGACY_MAX_LINE - len(car.encode('utf-8')) - 2, LEGACY_MAX_TEXT)
+            text, cut = truncate_utf8(text, budget)
+            if cut:
+                self.truncated += 1
+            content = f"{car},{text}"
+        return f"{flag}{content}\n".encode('utf-8')
+
+    def feed(self, data):
+        self._buf += data
+        end = self._buf.rfind(b'\n')
+        if end < 0:
+            return []
+        chunk = bytes(self._buf[:end])
+        del self._buf[:end + 1]
+        messages = []
+        for raw in chunk.split(b'\n'):
+            line = raw.decode('utf-8', errors='ignore').strip()
+            if line:
+                messages.append(Message(line[0], line[1:], None, 0))
+        return messages
+
+
+class BinaryCodec:
+    name = 'binary'
+
+    def __init__(self, compress=HANGUL_COMPRESS, dictionary=HANGUL_DICT):
+        self.decoder = FrameDecoder()
+        self.reassembler = Reassembler()
+        self.compress = compress
+        self.dictionary = dictionary
+
+    def encode(self, flag, content, msg_id=0, flags=0):
+        if isinstance(content, bytes):
+            payload = content
+        else:
+            payload = content.encode('utf-8')
+            if self.compress:
+                packed, used_dict = hangul_codec.encode_report(content, self.dictionary)
+                if len(packed) < len(payload):
+                    payload = packed
+                    flags |= FLAG_ENC_HANGUL | (FLAG_ENC_DICT if used_dict else 0)
+        return b''.join(encode_frames(flag, payload, msg_id, flags))
+
+    def feed(self, data):
+        messages = []
+        for frame in self.decoder.feed(data):
+            done = self.reassembler.add(frame)
+            if done is None:
+                continue
+            ftype, flags, msg_id, payload = done
+            messages.append(Message(ftype, self.decode_payload(payload, flags), msg_id, flags))
+        return messages
+
+    def decode_payload(self, payload, flags):
+        if flags & FLAG_ENC_HANGUL:
+            try:
+                return hangul_codec.decode(payload)
+            except (IndexError, UnicodeDecodeError):
+                return ''
+        return payload.decode('utf-8', errors='ignore')
+
+
+def hello_frame():
+    # 버전 협상용 HELLO (legacy 펌웨어가 한 줄로 버리도록 '\n' 추가)
+    return encode_frames(HELLO, bytes((VERSION,)), 0)[0] + b'\n'
+
+
+def make_codec(mode):
+    return BinaryCodec() if mode == 'binary' else LegacyCodec()
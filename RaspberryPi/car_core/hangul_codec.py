@@ -0,0 +1,96 @@
+# ------------------------------------------------------------------------------------
+# 한글 압축 payload 인코딩 (binary 프레임의 FLAG_ENC_HANGUL / FLAG_ENC_DICT)
+#
+# UTF-8은 한글 음절 하나에 3바이트를 쓰므로 음절 인덱스(hangul_ime.HANGUL_START 기준,
+# 0 ~ 11171)를 2바이트로 담는다.
+#
+#   0x00-0x7F : ASCII 그대로 (숫자/영문/구두점)
+#   0x80-0xAB : 한글 음절, (0x80 + index >> 8), (index & 0xFF)
+#   0xC0-0xFE : 상용구 사전 코드 (FLAG_ENC_DICT일 때만)
+#   0xFF      : 그 밖의 문자, 0xFF + UTF-8 길이 + UTF-8 바이트
+#
+# binary 프레임에서만 쓰이므로 펌웨어가 binary 모드로 업데이트되기 전까지 실제 링크(legacy)에서는 쓰이지 않음
+# ------------------------------------------------------------------------------------
+HANGUL_START = 0xAC00
+HANGUL_COUNT = 11172
+SYLLABLE_BASE = 0x80
+DICT_BASE = 0xC0
+ESCAPE = 0xFF
+
+# 운전 중 자주 쓰는 문구 (순서를 바꾸면 코드가 바뀌므로 뒤에만 추가할 것, 최대 63개)
+PHRASES = [
+    '감사합니다', '고맙습니다', '죄송합니다', '먼저 가세요', '먼저 갈게요',
+    '양보해 주셔서', '트렁크가 열려 있어요', '라이트가 꺼져 있어요', '라이트를 켜 주세요',
+    '비상등', '전조등', '타이어', '주유구', '문이 열려 있어요', '창문이 열려 있어요',
+    '안전운전 하세요', '천천히 가세요', '조심하세요', '차선 변경', '끼어들',
+    '상향등', '꺼 주세요', '켜 주세요', '확인해 주세요', '있어요', '있습니다', '합니다',
+    '해 주세요', '주세요', '차량', '주차', '정차', '사고', '괜찮', '브레이크',
+]
+assert len(PHRASES) <= ESCAPE - DICT_BASE
+
+_PHRASE_CODE = {p: DICT_BASE + i for i, p in enumerate(PHRASES)}
+# 첫 글자 → 그 글자로 시작하는 문구 (긴 것부터 매칭)
+_PHRASE_BY_FIRST = {}
+for _p in sorted(PHRASES, key=len, reverse=True):
+    _PHRASE_BY_FIRST.setdefault(_p[0], []).append(_p)
+
+
+def encode(text, use_dict=True):
+    return encode_report(text, use_dict)[0]
+
+
+def encode_report(text, use_dict=True):
+    # (압축 바이트, 상용구 사전 코드를 실제로 썼는지)
+    out = bytearray()
+    used_dict = False
+    i, n = 0, len(text)
+    by_first = _PHRASE_BY_FIRST if use_dict else {}
+    while i < n:
+        ch = text[i]
+        cands = by_first.get(ch)
+        if cands:
+            for phrase in cands:
+                if text.startswith(phrase, i):
+                    out.append(_PHRASE_CODE[phrase])
+                    used_dict = True
+                    i += len(phrase)
+                    break
+            else:
+                cands = None
+            if cands:
+                continue
+        code = ord(ch)
+        if code < 0x80:
+            out.append(code)
+        elif HANGUL_START <= code < HANGUL_START + HANGUL_COUNT:
+            idx = code - HANGUL_START
+            out.append(SYLLABLE_BASE + (idx >> 8))
+            out.append(idx & 0xFF)
+        else:
+            raw = ch.encode('utf-8')
+            out.append(ESCAPE)
+            out.append(len(raw))
+            out += raw
+        i += 1
+    return bytes(out), used_dict
+
+
+def decode(data):
+    out = []
+    i, n = 0, len(data)
+    while i < n:
+        b = data[i]
+        if b < 0x80:
+            out.append(chr(b))
+            i += 1
+        elif b < DICT_BASE:
+            out.append(chr(HANGUL_START + ((b - SYLLABLE_BASE) << 8) + data[i + 1]))
+            i += 2
+        elif b < ESCAPE:
+            out.append(PHRASES[b - DICT_BASE])
+            i += 1
+        else:
+            length = data[i + 1]
+            out.append(bytes(data[i + 2:i + 2 + length]).decode('utf-8'))
+            i += 2 + length
+    return ''.join(out)
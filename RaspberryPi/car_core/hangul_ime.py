@@ -0,0 +1,169 @@
+# ------------------------------------------------------------------------------------
+# 두벌식 한글 조합기 (가상 키보드용, GUI 없음)
+#  - 자모 하나를 누를 때마다 조합 중인 음절 하나만 바꾸는 상태 기계
+#  - 초성/중성/종성 인덱스, 겹모음/겹받침 조합과 분리는 모두 미리 만든 dict로 O(1) 조회
+#  - 조합 중인 음절의 이전 상태를 스택에 쌓아 두어 백스페이스는 자모 단위로 되돌림
+#      ㄷ ㅏ ㄹ ㄱ → 닭, ← → 달, ← → 다
+#  - feed()/backspace()는 (끝에서 지울 글자 수, 그 자리에 넣을 문자열)을 반환해
+#    입력 칸은 전체를 다시 조합하지 않고 마지막 음절만 고침
+# ------------------------------------------------------------------------------------
+HANGUL_START = 0xAC00
+HANGUL_END = 0xD7A3
+
+CHOSUNG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+JUNGSUNG = 'ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ'
+JONGSUNG = ('', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ',
+            'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ')
+
+COMPLEX_VOWELS = {('ㅗ', 'ㅏ'): 'ㅘ', ('ㅗ', 'ㅐ'): 'ㅙ', ('ㅗ', 'ㅣ'): 'ㅚ', ('ㅜ', 'ㅓ'): 'ㅝ',
+                  ('ㅜ', 'ㅔ'): 'ㅞ', ('ㅜ', 'ㅣ'): 'ㅟ', ('ㅡ', 'ㅣ'): 'ㅢ'}
+COMPLEX_CONSONANTS = {('ㄱ', 'ㅅ'): 'ㄳ', ('ㄴ', 'ㅈ'): 'ㄵ', ('ㄴ', 'ㅎ'): 'ㄶ', ('ㄹ', 'ㄱ'): 'ㄺ',
+                      ('ㄹ', 'ㅁ'): 'ㄻ', ('ㄹ', 'ㅂ'): 'ㄼ', ('ㄹ', 'ㅅ'): 'ㄽ', ('ㄹ', 'ㅌ'): 'ㄾ',
+                      ('ㄹ', 'ㅍ'): 'ㄿ', ('ㄹ', 'ㅎ'): 'ㅀ', ('ㅂ', 'ㅅ'): 'ㅄ'}
+BACKSPACE = '←'
+
+# --- 조회 테이블 (모듈을 불러올 때 한 번만 생성) ---
+CHO_INDEX = {c: i for i, c in enumerate(CHOSUNG)}
+JUNG_INDEX = {c: i for i, c in enumerate(JUNGSUNG)}
+JONG_INDEX = {c: i for i, c in enumerate(JONGSUNG) if c}
+# 겹받침 → (남는 받침, 다음 음절 초성): 닭 + ㅏ → 달가
+SPLIT_FINAL = {v: k for k, v in COMPLEX_CONSONANTS.items()}
+# 겹자모 → 키 입력 순서 (ㄲ/ㅆ 등 쌍자음은 Shift 키 하나로 입력하므로 그대로)
+JAMO_KEYS = {v: ''.join(k) for d in (COMPLEX_VOWELS, COMPLEX_CONSONANTS) for k, v in d.items()}
+
+
+def compose(cho, jung, jong=''):
+    return chr(HANGUL_START + (CHO_INDEX[cho] * 21 + JUNG_INDEX[jung]) * 28 + JONG_INDEX.get(jong, 0))
+
+
+def decompose(ch):
+    # 음절 → (초성, 중성, 종성), 한글 음절이 아니면 None
+    code = ord(ch) - HANGUL_START
+    if not 0 <= code <= HANGUL_END - HANGUL_START:
+        return None
+    return CHOSUNG[code // 588], JUNGSUNG[code // 28 % 21], JONGSUNG[code % 28]
+
+
+def to_keys(text):
+    # 문자열 → 두벌식 키 입력 순서 (한글이 아닌 문자는 그대로)
+    keys = []
+    for ch in text:
+        for jamo in decompose(ch) or (ch,):
+            if jamo:
+                keys.append(JAMO_KEYS.get(jamo, jamo))
+    return ''.join(keys)
+
+
+class HangulComposer:
+    def __init__(self):
+        self.committed = []     # 조합이 끝난 글자
+        self.cho = self.jung = self.jong = ''
+        self._history = []      # 조합 중인 음절의 이전 (초성, 중성, 종성)
+
+    @property
+    def preedit(self):
+        # 조합 중인 음절 (초성만/중성만 있으면 자모 그대로)
+        if self.cho and self.jung:
+            return compose(self.cho, self.jung, self.jong)
+        return self.cho or self.jung
+
+    def text(self):
+        return ''.join(self.committed) + self.preedit
+
+    def reset(self):
+        self.committed.clear()
+        self.cho = self.jung = self.jong = ''
+        self._history.clear()
+
+    def feed(self, key):
+        # 키 하나 입력, (지울 글자 수, 넣을 문자열) 반환
+        before = self.preedit
+        if key in JUNG_INDEX:
+            out = self._vowel(key)
+        elif key in CHO_INDEX or key in JONG_INDEX:
+            out = self._consonant(key)
+        else:
+            # 숫자/공백 등: 조합을 끝내고 그대로 추가
+            out = self._commit() + key
+            self.committed.append(key)
+        return len(before), out + self.preedit
+
+    def backspace(self):
+        # 조합 중이면 자모 하나를 되돌리고, 아니면 마지막 글자를 지움
+        if self._history:
+            self.cho, self.jung, self.jong = self._history.pop()
+            return 1, self.preedit
+        if self.committed:
+            self.committed.pop()
+            return 1, ''
+        return 0, ''
+
+    # --- 상태 전이 ---
+    def _push(self):
+        self._history.append((self.cho, self.jung, self.jong))
+
+    def _commit(self):
+        # 조합 중인 음절을 확정하고 그 글자를 반환
+        done = self.preedit
+        if done:
+            self.committed.append(done)
+        self.cho = self.jung = self.jong = ''
+        self._history.clear()
+        return done
+
+    def _start(self, cho='', jung=''):
+        # 새 음절 시작 (백스페이스로 한 자모씩 되돌릴 수 있게 단계별 상태를 쌓음)
+        self._history.append(('', '', ''))
+        if cho and jung:
+            self._history.append((cho, '', ''))
+        self.cho, self.jung, self.jong = cho, jung, ''
+
+    def _consonant(self, key):
+        if self.cho and self.jung:
+            if not self.jong:
+                if key in JONG_INDEX:
+                    self._push()
+                    self.jong = key
+                    return ''
+            else:
+                combined = COMPLEX_CONSONANTS.get((self.jong, key))
+                if combined:
+                    self._push()
+                    self.jong = combined
+                    return ''
+        elif not self.cho and not self.jung and key in CHO_INDEX:
+            self._start(cho=key)
+            return ''
+        done = self._commit()
+        if key in CHO_INDEX:
+            self._start(cho=key)
+        else:
+            # 초성으로 쓸 수 없는 자모 (겹받침 키가 따로 있는 경우) 그대로 확정
+            self.committed.append(key)
+            done += key
+        return done
+
+    def _vowel(self, key):
+        if self.jong:
+            # 받침이 다음 음절의 초성으로 넘어감 (겹받침이면 뒤쪽 자음만): 각 + ㅏ → 가가, 닭 + ㅏ → 달가
+            split = SPLIT_FINAL.get(self.jong)
+            keep, move = split if split else ('', self.jong)
+            self.jong = keep
+            done = self._commit()
+            self._start(cho=move, jung=key)
+            return done
+        if self.jung:
+            combined = COMPLEX_VOWELS.get((self.jung, key))
+            if combined:
+                self._push()
+                self.jung = combined
+                return ''
+            done = self._commit()
+            self._start(jung=key)
+            return done
+        if self.cho:
+            self._push()
+            self.jung = key
+            return ''
+        self._start(jung=key)
+        return ''
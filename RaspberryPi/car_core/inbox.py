@@ -0,0 +1,77 @@
+import time
+import itertools
+import threading
+
+# ------------------------------------------------------------------------------------
+# 수신 메시지 대기열 (시리얼 스레드가 넣고 GUI/CLI가 꺼냄)
+#  - 같은 차량이 같은 내용을 다시 보내면 대기 중인 항목 하나로 합침 (내용이 다르면 따로 쌓음)
+#  - 응답(전송 결과)을 메시지보다 먼저 표시
+#  - 오래된 항목은 꺼낼 때 버리고, 최대 개수를 넘으면 우선순위가 낮은 오래된 항목부터 버림
+# ------------------------------------------------------------------------------------
+INBOX_MAX_DEPTH = 10
+PRIORITY = {'response': 0, 'message': 1}        # 작을수록 먼저 표시
+EXPIRY_SEC = {'response': 10, 'message': 60}    # 이 시간이 지나면 표시하지 않음
+
+
+class InboundItem:
+    __slots__ = ('kind', 'car', 'text', 'received', 'seq')
+
+    def __init__(self, kind, car, text, received, seq):
+        self.kind, self.car, self.text = kind, car, text
+        self.received, self.seq = received, seq
+
+    @property
+    def priority(self):
+        return PRIORITY[self.kind]
+
+
+class InboundQueue:
+    def __init__(self, max_depth=INBOX_MAX_DEPTH, expiry=EXPIRY_SEC, clock=time.monotonic):
+        self.max_depth = max_depth
+        self.expiry = expiry
+        self.clock = clock
+        self._items = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.deduped = 0
+        self.expired = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def push(self, kind, car, text):
+        with self._lock:
+            return self._push(kind, car, text)
+
+    def _push(self, kind, car, text):
+        now = self.clock()
+        for item in self._items:
+            if item.kind == kind and item.car == car and item.text == text:
+                # 같은 차량이 같은 내용을 다시 보낸 경우 대기 중인 항목의 수신 시각만 갱신
+                item.received = now
+                self.deduped += 1
+                return item
+        item = InboundItem(kind, car, text, now, next(self._seq))
+        self._items.append(item)
+        if len(self._items) > self.max_depth:
+            victim = max(self._items, key=lambda it: (it.priority, -it.seq))
+            self._items.remove(victim)
+            self.dropped += 1
+        return item
+
+    def pop(self):
+        with self._lock:
+            return self._pop()
+
+    def _pop(self):
+        # 만료되지 않은 항목 중 우선순위가 가장 높고 가장 먼저 들어온 항목, 없으면 None
+        now = self.clock()
+        alive = [it for it in self._items if now - it.received <= self.expiry[it.kind]]
+        self.expired += len(self._items) - len(alive)
+        self._items = alive
+        if not alive:
+            return None
+        item = min(alive, key=lambda it: (it.priority, it.seq))
+        alive.remove(item)
+        return item
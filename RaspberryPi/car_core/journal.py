@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import logging
+import itertools
+import threading
+from collections import OrderedDict
+
+# ------------------------------------------------------------------------------------
+# 송신 저널 (아직 포트에 쓰지 못한 '2' 메시지 보관)
+#  - 메시지를 보낼 때 add(), 쓰기 스레드가 포트에 쓰면 done()
+#  - 연결이 끊기면 대기열의 프레임은 버리고, 다시 연결되면 저널에 남은 메시지를 다시 인코딩해 재전송
+#    (재연결 후 binary/legacy가 바뀔 수 있어 인코딩된 바이트가 아니라 플래그/내용을 보관)
+#  - JOURNAL_FILE을 지정하면 추가/완료를 JSON-lines로 덧붙여 기록, 재시작 시 남은 메시지를 불러옴
+#  - 오래된 메시지는 다시 보내도 의미가 없으므로 JOURNAL_MAX_AGE가 지나면 버림
+# ------------------------------------------------------------------------------------
+JOURNAL_FILE = os.environ.get('CAR_JOURNAL_FILE')   # 지정하지 않으면 메모리에만 보관
+JOURNAL_MAX = 64              # 보관할 최대 메시지 수 (넘으면 대기열에 없는 가장 오래된 것부터 버림)
+JOURNAL_MAX_AGE = 120.0       # 이 시간(초)이 지난 메시지는 재전송하지 않음
+JOURNAL_COMPACT_LINES = 512   # 파일 줄 수가 이만큼 쌓이면 남은 메시지만 다시 씀
+
+log = logging.getLogger('car.serial.journal')
+
+
+class JournalEntry:
+    __slots__ = ('jid', 'flag', 'content', 'msg_id', 'created', 'queued')
+
+    def __init__(self, jid, flag, content, msg_id, created):
+        self.jid, self.flag, self.content = jid, flag, content
+        self.msg_id, self.created = msg_id, created   # created: time.time() (재시작 후에도 비교 가능)
+        self.queued = False                           # 현재 송신 대기열에 들어 있는지
+
+    def to_dict(self):
+        return {'op': 'add', 'id': self.jid, 'flag': self.flag, 'content': self.content,
+                'msg_id': self.msg_id, 'time': self.created}
+
+
+class OutboundJournal:
+    def __init__(self, path=JOURNAL_FILE, max_entries=JOURNAL_MAX, max_age=JOURNAL_MAX_AGE,
+                 clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.clock = clock
+        self._entries = OrderedDict()    # jid → JournalEntry (추가 순서)
+        self._lock = threading.Lock()
+        self._file = None
+        self._lines = 0
+        self.dropped = 0
+        self.expired = 0
+        jid_start = 1
+        if path:
+            jid_start = self._load() + 1
+            self._compact()
+        self._ids = itertools.count(jid_start)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, flag, content, msg_id, queued=False):
+        # queued: 바로 송신 대기열에 넣을 메시지 (재연결 직후 재전송과 겹치지 않게 미리 표시)
+        with self._lock:
+            entry = JournalEntry(next(self._ids), flag, content, msg_id, self.clock())
+            entry.queued = queued
+            self._entries[entry.jid] = entry
+            self._append(entry.to_dict())
+            if len(self._entries) > self.max_entries:
+                self._evict()
+            return entry.jid
+
+    def _evict(self):
+        # 송신 대기열에 들어 있는 메시지는 곧 쓰이거나 대기열 정책으로 정리되므로
+        # 보내지 못하고 남은 메시지 중 가장 오래된 것부터 버림
+        for jid in [j for j, e in self._entries.items() if not e.queued]:
+            if len(self._entries) <= self.max_entries:
+                break
+            old = self._entries.pop(jid)
+            self._append({'op': 'done', 'id': jid})
+            self.dropped += 1
+            log.warning("송신 저널이 가득 차 가장 오래된 메시지를 버립니다: %s", old.content)
+
+    def done(self, jid):
+        with self._lock:
+            if self._entries.pop(jid, None) is not None:
+                self._append({'op': 'done', 'id': jid})
+
+    def mark_queued(self, jid, queued=True):
+        with self._lock:
+            entry = self._entries.get(jid)
+            if entry is not None:
+                entry.queued = queued
+
+    def unqueue_all(self):
+        # 연결이 끊겨 송신 대기열을 비웠을 때: 남은 메시지는 모두 재전송 대상
+        with self._lock:
+            for entry in self._entries.values():
+                entry.queued = False
+
+    def take_replay(self):
+        # 대기열에 없는 메시지를 오래된 순서로 반환 (너무 오래된 것은 버림)
+        now = self.clock()
+        with self._lock:
+            for jid in [j for j, e in self._entries.items() if now - e.created > self.max_age]:
+                entry = self._entries.pop(jid)
+                self._append({'op': 'done', 'id': jid})
+                self.expired += 1
+                log.warning("%.0f초 지난 메시지는 재전송하지 않습니다: %s", now - entry.created, entry.content)
+            return [e for e in self._entries.values() if not e.queued]
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    # --- 파일 기록 ---
+    def _append(self, record):
+        if self._file is None:
+            return
+        try:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self._lines += 1
+        except OSError as e:
+            log.error("송신 저널 기록 실패 – %s", e)
+            return
+        if self._lines >= JOURNAL_COMPACT_LINES:
+            self._compact()
+
+    def _load(self):
+        # 파일에서 완료되지 않은 메시지를 불러옴, 가장 큰 jid 반환
+        last = 0
+        if not os.path.exists(self.path):
+            return last
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue   # 기록 도중 꺼져서 잘린 줄
+                last = max(last, rec.get('id', 0))
+                if rec.get('op') == 'add':
+                    self._entries[rec['id']] = JournalEntry(
+                        rec['id'], rec['flag'], rec['content'], rec.get('msg_id'), rec['time'])
+                else:
+                    self._entries.pop(rec.get('id'), None)
+        if self._entries:
+            log.info("송신 저널에서 보내지 못한 메시지 %d건을 불러왔습니다", len(self._entries))
+        return last
+
+    def _compact(self):
+        # 남은 메시지만 임시 파일에 쓰고 교체 (잠금을 잡은 상태이거나 생성자에서 호출)
+        if self._file:
+            self._file.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for entry in self._entries.values():
+                f.write(json.dumps(entry.to_dict(), ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
+        self._lines = len(self._entries)
+        self._file = open(self.path, 'a', encoding='utf-8')
@@ -0,0 +1,358 @@
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+import weakref
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------------------------------------------------------------------------
+# 실시간 지표 (Prometheus 텍스트 형식, 차량 안에서만 보는 loopback HTTP)
+#  - 카운터/요약은 스레드별 칸에 더하고 읽을 때 합산: 잠금이 없고 호출 비용은 dict 조회 + 대입 한 번
+#    (각 칸은 그 스레드만 쓰므로 다른 스레드의 += 와 섞여 값이 빠지지 않음)
+#    스레드가 끝나면 그 칸을 기본 칸으로 합치고 지움 (음성 전송마다 스레드가 생기므로 칸이 계속 늘지 않게)
+#  - 게이지는 값 대입만, 대기열 깊이처럼 이미 있는 값은 콜백으로 등록해 읽을 때만 계산
+#  - serve()하면 METRICS_HOST:METRICS_PORT 의 /metrics 로 제공 (METRICS_PORT=0이면 끔)
+#  - 프로세스 RSS/CPU/스레드 수는 이 모듈이 직접 등록
+#
+#   python -m car_core.metrics [--interval 2] [이름 필터 ...]   실행 중인 장치의 지표를 주기적으로 출력
+# ------------------------------------------------------------------------------------
+METRICS_HOST = '127.0.0.1'                                    # 외부에 노출하지 않음
+METRICS_PORT = int(os.environ.get('CAR_METRICS_PORT', '9464'))  # 0이면 HTTP 제공 안 함
+METRICS_TAIL_INTERVAL = 2.0                                   # tail 출력 주기 (초)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+log = logging.getLogger('car.metrics')
+
+_get_ident = threading.get_ident
+_local = threading.local()
+_celled = weakref.WeakSet()      # 스레드별 칸을 가진 지표 (스레드가 끝나면 칸을 합칠 대상)
+_merge_lock = threading.Lock()   # 끝난 스레드 칸 합치기 ↔ 값 읽기 (값 갱신은 잠금 없음)
+
+
+class _ThreadToken:
+    # 스레드 로컬에 하나씩, 스레드가 끝나 스레드 로컬이 정리되면 사라지면서 칸 합치기를 부름
+    pass
+
+
+def _watch_thread():
+    # 지금 스레드의 첫 칸을 만들 때 호출 (스레드당 한 번만 등록)
+    if getattr(_local, 'token', None) is None:
+        _local.token = _ThreadToken()
+        weakref.finalize(_local.token, _retire_thread, _get_ident())
+
+
+def _retire_thread(tid):
+    with _merge_lock:
+        for metric in list(_celled):
+            metric._retire(tid)
+
+
+class Counter:
+    __slots__ = ('_cells', '_base', '__weakref__')
+
+    def __init__(self):
+        self._cells = {}     # 스레드 ID → 그 스레드가 더한 값
+        self._base = 0       # 끝난 스레드들이 더한 값
+        _celled.add(self)
+
+    def inc(self, n=1):
+        cells = self._cells
+        tid = _get_ident()
+        v = cells.get(tid)
+        if v is None:
+            _watch_thread()
+            v = 0
+        cells[tid] = v + n
+
+    def _retire(self, tid):
+        self._base += self._cells.pop(tid, 0)
+
+    @property
+    def value(self):
+        with _merge_lock:
+            return self._base + sum(list(self._cells.values()))
+
+
+class Gauge:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+
+class Summary:
+    # 개수와 합계만 (분위수는 tracing.Tracer가 담당), 평균은 _sum / _count
+    __slots__ = ('_cells', '_base', '__weakref__')
+
+    def __init__(self):
+        self._cells = {}     # 스레드 ID → [개수, 합계]
+        self._base = [0, 0.0]
+        _celled.add(self)
+
+    def observe(self, value):
+        cell = self._cells.get(_get_ident())
+        if cell is None:
+            _watch_thread()
+            cell = self._cells[_get_ident()] = [0, 0.0]
+        cell[0] += 1
+        cell[1] += value
+
+    def _retire(self, tid):
+        cell = self._cells.pop(tid, None)
+        if cell is not None:
+            self._base[0] += cell[0]
+            self._base[1] += cell[1]
+
+    @property
+    def value(self):
+        with _merge_lock:
+            cells = list(self._cells.values()) + [self._base]
+        return sum(c[0] for c in cells), sum(c[1] for c in cells)
+
+
+_KINDS = {'counter': Counter, 'gauge': Gauge, 'summary': Summary}
+
+
+class Family:
+    # 이름 하나 = 지표 묶음 (레이블 값마다 자식 하나), 레이블이 없으면 registry가 자식을 바로 반환
+    def __init__(self, name, help_text, kind, labelnames=(), fn=None):
+        self.name, self.help, self.kind = name, help_text, kind
+        self.labelnames = tuple(labelnames)
+        self.fn = fn                     # 콜백 지표: fn() → 값 (레이블이 있으면 {레이블 값 튜플: 값})
+        self._children = {}
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, _KINDS[self.kind]())
+        return child
+
+    def samples(self):
+        # (이름 접미사, 레이블 값 튜플, 값)
+        if self.fn is not None:
+            try:
+                value = self.fn()
+            except Exception:
+                log.debug("지표 콜백 오류: %s", self.name, exc_info=True)
+                return
+            items = value.items() if self.labelnames else [((), value)]
+        else:
+            items = [(k, c.value) for k, c in list(self._children.items())]
+        for values, v in items:
+            if self.kind == 'summary':
+                yield '_count', values, v[0]
+                yield '_sum', values, v[1]
+            else:
+                yield '', values, v
+
+
+class Registry:
+    def __init__(self):
+        self._families = {}              # 이름 → Family (등록 순서대로 출력)
+        self._lock = threading.Lock()    # 등록할 때만 (값 갱신은 잠금 없음)
+
+    def _family(self, name, help_text, kind, labelnames):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None or family.fn is not None:
+                family = self._families[name] = Family(name, help_text, kind, labelnames)
+        return family if family.labelnames else family.labels()
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._family(name, help_text, 'counter', labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._family(name, help_text, 'gauge', labelnames)
+
+    def summary(self, name, help_text, labelnames=()):
+        return self._family(name, help_text, 'summary', labelnames)
+
+    def callback(self, name, help_text, fn, kind='gauge', labelnames=()):
+        # 읽을 때만 fn() 호출, 같은 이름으로 다시 등록하면 교체 (코어를 다시 만든 경우 등)
+        with self._lock:
+            self._families[name] = Family(name, help_text, kind, labelnames, fn)
+
+    def unregister(self, name):
+        with self._lock:
+            self._families.pop(name, None)
+
+    def render(self):
+        with self._lock:
+            families = list(self._families.values())
+        lines = []
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for suffix, values, v in family.samples():
+                labels = ','.join(f'{k}="{_escape(str(val))}"' for k, val in zip(family.labelnames, values))
+                lines.append(f"{family.name}{suffix}{{{labels}}} {_number(v)}" if labels
+                             else f"{family.name}{suffix} {_number(v)}")
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(v):
+    if isinstance(v, bool):
+        return '1' if v else '0'
+    if isinstance(v, int):
+        return str(v)
+    return repr(float(v))
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+summary = REGISTRY.summary
+callback = REGISTRY.callback
+
+
+# --- 프로세스 지표 ---
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+_START_TIME = time.time()
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _cpu_seconds():
+    t = os.times()
+    return t.user + t.system
+
+
+callback('process_resident_memory_bytes', '프로세스 RSS (바이트)', _rss_bytes)
+callback('process_cpu_seconds_total', '프로세스 CPU 시간 (user + system, 초)', _cpu_seconds, 'counter')
+callback('process_threads', '파이썬 스레드 수', threading.active_count)
+callback('process_start_time_seconds', '프로세스 시작 시각 (유닉스 시간)', lambda: _START_TIME)
+
+
+# --- HTTP 제공 ---
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass   # 수집할 때마다 로그를 남기지 않음
+
+
+_server = None
+
+
+def serve(port=METRICS_PORT, host=METRICS_HOST):
+    # 지표 HTTP 서버를 한 번만 시작 (이미 떠 있거나 port=0이면 그대로), 실패해도 앱은 계속
+    global _server
+    if _server is not None or not port:
+        return _server
+    try:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError as e:
+        log.warning("지표 서버를 열 수 없습니다 (%s:%d) – %s", host, port, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _server = server
+    log.info("지표 제공: http://%s:%d/metrics", host, server.server_address[1])
+    return server
+
+
+def shutdown():
+    global _server
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+
+
+# --- tail CLI ---
+def parse(text):
+    # Prometheus 텍스트 → ({'이름{레이블}': 값}, {이름: 종류})
+    values, kinds = {}, {}
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ', 3)
+            kinds[name] = kind
+        elif line and not line.startswith('#'):
+            key, _, value = line.rpartition(' ')
+            try:
+                values[key] = float(value)
+            except ValueError:
+                continue
+    return values, kinds
+
+
+def _is_rate(key, kinds):
+    # 누적 값(카운터, 요약의 _count/_sum)은 초당 변화량도 출력
+    name = key.split('{', 1)[0]
+    if kinds.get(name) == 'counter':
+        return True
+    for suffix in ('_count', '_sum'):
+        if name.endswith(suffix) and kinds.get(name[:-len(suffix)]) == 'summary':
+            return True
+    return False
+
+
+def tail(url, interval=METRICS_TAIL_INTERVAL, patterns=(), once=False):
+    prev, prev_t = {}, None
+    while True:
+        t = time.monotonic()
+        try:
+            with urllib.request.urlopen(url, timeout=interval) as resp:
+                values, kinds = parse(resp.read().decode('utf-8'))
+        except OSError as e:
+            print(f"{time.strftime('%H:%M:%S')} {url} 연결 실패 – {e}", flush=True)
+            values, kinds = {}, {}
+        if values:
+            print(f"--- {time.strftime('%H:%M:%S')} ---")
+            width = max(len(k) for k in values)
+            for key, v in values.items():
+                if patterns and not any(p in key for p in patterns):
+                    continue
+                line = f"{key:<{width}} {v:>14.6g}"
+                if prev_t is not None and key in prev and _is_rate(key, kinds):
+                    line += f"  {(v - prev[key]) / (t - prev_t):>+12.4g}/s"
+                print(line)
+            print(flush=True)
+            prev, prev_t = values, t
+        if once:
+            return 0 if values else 1
+        time.sleep(max(0.0, interval - (time.monotonic() - t)))
+
+
+def main():
+    ap = argparse.ArgumentParser(prog='python -m car_core.metrics', description='장치 지표 tail')
+    ap.add_argument('patterns', nargs='*', help='이름에 이 문자열이 들어간 지표만 출력')
+    ap.add_argument('--url', default=f"http://{METRICS_HOST}:{METRICS_PORT or 9464}/metrics")
+    ap.add_argument('--interval', type=float, default=METRICS_TAIL_INTERVAL, help='출력 주기 (초)')
+    ap.add_argument('--once', action='store_true', help='한 번만 출력')
+    args = ap.parse_args()
+    try:
+        return tail(args.url, args.interval, args.patterns, args.once)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+import time
+import heapq
+import logging
+import itertools
+import threading
+from collections import deque
+
+from .tracing import percentile
+
+# ------------------------------------------------------------------------------------
+# 송신 대기열 + 전용 쓰기 스레드
+#  - 모든 송신은 put()으로 대기열에 넣기만 하고, 포트 쓰기는 쓰기 스레드 하나만 함
+#    (GUI/음성 스레드가 느린 UART에 막히지 않고, 여러 스레드의 쓰기가 섞이지 않음)
+#  - 우선순위가 높은(작은) 것부터, 같으면 들어온 순서대로 전송
+#  - 제어 프레임('0' 차량번호, HELLO)은 대기 중인 같은 종류가 있으면 최신 내용으로 교체
+#  - 대기열이 가득 차면 OUTBOUND_FULL_POLICY에 따라 처리
+#      'block'    : 자리가 날 때까지 최대 OUTBOUND_BLOCK_SEC 기다리고, 그래도 차 있으면 거부
+#      'drop_old' : 우선순위가 가장 낮고 가장 오래된 항목을 버리고 넣음
+#      'drop_new' : 바로 거부
+#    제어 프레임은 정책과 관계없이 가장 오래된 일반 항목을 밀어내고 들어감
+#  - 대기열 깊이, 쓰기 지연(대기 + 쓰기), 초당 바이트 통계 제공
+#  - 연결이 끊기면 pause()로 쓰기를 멈추고 clear()로 비움, 다시 연결되면 resume()
+#  - put(..., token)으로 넣은 항목이 포트에 쓰였거나 정책으로 버려지면 on_done(token) 호출
+# ------------------------------------------------------------------------------------
+OUTBOUND_MAX_DEPTH = 32
+OUTBOUND_FULL_POLICY = 'block'     # 'block' | 'drop_old' | 'drop_new'
+OUTBOUND_BLOCK_SEC = 1.0           # 'block' 정책에서 자리가 날 때까지 기다리는 최대 시간 (초)
+OUTBOUND_BATCH_BYTES = 1024        # 한 번의 write()로 묶어 보낼 최대 바이트
+OUTBOUND_RATE_WINDOW = 5.0         # 초당 바이트 계산 구간 (초)
+OUTBOUND_HISTORY = 256             # 쓰기 지연 통계에 남길 최근 샘플 수
+
+PRIORITY = {'H': 0, '0': 0, '2': 1}   # 작을수록 먼저 전송 (없는 플래그는 OTHER_PRIORITY)
+OTHER_PRIORITY = 2
+COALESCE_FLAGS = ('H', '0')           # 대기 중인 같은 플래그가 있으면 교체하는 제어 프레임
+
+log = logging.getLogger('car.serial.out')
+
+
+class OutboundItem:
+    __slots__ = ('priority', 'seq', 'flag', 'data', 'queued', 'token')
+
+    def __init__(self, priority, seq, flag, data, queued, token=None):
+        self.priority, self.seq = priority, seq
+        self.flag, self.data, self.queued = flag, data, queued
+        self.token = token
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class OutboundQueue:
+    def __init__(self, write, max_depth=OUTBOUND_MAX_DEPTH, policy=OUTBOUND_FULL_POLICY,
+                 block_sec=OUTBOUND_BLOCK_SEC, clock=time.monotonic, on_done=None):
+        # write(bytes): 실제 포트 쓰기 (쓰기 스레드에서만 호출)
+        self.write = write
+        self.on_done = on_done
+        self.max_depth = max_depth
+        self.policy = policy
+        self.block_sec = block_sec
+        self.clock = clock
+        self._heap = []
+        self._pending = {}               # 교체 대상 제어 프레임 플래그 → 대기 중인 항목
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closing = False
+        self._paused = False
+        self._latency = deque(maxlen=OUTBOUND_HISTORY)   # 대기 + 쓰기 (ms)
+        self._rate = deque()                             # (쓰기 완료 시각, 바이트)
+        self.enqueued = self.written = self.coalesced = 0
+        self.dropped = self.rejected = self.failed = 0
+        self.bytes_written = 0
+        self.max_seen = 0
+
+    def __len__(self):
+        return len(self._heap)
+
+    def start(self):
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def pause(self):
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def clear(self):
+        # 대기 중인 항목을 모두 버리고 버린 개수 반환 (on_done은 부르지 않음 — 저널이 재전송)
+        with self._cond:
+            n = len(self._heap)
+            self._heap.clear()
+            self._pending.clear()
+            self._cond.notify_all()
+            return n
+
+    def put(self, flag, data, token=None):
+        # 대기열에 넣으면 True, 가득 차서 거부하면 False
+        priority = PRIORITY.get(flag, OTHER_PRIORITY)
+        control = flag in COALESCE_FLAGS
+        with self._cond:
+            if control:
+                pending = self._pending.get(flag)
+                if pending is not None:
+                    pending.data = data
+                    self.coalesced += 1
+                    return True
+            if len(self._heap) >= self.max_depth and not self._make_room(control):
+                self.rejected += 1
+                log.warning("송신 대기열이 가득 차 '%s' 프레임을 보내지 못했습니다 (%d개 대기)",
+                            flag, len(self._heap))
+                return False
+            item = OutboundItem(priority, next(self._seq), flag, data, self.clock(), token)
+            heapq.heappush(self._heap, item)
+            if control:
+                self._pending[flag] = item
+            self.enqueued += 1
+            self.max_seen = max(self.max_seen, len(self._heap))
+            self._cond.notify_all()
+            return True
+
+    def _make_room(self, control):
+        # 잠금을 잡은 상태에서 호출, 자리를 만들었으면 True
+        if not control and self.policy == 'block':
+            deadline = self.clock() + self.block_sec
+            while len(self._heap) >= self.max_depth and not self._closing:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return len(self._heap) < self.max_depth
+        if not control and self.policy != 'drop_old':
+            return False
+        victims = [it for it in self._heap if it.flag not in COALESCE_FLAGS]
+        if not victims:
+            return False
+        victim = max(victims, key=lambda it: (it.priority, -it.seq))
+        self._heap.remove(victim)
+        heapq.heapify(self._heap)
+        self.dropped += 1
+        if victim.token is not None and self.on_done:
+            self.on_done(victim.token)
+        log.warning("송신 대기열이 가득 차 대기 중인 '%s' 프레임을 버렸습니다", victim.flag)
+        return True
+
+    def _take_batch(self):
+        # 우선순위 순서로 OUTBOUND_BATCH_BYTES까지 꺼냄 (첫 항목은 크기와 관계없이 포함)
+        batch, size = [], 0
+        while self._heap and (not batch or size + len(self._heap[0].data) <= OUTBOUND_BATCH_BYTES):
+            item = heapq.heappop(self._heap)
+            if self._pending.get(item.flag) is item:
+                del self._pending[item.flag]
+            batch.append(item)
+            size += len(item.data)
+        self._cond.notify_all()   # 'block' 정책으로 기다리는 put() 깨움
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while (not self._heap or self._paused) and not self._closing:
+                    self._cond.wait()
+                if not self._heap or self._paused:
+                    return
+                batch = self._take_batch()
+            data = b''.join(it.data for it in batch)
+            try:
+                self.write(data)
+            except Exception as e:
+                self.failed += len(batch)
+                log.error("시리얼 송신 실패 (%d바이트) – %s", len(data), e)
+                continue
+            now = self.clock()
+            with self._cond:
+                self.written += len(batch)
+                self.bytes_written += len(data)
+                self._latency.extend((now - it.queued) * 1000 for it in batch)
+                self._rate.append((now, len(data)))
+            if self.on_done:
+                for it in batch:
+                    if it.token is not None:
+                        self.on_done(it.token)
+
+    def close(self, timeout=1.0):
+        # 남은 항목을 최대 timeout 동안 보내고 쓰기 스레드 종료
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        with self._cond:
+            if self._heap:
+                log.warning("송신 대기열에 남은 %d개 프레임을 버립니다", len(self._heap))
+                self._heap.clear()
+                self._pending.clear()
+
+    def stats(self):
+        now = self.clock()
+        with self._cond:
+            while self._rate and now - self._rate[0][0] > OUTBOUND_RATE_WINDOW:
+                self._rate.popleft()
+            latency = sorted(self._latency)
+            recent = sum(n for _, n in self._rate)
+            return {
+                'depth': len(self._heap), 'max_depth': self.max_seen,
+                'enqueued': self.enqueued, 'written': self.written, 'coalesced': self.coalesced,
+                'dropped': self.dropped, 'rejected': self.rejected, 'failed': self.failed,
+                'bytes': self.bytes_written, 'bytes_per_sec': recent / OUTBOUND_RATE_WINDOW,
+                'latency_p50': percentile(latency, 50), 'latency_p95': percentile(latency, 95),
+                'latency_max': latency[-1] if latency else 0.0,
+            }
+
+    def log_stats(self):
+        st = self.stats()
+        log.info("송신 대기열 %d (최대 %d), 전송 %d/%d, 병합 %d, 버림 %d, 거부 %d, 실패 %d, "
+                 "%.0f B/s, 지연 p50=%.1fms p95=%.1fms max=%.1fms",
+                 st['depth'], st['max_depth'], st['written'], st['enqueued'], st['coalesced'],
+                 st['dropped'], st['rejected'], st['failed'], st['bytes_per_sec'],
+                 st['latency_p50'], st['latency_p95'], st['latency_max'])
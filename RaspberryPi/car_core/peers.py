@@ -0,0 +1,47 @@
+import time
+import threading
+
+from . import metrics
+
+# ------------------------------------------------------------------------------------
+# 피어(통신 가능 차량) 목록
+#  - 펌웨어가 광고 주기마다 보내는 '3' 목록에서 내 차량을 빼고 보관
+#  - 목록이 그대로면 변경 없음으로 처리해 화면 갱신을 건너뛰게 함
+# ------------------------------------------------------------------------------------
+PEER_UPDATES = metrics.counter('car_peer_updates_total', "받은 '3' 피어 목록 수")
+PEER_CHANGES = metrics.counter('car_peer_changes_total', '목록이 바뀔 때 추가/제거된 차량 수', ('change',))
+PEER_COUNT = metrics.gauge('car_peers', '현재 피어 수 (내 차량 제외)')
+
+
+class PeerTable:
+    def __init__(self, my_plate):
+        self.my_plate = my_plate
+        self.peers = []            # 나 자신을 제외한 전체 차량 목록 (수신 순서 유지)
+        self.updated_at = 0.0      # 마지막으로 목록이 바뀐 시각 (time.monotonic)
+        self._lock = threading.Lock()
+
+    def update(self, peers):
+        # 목록이 바뀌었으면 새 목록, 그대로면 None
+        PEER_UPDATES.inc()
+        filtered = [p for p in peers if p and p != self.my_plate]
+        with self._lock:
+            if filtered == self.peers:
+                return None
+            old, self.peers = self.peers, filtered
+            self.updated_at = time.monotonic()
+        # 차량이 드나든 정도 (순서만 바뀐 경우는 0)
+        old, new = set(old), set(filtered)
+        PEER_CHANGES.labels('added').inc(len(new - old))
+        PEER_CHANGES.labels('removed').inc(len(old - new))
+        PEER_COUNT.set(len(filtered))
+        return filtered
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.peers)
+
+    def __contains__(self, plate):
+        return plate in self.peers
+
+    def __len__(self):
+        return len(self.peers)
@@ -0,0 +1,38 @@
+import os
+import json
+import logging
+
+# ------------------------------------------------------------------------------------
+# 상용구 빠른 전송
+#  - 자주 보내는 문구는 녹음/STT 없이 버튼 한 번으로 바로 '2' 메시지로 전송
+#  - 받는 쪽은 같은 목록의 TTS 오디오를 미리 합성해 캐시에 고정해 두고 바로 재생
+#  - 목록은 QUICK_PHRASES_FILE(JSON 문자열 배열)에서 읽고, 파일이 없으면 기본 목록 사용
+#
+# 기본 목록은 hangul_codec.PHRASES의 사전 문구로 이루어져 binary 프레임에서 1~3바이트로 전송됨
+# ------------------------------------------------------------------------------------
+QUICK_PHRASES_FILE = os.environ.get('CAR_QUICK_PHRASES', 'quick_phrases.json')
+QUICK_PHRASES_MAX = 8   # 화면에 버튼으로 표시할 최대 개수 (4열 × 2행)
+DEFAULT_PHRASES = [
+    '감사합니다', '먼저 가세요', '죄송합니다', '안전운전 하세요',
+    '라이트가 꺼져 있어요', '트렁크가 열려 있어요', '문이 열려 있어요', '상향등 꺼 주세요',
+]
+
+log = logging.getLogger('car.quick')
+
+
+def load_phrases(path=QUICK_PHRASES_FILE):
+    # 문구 목록(중복/빈 문자열 제거, 최대 QUICK_PHRASES_MAX개), 파일이 없거나 잘못되면 기본 목록
+    phrases = DEFAULT_PHRASES
+    if path and os.path.exists(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                loaded = json.load(f)
+            if not isinstance(loaded, list):
+                raise ValueError("문자열 배열이 아닙니다")
+            phrases = [str(p) for p in loaded]
+        except (OSError, ValueError) as e:
+            log.error("상용구 파일(%s)을 읽지 못해 기본 목록을 사용합니다 – %s", path, e)
+    phrases = list(dict.fromkeys(p.strip() for p in phrases if p and p.strip()))
+    if len(phrases) > QUICK_PHRASES_MAX:
+        log.warning("상용구가 %d개라 앞의 %d개만 사용합니다", len(phrases), QUICK_PHRASES_MAX)
+    return phrases[:QUICK_PHRASES_MAX]
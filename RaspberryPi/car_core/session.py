@@ -0,0 +1,300 @@
+import os
+import time
+import random
+import logging
+import itertools
+import threading
+from collections import deque
+
+import serial
+
+from . import frame_codec
+from . import metrics
+from .outbound import OutboundQueue
+from .journal import OutboundJournal
+
+# ------------------------------------------------------------------------------------
+# 시리얼 세션 (Pi ↔ STM32)
+#  - 수신 스레드 하나가 포트를 읽어 프레임을 해석하고 on_event(kind, *args)로 알림
+#  - on_event는 수신 스레드에서 호출되므로 GUI는 시그널 등으로 넘겨받아야 함
+#  - 송신은 어느 스레드에서든 send()로 하면 송신 대기열(outbound.py)의 쓰기 스레드가 포트에 씀
+#  - 포트 열기/읽기/쓰기가 실패하면 지수 백오프 + 지터로 다시 연결 (stop() 전까지 계속)
+#    '2' 메시지는 포트에 쓰일 때까지 송신 저널(journal.py)에 남아 있다가 재연결 후 재전송
+#
+#   ('open',)                        포트 연결 + 프레임 형식 협상 끝남 (재연결 포함, 받는 쪽은 '0' 차량번호를 다시 보냄)
+#   ('disconnected', 오류 문자열)      연결 끊김, 재연결 시도 시작
+#   ('recovered', 복구 시간, 재전송 수) 재연결 후 저널 재전송까지 끝남 (끊긴 시점부터 초)
+#   ('peers', [차량번호, ...])        '3' 피어 목록 (한 번에 읽은 묶음에서는 마지막 것만)
+#   ('message', 차량, 내용)           '2' 수신 메시지
+#   ('response', 차량, 결과, msg_id)  '4' 전송 결과 (legacy는 msg_id = None)
+#   ('closed',)                      수신 스레드 종료
+# ------------------------------------------------------------------------------------
+SERIAL_PORT = os.environ.get('CAR_SERIAL_PORT', '/dev/serial0')   # 시뮬레이터 사용 시 pty 경로
+SERIAL_BAUDRATE = 115200
+FRAME_MODE = 'auto'   # 'legacy' | 'binary' | 'auto'(HELLO로 협상, 응답 없으면 legacy)
+FRAME_NEGOTIATE_TIMEOUT = 0.5   # HELLO 응답 대기 시간 (초)
+SERIAL_WRITE_TIMEOUT = 1.0      # UART 쓰기가 이 시간 넘게 막히면 실패 처리 (초)
+RECONNECT_BASE = 0.5            # 첫 재연결 대기 시간 (초), 실패할 때마다 두 배
+RECONNECT_MAX = 30.0            # 재연결 대기 시간 상한 (초)
+JOURNAL_FLAGS = ('2',)          # 보내지 못하면 저널에 남겨 재연결 후 재전송할 플래그
+
+log = logging.getLogger('car.serial')
+
+RX_BYTES = metrics.counter('car_serial_rx_bytes_total', '시리얼 수신 바이트')
+RX_FRAMES = metrics.counter('car_serial_rx_frames_total', '해석한 수신 프레임 수 (플래그별)', ('flag',))
+
+
+class SerialSession:
+    READ_TIMEOUT = 0.2     # read() 최대 블로킹 시간 (stop() 반영 주기)
+    READ_CHUNK = 4096      # 한 번에 읽어올 최대 바이트
+
+    def __init__(self, port=SERIAL_PORT, baudrate=SERIAL_BAUDRATE, frame_mode=FRAME_MODE, on_event=None):
+        self.port, self.baudrate = port, baudrate
+        self.on_event = on_event
+        self.running = True
+        self.connected = False
+        self.ser = None
+        self.frame_mode = frame_mode
+        self.codec = frame_codec.make_codec(frame_mode)
+        self._probe = None            # 버전 협상 중 HELLO 응답을 찾는 binary 디코더
+        self._probe_deadline = 0.0
+        self._msg_ids = itertools.count(1)
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._broken = False          # 쓰기 스레드가 포트 오류를 만남 → 수신 루프가 재연결
+        self._down_since = None       # 연결이 끊긴 시각 (처음 연결 전에는 None)
+        self._link_pending = False    # 포트는 열렸고 협상이 끝나면 'open' 알림 + 저널 재전송
+        self.journal = OutboundJournal()
+        self.outbound = OutboundQueue(self._write, on_done=self.journal.done)
+        self.outbound.pause()         # 포트가 열릴 때까지 쓰지 않음
+        self.reconnects = 0
+        self.recover_times = deque(maxlen=32)   # 재연결마다 끊김 → 재전송 완료까지 걸린 시간 (초)
+        # 플래그 → 처리 함수 테이블 (if/elif 체인 대신)
+        self._handlers = {
+            '2': self._on_message,
+            '3': self._on_peer_list,
+            '4': self._on_response,
+        }
+
+    @property
+    def negotiating(self):
+        return self._probe is not None
+
+    @property
+    def link_ready(self):
+        # 포트가 열리고 프레임 형식도 정해져 바로 보낼 수 있는 상태
+        return self.connected and not self._link_pending
+
+    def start(self):
+        self.outbound.start()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        # 연결 → 수신 루프 → (오류) → 백오프 후 재연결, stop()까지 반복
+        attempt = 0
+        while self.running:
+            if self._open_port():
+                attempt = 0
+                error = self._serve()
+                self._close_port()
+                if not self.running:
+                    break
+                self._down_since = time.monotonic()
+                dropped = self.outbound.clear()
+                self.journal.unqueue_all()
+                log.error("시리얼 연결 끊김 – %s (대기 중 송신 %d건 버림, 저널 %d건 보관)",
+                          error, dropped, len(self.journal))
+                self._emit('disconnected', error)
+            delay = self.backoff(attempt)
+            attempt += 1
+            log.info("%.1f초 후 시리얼 포트 재연결 시도 (%d회째)", delay, attempt)
+            self._stop_event.wait(delay)
+        self.outbound.close()
+        self.journal.close()
+        log.info("시리얼 스레드 종료.")
+        self._emit('closed')
+
+    @staticmethod
+    def backoff(attempt):
+        # 지수 백오프 + 지터 (여러 장치가 같은 주기로 재시도하지 않도록 절반~전체 구간에서 무작위)
+        delay = min(RECONNECT_MAX, RECONNECT_BASE * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def _open_port(self):
+        log.info("시리얼 포트 %s 연결 시도 중... 속도 %d", self.port, self.baudrate)
+        try:
+            self.ser = serial.Serial(self.port, self.baudrate, timeout=self.READ_TIMEOUT,
+                                     write_timeout=SERIAL_WRITE_TIMEOUT)
+        except Exception as e:
+            log.error("시리얼 포트 연결 실패: %s", e)
+            return False
+        log.info("시리얼 포트 연결 성공.")
+        self.codec = frame_codec.make_codec(self.frame_mode)   # 재연결 시 프레임 형식 다시 협상
+        self._broken = False
+        self.connected = True
+        self._link_pending = True
+        self.outbound.resume()
+        if self.frame_mode == 'auto':
+            self.start_negotiation()
+        if self._down_since is not None:
+            self.reconnects += 1
+        return True
+
+    def _close_port(self):
+        self.connected = False
+        self.outbound.pause()
+        self._probe = None
+        if self.ser and self.ser.is_open:
+            try:
+                self.ser.close()
+            except Exception:
+                pass
+
+    def _serve(self):
+        # 연결이 끊기거나 stop()될 때까지 수신, 끊긴 이유 반환
+        while self.running:
+            if self._broken:
+                return "송신 오류"
+            if self._link_pending and self._probe is None:
+                self._link_ready()
+            try:
+                # 최소 1바이트가 들어올 때까지 블로킹(select 기반) 후, 쌓인 데이터를 한 번에 읽음
+                data = self.ser.read(min(max(self.ser.in_waiting, 1), self.READ_CHUNK))
+                if data:
+                    RX_BYTES.inc(len(data))
+                if self._probe is not None and self._check_negotiation(data):
+                    continue
+                if data:
+                    self._dispatch(self.codec.feed(data))
+            except Exception as e:
+                log.debug("시리얼 수신 오류", exc_info=True)
+                return str(e) or type(e).__name__
+        # stop() 중에는 남은 송신을 마저 보낸 뒤 포트를 닫음
+        self.outbound.close()
+        return None
+
+    def _link_ready(self):
+        # 프레임 형식이 정해진 뒤(협상 종료) 'open'을 알리고 ('0' 차량번호 전송) 저널에 남은 메시지를 새 ID로 다시 보냄
+        self._link_pending = False
+        self._emit('open')
+        entries = self.journal.take_replay()
+        for entry in entries:
+            old_id = entry.msg_id
+            entry.msg_id = next(self._msg_ids) & 0xFFFF
+            if self._enqueue(entry.flag, self.codec.encode(entry.flag, entry.content, entry.msg_id), entry.jid):
+                self._emit('resent', old_id, entry.msg_id)
+        if entries:
+            log.info("저널의 메시지 %d건 재전송", len(entries))
+        if self._down_since is not None:
+            recover = time.monotonic() - self._down_since
+            self._down_since = None
+            self.recover_times.append(recover)
+            log.info("시리얼 연결 복구: %.2fs (재연결 %d회째, 재전송 %d건)", recover, self.reconnects, len(entries))
+            self._emit('recovered', recover, len(entries))
+
+    def start_negotiation(self):
+        # HELLO를 보내고 FRAME_NEGOTIATE_TIMEOUT 안에 응답이 오면 binary 프레임으로 전환
+        self._probe = frame_codec.BinaryCodec()
+        self._probe_deadline = time.monotonic() + FRAME_NEGOTIATE_TIMEOUT
+        self.send_data(frame_codec.hello_frame(), frame_codec.HELLO)
+
+    def _check_negotiation(self, data):
+        # binary로 전환했으면 True (이번 데이터는 binary 코덱이 이미 처리함, HELLO와 같이 온 메시지는 여기서 전달)
+        messages = self._probe.feed(data) if data else []
+        if any(msg.flag == frame_codec.HELLO for msg in messages):
+            self.codec, self._probe = self._probe, None
+            log.info("binary 프레임 v%d 사용", frame_codec.VERSION)
+            self._dispatch([msg for msg in messages if msg.flag != frame_codec.HELLO])
+            return True
+        if time.monotonic() > self._probe_deadline:
+            self._probe = None
+            log.info("HELLO 응답 없음, legacy 텍스트 프레임 유지")
+        return False
+
+    def _emit(self, kind, *args):
+        if self.on_event:
+            self.on_event(kind, *args)
+
+    def _dispatch(self, messages):
+        # 같은 배치 안의 '3' 피어 목록은 마지막 것만 전달
+        last_peer = -1
+        for i, msg in enumerate(messages):
+            if msg.flag == '3':
+                last_peer = i
+
+        debug = log.isEnabledFor(logging.DEBUG)
+        for i, msg in enumerate(messages):
+            if debug:
+                log.debug("수신 -> %s%s (id=%s)", msg.flag, msg.content, msg.msg_id)
+            RX_FRAMES.labels(msg.flag).inc()
+            if msg.flag == '3' and i != last_peer:
+                continue
+            handler = self._handlers.get(msg.flag)
+            if handler:
+                handler(msg.content, msg.msg_id)
+
+    def _on_message(self, content, msg_id):
+        if ',' in content:
+            car, msg = content.split(',', 1)
+            self._emit('message', car, msg)
+
+    def _on_peer_list(self, content, msg_id):
+        self._emit('peers', content.split(',') if content else [])
+
+    def _on_response(self, content, msg_id):
+        if ',' in content:
+            car, status = content.split(',', 1)
+            self._emit('response', car, status, msg_id)
+
+    def send(self, flag, content, msg_id=None):
+        # 현재 코덱으로 인코딩해 송신 대기열에 넣고 로컬 메시지 ID 반환 (대기열이 거부하면 None)
+        # 연결이 끊겼거나 프레임 형식을 협상 중일 때의 '2' 메시지는 저널에만 남겨 두고 연결이 준비되면 전송
+        # msg_id를 주면 새로 받지 않고 그 ID로 보냄 (같은 메시지 재전송)
+        if msg_id is None:
+            msg_id = next(self._msg_ids) & 0xFFFF
+        ready = self.link_ready
+        jid = self.journal.add(flag, content, msg_id, ready) if flag in JOURNAL_FLAGS else None
+        if not ready:
+            if jid is not None and self.running:
+                log.info("연결 준비 전, 준비되면 전송: '%s' %s", flag, content)
+                return msg_id
+            log.warning("포트 미연결, 전송 실패.")
+            return None
+        truncated = getattr(self.codec, 'truncated', 0)
+        data = self.codec.encode(flag, content, msg_id)
+        if getattr(self.codec, 'truncated', 0) != truncated:
+            log.warning("메시지가 legacy 프레임 한도를 넘어 잘렸습니다")
+        if self._enqueue(flag, data, jid):
+            return msg_id
+        if jid is not None:
+            self.journal.done(jid)
+        return None
+
+    def send_data(self, data, flag=None):
+        # 호출한 스레드는 대기열에 넣기만 함 (대기열이 가득 차면 정책에 따라 잠시 기다리거나 거부)
+        if not self.connected:
+            log.warning("포트 미연결, 전송 실패.")
+            return False
+        return self._enqueue(flag, data if isinstance(data, bytes) else data.encode('utf-8'))
+
+    def _enqueue(self, flag, data, jid=None):
+        if jid is not None:
+            self.journal.mark_queued(jid)
+        return self.outbound.put(flag, data, jid)
+
+    def _write(self, data):
+        # 쓰기 스레드 전용, 실패하면 수신 루프가 재연결하도록 표시
+        try:
+            self.ser.write(data)
+        except Exception:
+            self._broken = True
+            raise
+        log.debug("송신 -> %r", data)
+
+    def stop(self, timeout=2.0):
+        self.running = False
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
@@ -0,0 +1,343 @@
+import time
+import logging
+import threading
+from collections import namedtuple
+
+import numpy as np
+import sounddevice as sd
+from scipy.io.wavfile import write
+
+from . import stt_backends
+from . import stt_worker
+from . import tts_engine
+
+# ------------------------------------------------------------------------------------
+# 음성 파이프라인 (VAD 녹음 → Whisper 변환, TTS 재생)
+#  - numpy/sounddevice/scipy를 import하므로 코어는 이 모듈을 필요할 때 백그라운드에서 불러옴
+#  - STT 백엔드는 stt_worker.py의 별도 프로세스, pyttsx3는 tts_engine.py의 전용 스레드에서 실행
+# ------------------------------------------------------------------------------------
+# STT 백엔드(whisper 모델 크기/양자화/스레드 수 등)는 stt_backends.STT_CONFIG_FILE에서 설정
+RECORD_DURATION = 5   # 최대 녹음 시간 (초)
+SAMPLERATE = 16000    # Whisper 입력 샘플링 레이트 (그대로 넘기면 리샘플링/ffmpeg 불필요)
+TEMP_WAV = 'temp_record.wav'
+DEBUG_SAVE_WAV = False   # True면 녹음한 음성을 TEMP_WAV로 남김 (디버깅용)
+MIC_DEVICE = 1        # 녹음 입력 장치 번호 (sd.default.device는 TTS 출력에도 쓰이므로 바꾸지 않음)
+
+# --- 무음 감지(VAD) 녹음 설정 ---
+VAD_FRAME_MS = 30            # 에너지 계산 프레임 길이 (ms)
+VAD_PRE_ROLL = 0.3           # 발화 시작 전 함께 남길 구간 (초)
+VAD_MIN_SEC = 0.5            # 최소 발화 길이 (초) — 이보다 짧으면 무음이어도 계속 녹음
+VAD_MAX_SEC = RECORD_DURATION  # 최대 녹음 길이 (초)
+VAD_HANGOVER = 0.8           # 발화 후 이만큼 무음이 이어지면 녹음 종료 (초)
+VAD_MIN_RMS = 0.01           # 발화 판정 최소 RMS (float32 기준)
+VAD_THRESHOLD_RATIO = 3.0    # 배경 소음 대비 발화 판정 배율
+VAD_CALIBRATION_FRAMES = 5   # 시작 직후 소음 수준 학습에 쓰는 프레임 수
+
+# --- 실시간(스트리밍) 음성 인식 설정 ---
+STREAMING_STT = True         # False면 녹음이 끝난 뒤 한 번에 변환
+STREAM_WINDOW_SEC = 3.0      # 한 번에 변환할 윈도우 길이 (초)
+STREAM_OVERLAP_SEC = 0.5     # 이웃 윈도우와 겹치는 길이 (초)
+STREAM_MIN_TAIL_SEC = 0.5    # 마지막 윈도우 뒤에 새로 녹음된 구간이 이보다 짧으면 변환 생략 (초)
+
+log = logging.getLogger('car.speech')
+
+
+# ------------------------------------------------------------------------------------
+# 무음 감지(VAD) 기반 녹음기
+# ------------------------------------------------------------------------------------
+VadStats = namedtuple('VadStats', 'speech_sec trimmed_sec captured_sec ended_by')
+
+
+class VadRecorder:
+    # sd.InputStream으로 프레임 단위 녹음, 에너지(RMS)로 발화 끝을 감지하면 즉시 종료
+    def __init__(self, samplerate=SAMPLERATE, max_sec=VAD_MAX_SEC, min_sec=VAD_MIN_SEC,
+                 pre_roll=VAD_PRE_ROLL, hangover=VAD_HANGOVER, frame_ms=VAD_FRAME_MS):
+        self.samplerate = samplerate
+        self.frame_len = int(samplerate * frame_ms / 1000)
+        self.min_len = int(samplerate * min_sec)
+        self.pre_roll_len = int(samplerate * pre_roll)
+        self.hangover_len = int(samplerate * hangover)
+        # 최대 길이만큼 한 번만 할당하고 매 녹음마다 재사용
+        self.buffer = np.zeros(int(samplerate * max_sec), dtype=np.float32)
+        self._done = threading.Event()
+        self._stream = None
+        self.ended_at = 0.0
+        self.last_audio = self.buffer[:0]
+        self.last_stats = None
+
+    def _reset(self):
+        self._n = 0                 # 버퍼에 기록된 샘플 수
+        self._frames = 0
+        self._noise = 0.0           # 배경 소음 RMS 추정값
+        self._speech_start = -1     # 발화 시작 위치 (-1: 아직 없음)
+        self._last_voice = 0        # 마지막 음성 프레임의 끝 위치
+        self._ended_by = 'max'
+        self.ended_at = 0.0         # 녹음이 끝난 시각 (time.monotonic)
+        self._done.clear()
+
+    def start(self, device=None):
+        # 녹음 시작 (즉시 반환) — 진행 상황은 captured / speech_offset / wait()로 확인
+        self._reset()
+        self._stream = sd.InputStream(samplerate=self.samplerate, channels=1, dtype='float32',
+                                      blocksize=self.frame_len, device=device,
+                                      callback=self._callback)
+        self._stream.start()
+
+    def wait(self, timeout=None):
+        # 녹음이 끝났으면 True
+        return self._done.wait(timeout)
+
+    @property
+    def captured(self):
+        return self._n
+
+    @property
+    def speech_offset(self):
+        # pre-roll을 포함한 발화 시작 위치, 발화 전이면 -1
+        if self._speech_start < 0:
+            return -1
+        return max(0, self._speech_start - self.pre_roll_len)
+
+    def finish(self):
+        # 녹음 종료까지 기다린 뒤 (발화 구간 오디오 view, VadStats) 반환
+        self._done.wait(len(self.buffer) / self.samplerate + 1.0)
+        self._stream.close()
+        self._stream = None
+
+        n = self._n
+        if self._speech_start < 0:
+            audio = self.buffer[:0]
+            stats = VadStats(0.0, 0.0, n / self.samplerate, self._ended_by)
+        else:
+            start = self.speech_offset
+            end = min(n, self._last_voice + self.frame_len)
+            audio = self.buffer[start:end]
+            stats = VadStats((self._last_voice - self._speech_start) / self.samplerate,
+                             (n - end) / self.samplerate,
+                             n / self.samplerate, self._ended_by)
+        self.last_audio, self.last_stats = audio, stats
+        return audio, stats
+
+    def record(self, device=None):
+        self.start(device)
+        return self.finish()
+
+    def stop(self):
+        # 외부에서 녹음 중단 (대화상자 닫힘 등)
+        self._ended_by = 'stopped'
+        self._end()
+
+    def _end(self):
+        self.ended_at = time.monotonic()
+        self._done.set()
+
+    def _callback(self, indata, frames, time_info, status):
+        if self._done.is_set():
+            raise sd.CallbackStop()
+        x = indata[:, 0]
+        start = self._n
+        end = min(start + frames, len(self.buffer))
+        self.buffer[start:end] = x[:end - start]
+        self._n = end
+        self._frames += 1
+
+        rms = float(np.sqrt(np.dot(x, x) / max(frames, 1)))
+        threshold = max(VAD_MIN_RMS, self._noise * VAD_THRESHOLD_RATIO)
+
+        if self._speech_start < 0:
+            # 발화 전: 소음 수준을 학습하고, 보정 프레임 이후 임계값을 넘으면 발화 시작
+            if self._frames <= VAD_CALIBRATION_FRAMES:
+                self._noise += (rms - self._noise) / self._frames
+            elif rms > threshold:
+                self._speech_start = start
+                self._last_voice = end
+            else:
+                self._noise = 0.95 * self._noise + 0.05 * rms
+        else:
+            if rms > threshold:
+                self._last_voice = end
+            if (end - self._speech_start >= self.min_len
+                    and end - self._last_voice >= self.hangover_len):
+                self._ended_by = 'silence'
+                self._end()
+                raise sd.CallbackStop()
+
+        if end >= len(self.buffer):
+            self._end()
+            raise sd.CallbackStop()
+
+# ------------------------------------------------------------------------------------
+# 녹음 중 실시간(윈도우 단위) 음성 인식
+# ------------------------------------------------------------------------------------
+def merge_overlap(prev, new, max_words=6):
+    # 겹침 구간 때문에 앞 결과의 끝과 새 결과의 앞이 중복되면 한 번만 남김
+    prev_words, new_words = prev.split(), new.split()
+    norm = lambda w: w.strip('.,!?~…')
+    for k in range(min(max_words, len(prev_words), len(new_words)), 0, -1):
+        if [norm(w) for w in prev_words[-k:]] == [norm(w) for w in new_words[:k]]:
+            new_words = new_words[k:]
+            break
+    return ' '.join(prev_words + new_words)
+
+
+class StreamingTranscriber:
+    # VadRecorder가 채우는 버퍼를 window 길이씩 (overlap만큼 겹쳐서) 녹음과 동시에 변환
+    # engine(audio, prompt) -> text
+    def __init__(self, engine, samplerate=SAMPLERATE, window_sec=STREAM_WINDOW_SEC,
+                 overlap_sec=STREAM_OVERLAP_SEC, min_tail_sec=STREAM_MIN_TAIL_SEC, on_partial=None):
+        self.engine = engine
+        self.window_len = int(samplerate * window_sec)
+        self.step_len = int(samplerate * (window_sec - overlap_sec))
+        self.min_tail_len = int(samplerate * min_tail_sec)
+        self.on_partial = on_partial
+
+    def run(self, recorder):
+        # 녹음이 끝날 때까지 윈도우를 변환하고, 끝나면 남은 꼬리 구간만 변환해 최종 결과 반환
+        text = ''
+        seg = -1
+        fed_end = -1      # 마지막으로 변환한 윈도우의 끝 (아직 없으면 -1)
+        try:
+            while not recorder.wait(0.05):
+                if seg < 0:
+                    seg = recorder.speech_offset
+                    if seg < 0:
+                        continue
+                if recorder.captured - seg >= self.window_len:
+                    text = self._feed(text, recorder.buffer[seg:seg + self.window_len])
+                    fed_end = seg + self.window_len
+                    seg += self.step_len
+        except Exception:
+            recorder.stop()
+            recorder.finish()
+            raise
+
+        audio, stats = recorder.finish()
+        if not len(audio):
+            return '', stats
+        if seg < 0:
+            seg = recorder.speech_offset
+        end = recorder.speech_offset + len(audio)
+        # 윈도우를 하나도 못 돌렸으면 전체를 한 번 변환, 아니면 마지막 윈도우 뒤에 새로 녹음된 구간이 충분할 때만
+        # (후행 무음을 잘라 end가 이미 변환한 구간 안쪽일 수도 있음 → 짧은 꼬리는 추론 비용만 들고 헛인식을 붙임)
+        if fed_end < 0 or end - fed_end >= self.min_tail_len:
+            text = self._feed(text, recorder.buffer[seg:end])
+        return text, stats
+
+    def _feed(self, text, audio):
+        part = self.engine(audio, text).strip()
+        text = merge_overlap(text, part) if text else part
+        if self.on_partial:
+            self.on_partial(text)
+        return text
+
+
+# ------------------------------------------------------------------------------------
+# STT 프로세스 + TTS 엔진 + 녹음기 묶음
+# ------------------------------------------------------------------------------------
+class SpeechPipeline:
+    # 생성자가 모델 로딩까지 기다리므로 백그라운드 스레드에서 만들 것
+    def __init__(self, on_stt_event=None, tts_rate=150, stt_config=None, preload_phrases=()):
+        config = stt_config or stt_backends.load_config()
+        self.timings = {}
+        self.stt = self.tts = None
+        self.lock = threading.Lock()   # 녹음 버퍼는 하나뿐이므로 한 번에 한 건만 녹음
+        try:
+            # 모델 로딩은 STT 프로세스에서 진행되므로 그동안 TTS를 준비
+            t = time.perf_counter()
+            log.info("STT 백엔드: %s %s", config['backend'], config['options'])
+            self.stt = stt_worker.SttClient(
+                config['backend'], config['options'],
+                max_samples=int(VAD_MAX_SEC*SAMPLERATE), on_event=on_stt_event)
+
+            t_tts = time.perf_counter()
+            self.tts = tts_engine.TtsEngine(rate=tts_rate)
+            self.tts.wait_ready()
+            self.timings['tts'] = time.perf_counter() - t_tts
+            # 상용구 음성은 STT 모델을 기다리는 동안 미리 합성해 캐시에 고정 (받으면 바로 재생)
+            self.tts.preload(preload_phrases)
+
+            self.timings.update(self.stt.wait_ready())
+            self.timings['stt ready'] = time.perf_counter() - t
+        except Exception:
+            self.close()
+            raise
+        self.recorder = VadRecorder()
+
+    def session(self):
+        return self.stt.session()
+
+    def record(self, session, trace, on_status=None):
+        # 녹음 → 텍스트 변환, (텍스트, 상태) 반환
+        # 상태: None(텍스트 있음) / 'cancelled' / 'no_speech' / 'empty'
+        status = on_status or (lambda text: None)
+        stt_busy = [0.0]   # 실제 변환에 쓴 시간 합계 (스트리밍이면 윈도우별 합)
+
+        def transcribe(audio, prompt=None):
+            t = time.monotonic()
+            try:
+                return session.transcribe(audio, prompt)
+            finally:
+                stt_busy[0] += time.monotonic() - t
+
+        text = ""
+        with self.lock:
+            try:
+                if session.cancelled:
+                    return '', 'cancelled'
+                # 미리 할당한 버퍼에 바로 녹음, 발화가 끝나면 즉시 종료
+                self.recorder.start(MIC_DEVICE)
+                rec_start = time.monotonic()
+                trace.mark('tap', trace.t0, rec_start)
+                if STREAMING_STT:
+                    # 녹음과 동시에 윈도우 단위로 변환, 중간 결과는 녹음 화면에 표시
+                    streamer = StreamingTranscriber(
+                        transcribe, on_partial=lambda t: status(f"인식 중… {t}"))
+                    text, stats = streamer.run(self.recorder)
+                else:
+                    _, stats = self.recorder.finish()
+                trace.mark('capture', rec_start, self.recorder.ended_at or time.monotonic())
+                log.info("REC: 발화 %.2fs, 후행 무음 %.2fs 제거, 총 %.2fs (%s)",
+                         stats.speech_sec, stats.trimmed_sec, stats.captured_sec, stats.ended_by)
+                if not stats.speech_sec:
+                    log.warning("음성이 감지되지 않았습니다")
+                    return '', 'no_speech'
+                audio = self.recorder.last_audio
+                if DEBUG_SAVE_WAV:
+                    with trace.span('wav_write'):
+                        write(TEMP_WAV, SAMPLERATE, audio)
+
+                if not STREAMING_STT:
+                    status("변환중…")
+                    try:
+                        text = transcribe(audio)
+                    except stt_worker.SttCancelled:
+                        raise
+                    except Exception as e:
+                        log.error("Whisper 변환 실패 – %s", e)
+                # 사용자가 체감하는 변환 지연: 녹음 종료 → 최종 텍스트
+                trace.mark('stt', trace.spans['capture'][1])
+                trace.attrs['audio_sec'] = round(len(audio) / SAMPLERATE, 3)
+                trace.attrs['stt_busy_sec'] = round(stt_busy[0], 3)
+                trace.attrs['stt_rtf'] = stt_busy[0] / max(len(audio) / SAMPLERATE, 1e-3)
+
+                if session.cancelled:
+                    raise stt_worker.SttCancelled()
+                if not text:
+                    log.warning("변환된 텍스트가 없습니다")
+                    return '', 'empty'
+                return text, None
+            except stt_worker.SttCancelled:
+                return '', 'cancelled'
+
+    def stop_recording(self):
+        self.recorder.stop()
+
+    def speak(self, text):
+        # TTS 스레드에 요청만 넣고 바로 반환 (문장 단위 파이프라인 합성/재생)
+        self.tts.speak(text)
+
+    def close(self):
+        if self.stt:
+            self.stt.close()
+        if self.tts:
+            self.tts.close()
@@ -0,0 +1,162 @@
+import os
+import json
+import time
+
+# ------------------------------------------------------------------------------------
+# STT 백엔드
+#  - 백엔드 = load() / transcribe(audio, prompt) / unload() 를 가진 클래스, 이름으로 등록
+#  - transcribe는 16kHz mono float32 배열을 받아 (텍스트, 단계별 소요 시간) 반환
+#  - 사용할 백엔드와 옵션은 STT_CONFIG_FILE(JSON)에서 고름, 파일이 없으면 기본값(whisper tiny)
+#
+#   {"backend": "whisper", "options": {"model": "tiny", "quantize": true, "threads": 4},
+#    "bench": [{"name": "tiny", "backend": "whisper", "options": {"model": "tiny"}},
+#              {"name": "tiny-int8", "backend": "whisper", "options": {"model": "tiny", "quantize": true}}]}
+#
+# 백엔드 객체는 STT 프로세스(stt_worker)나 벤치마크 하위 프로세스 안에서만 만들 것
+# ------------------------------------------------------------------------------------
+STT_CONFIG_FILE = os.environ.get('CAR_STT_CONFIG', 'stt_config.json')
+DEFAULT_BACKEND = 'whisper'
+DEFAULT_OPTIONS = {'model': 'tiny'}
+
+BACKENDS = {}
+
+
+def register(name):
+    def deco(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return deco
+
+
+def create(name, options=None):
+    cls = BACKENDS.get(name)
+    if cls is None:
+        raise ValueError(f"알 수 없는 STT 백엔드: {name} (사용 가능: {', '.join(sorted(BACKENDS))})")
+    return cls(**(options or {}))
+
+
+def load_config(path=STT_CONFIG_FILE):
+    # 설정 파일 내용(dict), 없으면 기본값
+    config = {'backend': DEFAULT_BACKEND, 'options': dict(DEFAULT_OPTIONS)}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            config.update(json.load(f))
+    return config
+
+
+class SttBackend:
+    name = None
+
+    def load(self):
+        # 모델 로딩, 단계별 소요 시간 dict 반환
+        raise NotImplementedError
+
+    def transcribe(self, audio, prompt=None):
+        raise NotImplementedError
+
+    def unload(self):
+        pass
+
+    @property
+    def loaded(self):
+        return False
+
+
+@register('whisper')
+class WhisperBackend(SttBackend):
+    # openai-whisper (PyTorch, CPU), quantize=True면 int8 동적 양자화 모델을 디스크에 캐시해 사용
+    def __init__(self, model='tiny', quantize=False, cache_path=None, threads=0, language='ko',
+                 beam_size=None, best_of=None, temperature=None):
+        self.model_size = model
+        self.quantize = quantize
+        self.cache_path = cache_path or (f'whisper_{model}_int8.pt' if quantize else None)
+        self.threads = threads               # torch 스레드 수 (0이면 torch 기본값)
+        self.decode_options = {'language': language, 'task': 'transcribe', 'fp16': False}
+        if temperature is not None:
+            # 0.0으로 고정하면 실패 시 온도를 올려 다시 디코딩하는 fallback을 하지 않음 (지연 상한)
+            self.decode_options['temperature'] = temperature
+        if beam_size:
+            self.decode_options['beam_size'] = beam_size
+        if best_of:
+            self.decode_options['best_of'] = best_of
+        self.model = None
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    def load(self):
+        t = time.perf_counter()
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+        self.model, kind = load_whisper_model(self.model_size, self.quantize, self.cache_path)
+        return {f'whisper({kind})': time.perf_counter() - t}
+
+    def transcribe(self, audio, prompt=None):
+        t = time.perf_counter()
+        res = self.model.transcribe(audio, initial_prompt=prompt or None, **self.decode_options)
+        return res.get('text', '').strip(), {'transcribe': time.perf_counter() - t}
+
+    def unload(self):
+        self.model = None
+
+
+@register('faster_whisper')
+class FasterWhisperBackend(SttBackend):
+    # faster-whisper (CTranslate2), 'pip install faster-whisper' 필요 — int8 연산으로 CPU에서 빠름
+    def __init__(self, model='tiny', compute_type='int8', threads=0, language='ko', beam_size=1):
+        self.model_size = model
+        self.compute_type = compute_type
+        self.threads = threads
+        self.language = language
+        self.beam_size = beam_size
+        self.model = None
+
+    @property
+    def loaded(self):
+        return self.model is not None
+
+    def load(self):
+        t = time.perf_counter()
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(self.model_size, device='cpu', compute_type=self.compute_type,
+                                  cpu_threads=self.threads)
+        return {f'faster_whisper({self.compute_type})': time.perf_counter() - t}
+
+    def transcribe(self, audio, prompt=None):
+        t = time.perf_counter()
+        segments, _ = self.model.transcribe(audio, language=self.language, beam_size=self.beam_size,
+                                            initial_prompt=prompt or None)
+        text = ''.join(seg.text for seg in segments).strip()
+        return text, {'transcribe': time.perf_counter() - t}
+
+    def unload(self):
+        self.model = None
+
+
+def load_whisper_model(size, quantize=False, cache_path=None):
+    # 반환값: (모델, 로딩 방식 문자열)
+    import whisper
+    if not quantize:
+        return whisper.load_model(size, device='cpu'), 'fp32'
+
+    import torch
+    if cache_path and os.path.exists(cache_path):
+        try:
+            try:
+                model = torch.load(cache_path, map_location='cpu', weights_only=False)
+            except TypeError:   # weights_only 인자가 없는 구버전 torch
+                model = torch.load(cache_path, map_location='cpu')
+            return model, 'int8-cache'
+        except Exception:
+            os.remove(cache_path)   # 깨진 캐시는 지우고 다시 변환
+
+    model = whisper.load_model(size, device='cpu')
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if cache_path:
+        tmp_path = cache_path + '.tmp'
+        torch.save(model, tmp_path)
+        os.replace(tmp_path, cache_path)
+    return model, 'int8'
@@ -0,0 +1,297 @@
+import gc
+import time
+import logging
+import queue
+import itertools
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory, resource_tracker
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+from . import stt_backends
+
+# ------------------------------------------------------------------------------------
+# STT 전용 프로세스
+#  - GUI 프로세스와 GIL/torch 스레드를 나눠 쓰지 않도록 STT 백엔드(stt_backends)는 별도 프로세스에서 실행
+#  - 오디오는 공유 메모리 슬롯으로 전달 (배열 pickle 없음), 슬롯 수만큼만 작업이 대기 가능
+#  - 작업은 한 번에 하나씩 처리, 일정 시간 사용이 없으면 모델을 내려 메모리 반환
+#  - 결과 수신 스레드가 프로세스 생존을 확인: 죽으면 대기 중인 작업을 오류로 끝내고 프로세스를 다시 띄움
+#    (모델 로딩도 못 하고 죽으면 다시 띄우지 않고 이후 요청은 바로 오류)
+# ------------------------------------------------------------------------------------
+STT_SHM_SLOTS = 2          # 공유 메모리 슬롯 수 (= 동시에 대기할 수 있는 최대 작업 수)
+STT_IDLE_UNLOAD_SEC = 120  # 이 시간 동안 작업이 없으면 모델 해제 (0이면 해제 안 함)
+STT_SUBMIT_TIMEOUT = 10.0  # 빈 슬롯을 기다리는 최대 시간 (초)
+STT_RESULT_TIMEOUT = 60.0  # 변환 결과를 기다리는 최대 시간 (초, 모델 재로딩 포함)
+STT_POLL_SEC = 0.5         # 결과가 없을 때 프로세스 생존을 확인하는 주기 (초)
+
+log = logging.getLogger('car.stt')
+
+
+class SttCancelled(Exception):
+    pass
+
+
+def _attach_shm(name):
+    # 만든 쪽(앱 프로세스)이 unlink까지 책임지므로 붙기만 하는 STT 프로세스는 resource_tracker에 등록하지 않음
+    # (spawn 자식은 부모와 같은 추적기를 쓰므로 등록 후 unregister하면 부모의 등록까지 지워짐 → 등록 자체를 건너뜀)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # 3.13+
+    except TypeError:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _worker_main(jobs, results, cancels, backend_name, options, idle_unload):
+    # STT 프로세스 본체: jobs에서 (job_id, shm 이름, 샘플 수, prompt)를 받아 순서대로 변환
+    cancelled = set()
+    segments = {}
+    last_used = time.monotonic()
+
+    try:
+        backend = stt_backends.create(backend_name, options)
+        results.put(('ready', None, backend.load()))
+    except Exception as e:
+        results.put(('error', None, f"모델 로딩 실패: {e}"))
+        return
+
+    while True:
+        timeout = 1.0 if backend.loaded and idle_unload else None
+        try:
+            job = jobs.get(timeout=timeout)
+        except queue.Empty:
+            if time.monotonic() - last_used >= idle_unload:
+                backend.unload()
+                gc.collect()
+                results.put(('unloaded', None, None))
+            continue
+        if job is None:
+            break
+
+        job_id, shm_name, n, prompt = job
+        while True:
+            try:
+                cancelled.add(cancels.get_nowait())
+            except queue.Empty:
+                break
+        if cancelled:
+            # 작업은 ID 순서로 들어오므로 지금 ID보다 작은 취소는 이미 끝났거나 (결과를 버린) 작업 → 잊음
+            cancelled = {c for c in cancelled if c >= job_id}
+        if job_id in cancelled:
+            cancelled.discard(job_id)
+            results.put(('cancelled', job_id, None))
+            continue
+
+        try:
+            if not backend.loaded:
+                results.put(('loaded', None, backend.load()))
+            shm = segments.get(shm_name)
+            if shm is None:
+                shm = segments[shm_name] = _attach_shm(shm_name)
+            audio = np.ndarray((n,), dtype=np.float32, buffer=shm.buf)
+            text, timings = backend.transcribe(audio, prompt)
+            del audio
+            results.put(('done', job_id, (text, timings)))
+        except Exception as e:
+            results.put(('error', job_id, str(e)))
+        last_used = time.monotonic()
+
+    for shm in segments.values():
+        shm.close()
+
+
+class SttSession:
+    # 녹음 한 건 단위의 작업 묶음, cancel()로 대기/진행 중인 변환을 모두 취소
+    def __init__(self, client):
+        self.client = client
+        self.job_ids = set()
+        self.cancelled = False
+
+    def transcribe(self, audio, prompt=None):
+        if self.cancelled:
+            raise SttCancelled()
+        job_id, fut = self.client.submit(audio, prompt)
+        self.job_ids.add(job_id)
+        try:
+            text = fut.result(STT_RESULT_TIMEOUT)
+        except FutureTimeout:
+            self.client.cancel(job_id)
+            raise RuntimeError(f"STT 응답이 {STT_RESULT_TIMEOUT:.0f}초 넘게 없습니다")
+        finally:
+            self.job_ids.discard(job_id)
+        if self.cancelled:
+            raise SttCancelled()
+        return text
+
+    def cancel(self):
+        self.cancelled = True
+        for job_id in list(self.job_ids):
+            self.client.cancel(job_id)
+
+
+class SttClient:
+    # 앱 프로세스 쪽 STT 프록시
+    def __init__(self, backend=stt_backends.DEFAULT_BACKEND, options=None, max_samples=16000 * 30,
+                 slots=STT_SHM_SLOTS, idle_unload=STT_IDLE_UNLOAD_SEC, on_event=None):
+        self.on_event = on_event     # on_event(kind, info) — 결과 수신 스레드에서 호출됨
+        self.max_samples = max_samples
+        self.ready = threading.Event()
+        self.error = None
+        self.timings = {}
+        self.restarts = 0
+        self._backend, self._options, self._idle_unload = backend, options or {}, idle_unload
+        self._slot_count = slots
+        self._closing = False
+        self._dead = False            # 다시 띄우지 않기로 한 상태 (self.error에 이유)
+
+        # Qt가 떠 있는 프로세스를 fork하지 않도록 spawn 사용
+        self._ctx = mp.get_context('spawn')
+        self._slots = queue.Queue()
+        self._shms = []
+        for _ in range(slots):
+            shm = shared_memory.SharedMemory(create=True, size=max_samples * 4)
+            self._shms.append(shm)
+            self._slots.put(shm)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+        self._spawn()
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+
+    def _spawn(self):
+        # 새 큐로 STT 프로세스 시작 (죽은 프로세스의 큐에 남은 작업/결과는 버림)
+        ctx = self._ctx
+        self._jobs = ctx.Queue(maxsize=self._slot_count)
+        self._results = ctx.Queue()
+        self._cancels = ctx.Queue()
+        self._loaded_once = False     # 이번 프로세스가 모델 로딩을 마쳤는지
+        self._proc = ctx.Process(
+            target=_worker_main,
+            args=(self._jobs, self._results, self._cancels,
+                  self._backend, self._options, self._idle_unload),
+            daemon=True)
+        self._proc.start()
+
+    def wait_ready(self, timeout=None):
+        # 첫 모델 로딩이 끝날 때까지 대기, 실패 시 RuntimeError
+        self.ready.wait(timeout)
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.timings
+
+    def session(self):
+        return SttSession(self)
+
+    def submit(self, audio, prompt=None, timeout=STT_SUBMIT_TIMEOUT):
+        # 빈 슬롯이 날 때까지 대기(역압) 후 오디오를 복사해 작업 등록
+        if self._dead:
+            raise RuntimeError(self.error)
+        try:
+            shm = self._slots.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError(f"STT 작업 슬롯이 {timeout:.0f}초 동안 비지 않았습니다")
+        n = min(len(audio), self.max_samples)
+        view = np.ndarray((n,), dtype=np.float32, buffer=shm.buf)
+        view[:] = audio[:n]
+        del view
+
+        fut = Future()
+        # ID 발급/등록/큐 넣기를 같은 잠금 안에서: 프로세스가 죽어 큐를 바꾸는 도중에 옛 큐로 들어가지 않고,
+        # 작업이 ID 순서로 들어가게 함 (STT 프로세스의 취소 목록 정리가 이 순서에 기댐)
+        # (슬롯 수 = 큐 크기이므로 put은 막히지 않음)
+        with self._lock:
+            if self._dead:
+                self._slots.put(shm)
+                raise RuntimeError(self.error)
+            job_id = next(self._ids)
+            self._pending[job_id] = (fut, shm)
+            self._jobs.put((job_id, shm.name, n, prompt))
+        return job_id, fut
+
+    def transcribe(self, audio, prompt=None):
+        return self.submit(audio, prompt)[1].result(STT_RESULT_TIMEOUT)
+
+    def cancel(self, job_id):
+        # 기다리는 쪽은 즉시 SttCancelled로 풀어주고, 슬롯은 워커가 손을 뗀 뒤 반환
+        with self._lock:
+            entry = self._pending.get(job_id)
+            if entry and not entry[0].done():
+                entry[0].set_exception(SttCancelled())
+        self._cancels.put(job_id)
+
+    def _read_results(self):
+        while not self._closing:
+            try:
+                kind, job_id, info = self._results.get(timeout=STT_POLL_SEC)
+            except queue.Empty:
+                if not self._proc.is_alive() and not self._closing:
+                    if not self._on_worker_exit():
+                        break
+                continue
+            except (EOFError, OSError):
+                break
+            if job_id is not None:
+                with self._lock:
+                    fut, shm = self._pending.pop(job_id, (None, None))
+                    if fut is not None and not fut.done():
+                        if kind == 'done':
+                            fut.set_result(info[0])
+                        elif kind == 'cancelled':
+                            fut.set_exception(SttCancelled())
+                        else:
+                            fut.set_exception(RuntimeError(info))
+                if shm is not None:
+                    self._slots.put(shm)
+            elif kind == 'ready':
+                self._loaded_once = True
+                self.timings = info
+                self.ready.set()
+            elif kind == 'error':
+                self.error = info
+                self.ready.set()
+            if self.on_event:
+                self.on_event(kind, info)
+
+    def _on_worker_exit(self):
+        # 프로세스가 죽음: 대기 중인 작업을 오류로 끝내고 다시 띄움, 계속 읽을지 반환
+        code = self._proc.exitcode
+        msg = f"STT 프로세스가 종료되었습니다 (exit code {code})"
+        log.error("%s, 대기 중 작업 %d건 실패 처리", msg, len(self._pending))
+        respawn = self._loaded_once
+        with self._lock:
+            for fut, shm in self._pending.values():
+                if not fut.done():
+                    fut.set_exception(RuntimeError(msg))
+                self._slots.put(shm)
+            self._pending.clear()
+            if respawn:
+                self.restarts += 1
+                self._spawn()
+            else:
+                # 모델 로딩 중에 죽음: 다시 띄워도 같을 가능성이 크므로 멈추고 이후 요청은 바로 실패
+                self._dead = True
+                self.error = self.error or f"{msg}, 모델 로딩 실패"
+        self.ready.set()
+        if self.on_event:
+            self.on_event('restarted' if respawn else 'error', msg if respawn else self.error)
+        return respawn
+
+    def close(self):
+        self._closing = True
+        try:
+            self._jobs.put(None, timeout=1)
+        except queue.Full:
+            pass
+        self._proc.join(2)
+        if self._proc.is_alive():
+            self._proc.terminate()
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import queue
+import logging
+import itertools
+import threading
+from collections import deque
+
+# ------------------------------------------------------------------------------------
+# 음성 메시지 지연 시간 추적
+#  - 메시지 하나 = Trace 하나, 단계(span)마다 time.monotonic() 시작/끝 기록
+#  - 전송 후에는 메시지 ID(legacy는 차량별 FIFO)로 '4' 응답과 연결
+#  - 끝난 Trace는 단계별 히스토그램(p50/p95/p99)에 모으고 JSON-lines 파일로 내보냄
+#
+# 단계: tap(버튼→녹음 시작) capture(녹음) wav_write(디버그 저장) stt(녹음 종료→텍스트)
+#       send(송신) ack(송신→응답 수신: 무선 구간 + 상대 장치 처리) total
+#       attrs['kind']가 있는 Trace(예: 상용구 'quick')는 'quick.send'처럼 따로 모음
+# ------------------------------------------------------------------------------------
+TRACE_FILE = os.environ.get('CAR_TRACE_FILE')   # 지정하면 끝난 Trace를 JSON-lines로 기록
+TRACE_HISTORY = 512                             # 단계별로 남길 최근 샘플 수
+TRACE_ACK_TIMEOUT = 30.0                        # 응답을 이 시간 넘게 못 받으면 timeout 처리 (초)
+
+log = logging.getLogger('car.trace')
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class Trace:
+    __slots__ = ('trace_id', 'car', 'msg_id', 't0', 'wall', 'spans', 'attrs', 'status')
+
+    def __init__(self, trace_id, car):
+        self.trace_id = trace_id
+        self.car = car
+        self.msg_id = None
+        self.t0 = time.monotonic()
+        self.wall = time.time()
+        self.spans = {}          # 단계 → (시작, 끝) monotonic 초
+        self.attrs = {}
+        self.status = None
+
+    def span(self, stage):
+        return _Span(self, stage)
+
+    def mark(self, stage, start, end=None):
+        self.spans[stage] = (start, time.monotonic() if end is None else end)
+
+    def sent_at(self):
+        send = self.spans.get('send')
+        return send[1] if send else self.t0
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id, 'car': self.car, 'msg_id': self.msg_id,
+            'time': self.wall, 'status': self.status,
+            'spans_ms': {k: round((e - s) * 1000, 3) for k, (s, e) in self.spans.items()},
+            **self.attrs,
+        }
+
+
+class _Span:
+    __slots__ = ('trace', 'stage', 'start')
+
+    def __init__(self, trace, stage):
+        self.trace, self.stage = trace, stage
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.mark(self.stage, self.start)
+        return False
+
+
+class Tracer:
+    def __init__(self, history=TRACE_HISTORY, export_path=TRACE_FILE, ack_timeout=TRACE_ACK_TIMEOUT):
+        self.ack_timeout = ack_timeout
+        self._history = history
+        self._hist = {}               # 단계 → deque(ms)
+        self._open = {}               # msg_id → Trace (응답 대기)
+        self._by_car = {}             # car → deque(Trace) (legacy 응답 매칭용)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._export = None
+        if export_path:
+            self._export = queue.SimpleQueue()
+            threading.Thread(target=self._export_loop, args=(export_path,), daemon=True).start()
+
+    def begin(self, car):
+        return Trace(next(self._ids), car)
+
+    def sent(self, trace, msg_id):
+        # 송신 완료, 응답을 기다리는 목록에 등록
+        trace.msg_id = msg_id
+        with self._lock:
+            stale = self._expire(time.monotonic())
+            self._open[msg_id] = trace
+            self._by_car.setdefault(trace.car, deque()).append(trace)
+        for t in stale:
+            self.finish(t, 'timeout')
+
+    def rekey(self, old_id, new_id):
+        # 재연결 후 재전송으로 메시지 ID가 바뀐 경우 응답 대기 Trace를 새 ID로 옮김
+        with self._lock:
+            trace = self._open.pop(old_id, None)
+            if trace is not None:
+                trace.msg_id = new_id
+                self._open[new_id] = trace
+                trace.attrs['resent'] = trace.attrs.get('resent', 0) + 1
+
+    def response(self, car, status, msg_id=None):
+        # '4' 응답 수신: msg_id가 있으면 그것으로만 (모르는 ID면 None), 없으면(legacy) 해당 차량의 가장 오래된 대기 Trace와 연결
+        now = time.monotonic()
+        with self._lock:
+            if msg_id is not None:
+                trace = self._open.get(msg_id)
+            else:
+                pending = self._by_car.get(car)
+                trace = pending[0] if pending else None
+            if trace is None:
+                return None
+            self._detach(trace)
+        trace.mark('ack', trace.sent_at(), now)
+        self.finish(trace, 'ok' if status == '1' else 'fail')
+        return trace
+
+    def abandon(self, msg_id, status='timeout'):
+        # 응답을 기다리던 Trace를 응답 없이 종료 (전달 추적이 재전송을 포기한 경우)
+        with self._lock:
+            trace = self._open.get(msg_id)
+            if trace is None:
+                return None
+            self._detach(trace)
+        self.finish(trace, status)
+        return trace
+
+    def finish(self, trace, status):
+        # Trace 종료: 히스토그램에 반영하고 파일로 내보냄 (취소된 건은 통계에서 제외)
+        trace.status = status
+        end = max((e for _, e in trace.spans.values()), default=time.monotonic())
+        trace.spans['total'] = (trace.t0, end)
+        if self._export is not None:
+            self._export.put(trace.to_dict())
+        if status == 'cancelled':
+            return
+        prefix = f"{trace.attrs['kind']}." if 'kind' in trace.attrs else ''
+        with self._lock:
+            for stage, (s, e) in trace.spans.items():
+                self._record(prefix + stage, (e - s) * 1000)
+            rtf = trace.attrs.get('stt_rtf')
+            if rtf is not None:
+                self._record('stt_rtf', rtf)
+
+    def summary(self):
+        # 단계 → {count, p50, p95, p99} (ms, stt_rtf는 배율)
+        with self._lock:
+            hist = {k: sorted(v) for k, v in self._hist.items()}
+        return {k: {'count': len(v), 'p50': percentile(v, 50),
+                    'p95': percentile(v, 95), 'p99': percentile(v, 99)}
+                for k, v in hist.items()}
+
+    def log_summary(self):
+        summary = self.summary()
+        if not summary:
+            log.info("지연 시간 기록 없음")
+        for stage, st in sorted(summary.items()):
+            log.info("%-11s n=%-4d p50=%8.1f p95=%8.1f p99=%8.1f",
+                     stage, st['count'], st['p50'], st['p95'], st['p99'])
+
+    def _record(self, stage, value):
+        hist = self._hist.get(stage)
+        if hist is None:
+            hist = self._hist[stage] = deque(maxlen=self._history)
+        hist.append(value)
+
+    def _detach(self, trace):
+        self._open.pop(trace.msg_id, None)
+        pending = self._by_car.get(trace.car)
+        if pending:
+            pending.remove(trace)
+            if not pending:
+                del self._by_car[trace.car]
+
+    def _expire(self, now):
+        # 응답 대기 시간이 지난 Trace를 떼어내 반환 (finish는 잠금 밖에서)
+        stale = [t for t in self._open.values() if now - t.sent_at() > self.ack_timeout]
+        for trace in stale:
+            self._detach(trace)
+        return stale
+
+    def _export_loop(self, path):
+        with open(path, 'a', encoding='utf-8') as f:
+            while True:
+                items = [self._export.get()]
+                while not self._export.empty():
+                    items.append(self._export.get())
+                f.write(''.join(json.dumps(it, ensure_ascii=False) + '\n' for it in items))
+                f.flush()
@@ -0,0 +1,194 @@
+import os
+import re
+import time
+import queue
+import wave
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import sounddevice as sd
+import pyttsx3
+
+from . import metrics
+
+# ------------------------------------------------------------------------------------
+# TTS 전용 스레드
+#  - pyttsx3 엔진은 스레드 안전하지 않으므로 합성 스레드 하나만 엔진을 소유
+#  - 문장 단위로 나눠 합성, N번째 문장이 재생되는 동안 N+1번째 문장을 미리 합성
+#  - 합성한 오디오는 크기 제한 LRU 캐시에 보관해 자주 쓰는 문장은 바로 재생
+#  - preload()로 미리 합성한 문장(상용구)은 캐시에 고정되어 밀려나지 않음
+# ------------------------------------------------------------------------------------
+log = logging.getLogger('car.tts')
+
+TTS_RATE = 150
+TTS_MAX_CHUNK = 100                  # 문장이 이보다 길면 공백 기준으로 다시 자름
+TTS_CACHE_BYTES = 8 * 1024 * 1024    # 합성 오디오 캐시 최대 크기
+TTS_PREFETCH = 1                     # 재생 중에 미리 합성해 둘 문장 수
+# SD카드 쓰기를 피하려고 가능하면 메모리 파일시스템에 임시 WAV 생성
+TTS_RENDER_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+TTS_REQUESTS = metrics.counter('car_tts_requests_total', '재생 요청 수')
+TTS_CHUNKS = metrics.counter('car_tts_chunks_total', '문장 조각 수 (캐시 적중/합성)', ('source',))
+TTS_SYNTH = metrics.summary('car_tts_synth_seconds', '문장 조각 합성 시간 (초)')
+
+_SENTENCE_END = re.compile(r'(?<=[.!?。…~\n])\s*')
+
+
+def split_sentences(text, max_len=TTS_MAX_CHUNK):
+    chunks = []
+    for sent in _SENTENCE_END.split(text):
+        sent = sent.strip()
+        while len(sent) > max_len:
+            cut = sent.rfind(' ', 0, max_len)
+            if cut <= 0:
+                cut = max_len
+            chunks.append(sent[:cut].strip())
+            sent = sent[cut:].strip()
+        if sent:
+            chunks.append(sent)
+    return chunks
+
+
+class AudioCache:
+    # 문장 → (샘플 배열, 샘플링 레이트), 전체 바이트 수 기준 LRU (고정 항목은 크기 제한에서 제외)
+    def __init__(self, max_bytes=TTS_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items = OrderedDict()
+        self._pinned = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        pinned = self._pinned.get(key)
+        if pinned is not None:
+            return pinned
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key, item):
+        size = item[0].nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[0].nbytes
+            self._items[key] = item
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (samples, _) = self._items.popitem(last=False)
+                self.nbytes -= samples.nbytes
+
+    def pin(self, key, item):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[0].nbytes
+            self._pinned[key] = item
+
+    def is_pinned(self, key):
+        return key in self._pinned
+
+    def __len__(self):
+        return len(self._items) + len(self._pinned)
+
+
+class TtsEngine:
+    def __init__(self, rate=TTS_RATE, cache_bytes=TTS_CACHE_BYTES):
+        self.rate = rate
+        self.cache = AudioCache(cache_bytes)
+        self.ready = threading.Event()
+        self.error = None
+        self._requests = queue.Queue()
+        # 크기 제한으로 합성이 재생보다 TTS_PREFETCH 문장 이상 앞서가지 않게 함
+        self._playback = queue.Queue(maxsize=TTS_PREFETCH)
+        self._synth_thread = threading.Thread(target=self._synth_loop, daemon=True)
+        self._play_thread = threading.Thread(target=self._play_loop, daemon=True)
+        self._synth_thread.start()
+        self._play_thread.start()
+
+    def wait_ready(self, timeout=None):
+        self.ready.wait(timeout)
+        if self.error:
+            raise RuntimeError(self.error)
+
+    def speak(self, text):
+        # 즉시 반환, 요청 순서대로 재생
+        TTS_REQUESTS.inc()
+        self._requests.put((text, True))
+
+    def preload(self, texts):
+        # 재생하지 않고 합성만 해서 캐시에 고정 (상용구 등 자주 받는 문장)
+        for text in texts:
+            self._requests.put((text, False))
+
+    @property
+    def backlog(self):
+        return self._requests.qsize() + self._playback.qsize()
+
+    def close(self):
+        self._requests.put(None)
+
+    def _synth_loop(self):
+        try:
+            engine = pyttsx3.init(driverName='espeak')
+            engine.setProperty('rate', self.rate)
+        except Exception as e:
+            self.error = str(e)
+            self.ready.set()
+            return
+        self.ready.set()
+
+        path = os.path.join(TTS_RENDER_DIR, f'tts_{os.getpid()}.wav')
+        while True:
+            req = self._requests.get()
+            if req is None:
+                break
+            text, play = req
+            for chunk in split_sentences(text):
+                audio = self.cache.get(chunk)
+                if audio is None:
+                    t = time.perf_counter()
+                    try:
+                        audio = self._render(engine, chunk, path)
+                    except Exception as e:
+                        log.error("TTS 합성 실패 – %s", e)
+                        continue
+                    TTS_SYNTH.observe(time.perf_counter() - t)
+                    TTS_CHUNKS.labels('synth').inc()
+                    if play:
+                        self.cache.put(chunk, audio)
+                else:
+                    TTS_CHUNKS.labels('cache').inc()
+                if not play:
+                    self.cache.pin(chunk, audio)
+                    continue
+                self._playback.put(audio)
+        self._playback.put(None)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _render(self, engine, text, path):
+        engine.save_to_file(text, path)
+        engine.runAndWait()
+        with wave.open(path, 'rb') as wf:
+            samplerate = wf.getframerate()
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        return samples, samplerate
+
+    def _play_loop(self):
+        while True:
+            audio = self._playback.get()
+            if audio is None:
+                break
+            try:
+                sd.play(audio[0], audio[1])
+                sd.wait()
+            except Exception as e:
+                log.error("TTS 재생 실패 – %s", e)
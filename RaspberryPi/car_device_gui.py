@@ -1,78 +1,58 @@
 import sys
 import os
 import time
-import threading
+import logging
+import signal
+import socket
 
-# --- GUI 및 시리얼 통신 라이브러리 ---
-from PyQt5.QtCore import QObject, QThread, pyqtSignal, Qt, QTimer
+# --- GUI 라이브러리 ---
+from PyQt5.QtCore import QObject, pyqtSignal, Qt, QTimer, QSocketNotifier
 from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QHBoxLayout, QVBoxLayout,
     QListWidget, QLabel, QMessageBox, QSizePolicy,
-    QListWidgetItem, QDialog, QLineEdit, QGridLayout, QPushButton
+    QListWidgetItem, QDialog, QLineEdit, QGridLayout, QPushButton, QStackedWidget
 )
-try:
-    import serial
-except ImportError:
-    print("pyserial 라이브러리가 없습니다. 'pip install pyserial' 명령어로 설치해주세요.")
-    sys.exit(1)
-
-# --- STT/TTS 및 Whisper 라이브러리 ---
-try:
-    import sounddevice as sd
-    from scipy.io.wavfile import write
-    import whisper
-    import pyttsx3
-except ImportError:
-    print("라이브러리가 누락되었습니다. 'pip install sounddevice scipy whisper pyttsx3' 명령어로 설치해주세요.")
-    sys.exit(1)
-
-CONFIG_FILE = 'vehicle_info.txt'
-WHISPER_MODEL_SIZE = 'tiny'
-RECORD_DURATION = 5   # 녹음 시간 (초)
-SAMPLERATE = 44100    # Whisper 권장 샘플링 레이트
-TEMP_WAV = 'temp_record.wav'
 
-# ------------------------------------------------------------------------------------
-# 1번 코드의 한글 조합 및 가상 키보드 클래스
-# ------------------------------------------------------------------------------------
-class HangulAutomata:
-    CHOSUNG_START = 0x1100
-    JUNGSUNG_START = 0x1161
-    JONGSUNG_START = 0x11A8
-    HANGUL_START = 0xAC00
-
-    CHOSUNG = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
-    JUNGSUNG = ['ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅘ', 'ㅙ', 'ㅚ', 'ㅛ', 'ㅜ', 'ㅝ', 'ㅞ', 'ㅟ', 'ㅠ', 'ㅡ', 'ㅢ', 'ㅣ']
-    JONGSUNG = ['', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ', 'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+from car_core import device_log, metrics
+from car_core.hangul_ime import HangulComposer
+from car_core.engine import CarCore, CONFIG_FILE
 
-    COMPLEX_VOWELS = {('ㅗ', 'ㅏ'): 'ㅘ', ('ㅗ', 'ㅐ'): 'ㅙ', ('ㅗ', 'ㅣ'): 'ㅚ', ('ㅜ', 'ㅓ'): 'ㅝ', ('ㅜ', 'ㅔ'): 'ㅞ', ('ㅜ', 'ㅣ'): 'ㅟ', ('ㅡ', 'ㅣ'): 'ㅢ'}
-    COMPLEX_CONSONANTS = {('ㄱ', 'ㅅ'): 'ㄳ', ('ㄴ', 'ㅈ'): 'ㄵ', ('ㄴ', 'ㅎ'): 'ㄶ', ('ㄹ', 'ㄱ'): 'ㄺ', ('ㄹ', 'ㅁ'): 'ㄻ', ('ㄹ', 'ㅂ'): 'ㄼ', ('ㄹ', 'ㅅ'): 'ㄽ', ('ㄹ', 'ㅌ'): 'ㄾ', ('ㄹ', 'ㅍ'): 'ㄿ', ('ㄹ', 'ㅎ'): 'ㅀ', ('ㅂ', 'ㅅ'): 'ㅄ'}
+log = logging.getLogger('car.gui')
 
-    @staticmethod
-    def is_hangul(char):
-        return 0xAC00 <= ord(char) <= 0xD7A3
+# 음성(STT/TTS)과 시리얼 통신은 car_core 패키지가 담당하고, 이 파일은 화면만 담당
+# whisper/torch/sounddevice는 화면을 먼저 띄운 뒤 코어가 백그라운드에서 불러온다.
+STARTUP_T0 = time.perf_counter()
 
-    @staticmethod
-    def decompose(char):
-        if not HangulAutomata.is_hangul(char):
-            return None, None, None
+PEER_GRID_COLS = 5    # 차량 버튼 그리드 (5열 × 4행 = 한 페이지 20대)
+PEER_GRID_ROWS = 4
+PEER_PAGE_SIZE = PEER_GRID_COLS * PEER_GRID_ROWS
+QUICK_GRID_COLS = 4   # 녹음 화면의 상용구 버튼 열 수
+OVERLAY_RESPONSE_MS = 2000   # 전송 결과 화면이 자동으로 닫히는 시간
+OVERLAY_TTS_MS = 5000        # 수신 메시지 화면이 자동으로 닫히는 시간
 
-        code = ord(char) - HangulAutomata.HANGUL_START
-        jongsung_idx = code % 28
-        jungsung_idx = (code // 28) % 21
-        chosung_idx = (code // 28) // 21
+PEER_RENDER = metrics.summary('car_gui_peer_render_seconds', '피어 목록이 바뀔 때 차량 버튼 갱신 시간 (초)')
 
-        return HangulAutomata.CHOSUNG[chosung_idx], HangulAutomata.JUNGSUNG[jungsung_idx], HangulAutomata.JONGSUNG[jongsung_idx]
 
-    @staticmethod
-    def combine(cho, jung, jong):
-        chosung_idx = HangulAutomata.CHOSUNG.index(cho)
-        jungsung_idx = HangulAutomata.JUNGSUNG.index(jung)
-        jongsung_idx = HangulAutomata.JONGSUNG.index(jong)
+class CoreSignals(QObject):
+    # 코어 콜백(시리얼/음성 스레드) → Qt 시그널, GUI 스레드의 슬롯으로 자동 큐잉됨
+    peers_changed = pyqtSignal(list)
+    inbox_changed = pyqtSignal()
+    speech_ready = pyqtSignal(dict)              # 단계별 소요 시간
+    speech_failed = pyqtSignal(str)
+    stt_event = pyqtSignal(str, object)          # STT 프로세스 상태 알림 (모델 해제/재로딩 등)
 
-        return chr(HangulAutomata.HANGUL_START + (chosung_idx * 21 * 28) + (jungsung_idx * 28) + jongsung_idx)
+    def __init__(self, core):
+        super().__init__()
+        core.on('peers', self.peers_changed.emit)
+        core.on('inbox', lambda kind, car: self.inbox_changed.emit())
+        core.on('speech_ready', self.speech_ready.emit)
+        core.on('speech_failed', self.speech_failed.emit)
+        core.on('stt_event', self.stt_event.emit)
 
+# ------------------------------------------------------------------------------------
+# 1번 코드의 가상 키보드 클래스 (한글 조합은 car_core/hangul_ime.py)
+# ------------------------------------------------------------------------------------
 class VirtualKeyboard(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -89,9 +69,9 @@ class VirtualKeyboard(QDialog):
         btn_height = screen_height // 12   # 버튼 세로 크기
 
         # 한글 자동조합 및 Shift 상태 초기화
-        self.automata = HangulAutomata()
+        self.composer = HangulComposer()
         self.is_shift_pressed = False
-        self.shift_map = {'ㅂ': 'ㅃ', 'ㅈ': 'ㅉ', 'ㄷ': 'ㄸ', 'ㄱ': 'ㄲ', 'ㅅ': 'ㅆ'}
+        self.shift_map = {'ㅂ': 'ㅃ', 'ㅈ': 'ㅉ', 'ㄷ': 'ㄸ', 'ㄱ': 'ㄲ', 'ㅅ': 'ㅆ', 'ㅐ': 'ㅒ', 'ㅔ': 'ㅖ'}
         self.shift_map_buttons = {}
 
         # 레이아웃 마진/간격 제거
@@ -179,8 +159,7 @@ class VirtualKeyboard(QDialog):
 
 
     def on_simple_key_clicked(self):
-        key = self.sender().text()
-        self.line_edit.setText(self.line_edit.text() + key)
+        self.apply_edit(self.composer.feed(self.sender().text()))
 
     def on_shift_clicked(self):
         self.is_shift_pressed = not self.is_shift_pressed
@@ -188,113 +167,58 @@ class VirtualKeyboard(QDialog):
             btn.setText(self.shift_map[base] if self.is_shift_pressed else base)
 
     def on_key_clicked(self):
-        key = self.sender().text()
-        text = self.line_edit.text()
-        is_vowel = key in self.automata.JUNGSUNG
-        if not text:
-            self.line_edit.setText(key)
-        else:
-            last = text[-1]
-            cho, jung, jong = self.automata.decompose(last)
-            if cho is None:
-                if last in self.automata.CHOSUNG and is_vowel:
-                    new_char = self.automata.combine(last, key, '')
-                    self.line_edit.setText(text[:-1] + new_char)
-                else:
-                    self.line_edit.setText(text + key)
-            else:
-                # 자음/모음 결합 로직 (간소화)
-                self.line_edit.setText(text + key)
+        # 조합기가 알려준 만큼만 끝에서 바꿈 (보통 조합 중인 마지막 음절 하나)
+        self.apply_edit(self.composer.feed(self.sender().text()))
         if self.is_shift_pressed:
             self.on_shift_clicked()
 
     def on_backspace_clicked(self):
-        txt = self.line_edit.text()
-        if txt:
-            self.line_edit.setText(txt[:-1])
+        # 조합 중이면 자모 하나씩(닭 → 달 → 다), 아니면 글자 하나씩 지움
+        self.apply_edit(self.composer.backspace())
+
+    def apply_edit(self, edit):
+        # 끝의 remove 글자만 바꾼 문자열을 setText 한 번으로 반영
+        # (QLineEdit의 backspace()/insert()는 호출마다 undo 기록과 레이아웃을 다시 해서 setText보다 느림)
+        remove, insert = edit
+        if remove or insert:
+            text = self.line_edit.text()
+            self.line_edit.setText(text[:len(text) - remove] + insert)
 
     def get_text(self):
         return self.line_edit.text()
 # ------------------------------------------------------------------------------------
-# SerialWorker (2번 코드)
-# ------------------------------------------------------------------------------------
-class SerialWorker(QObject):
-    port_opened = pyqtSignal()
-    peer_list_updated = pyqtSignal(list)
-    message_received = pyqtSignal(str, str)
-    response_received = pyqtSignal(str, str)
-    log_message = pyqtSignal(str)
-
-    def __init__(self, port='/dev/serial0', baudrate=115200):
-        super().__init__()
-        self.port, self.baudrate = port, baudrate
-        self.running = True
-        self.ser = None
-
-    def run(self):
-        self.log_message.emit(f"시리얼 포트 {self.port} 연결 시도 중... 속도 {self.baudrate}")
-        try:
-            self.ser = serial.Serial(self.port, self.baudrate, timeout=1)
-            self.log_message.emit("시리얼 포트 연결 성공.")
-            self.port_opened.emit()
-        except Exception as e:
-            self.log_message.emit(f"시리얼 포트 연결 실패: {e}")
-            return
-        while self.running:
-            try:
-                if self.ser.in_waiting > 0:
-                    line = self.ser.readline().decode('utf-8', errors='ignore').strip()
-                    if not line: continue
-                    flag, content = line[0], line[1:]
-                    self.log_message.emit(f"DEBUG: 수신 -> '{line}'")
-                    if flag=='2' and ',' in content:
-                        car,msg = content.split(',',1)
-                        self.message_received.emit(car,msg)
-                    elif flag=='3':
-                        peers = content.split(',') if content else []
-                        self.peer_list_updated.emit(peers)
-                    elif flag=='4' and ',' in content:
-                        car,status = content.split(',',1)
-                        self.response_received.emit(car,status)
-            except Exception:
-                break
-            time.sleep(0.1)
-        if self.ser and self.ser.is_open:
-            self.ser.close()
-        self.log_message.emit("시리얼 스레드 종료.")
-
-    def send_data(self, data):
-        if self.ser and self.ser.is_open:
-            self.ser.write(data.encode('utf-8'))
-            self.log_message.emit(f"DEBUG: 송신 -> '{data.strip()}'")
-        else:
-            self.log_message.emit("WARN: 포트 미연결, 전송 실패.")
-
-    def stop(self):
-        self.running = False
-
-# ------------------------------------------------------------------------------------
 # MainApp (2번 코드)
 # ------------------------------------------------------------------------------------
 class MainApp(QWidget):
-    status_update = pyqtSignal(str)
-    close_rec_dialog = pyqtSignal()
+    status_update = pyqtSignal(int, str)    # (녹음 번호, 진행 문구)
+    close_rec_dialog = pyqtSignal(int)      # 녹음 번호 (이미 닫은 녹음의 늦은 알림은 무시)
 
-    def __init__(self, my_car_number):
+    def __init__(self, my_car_number, core=None, speech=True):
         super().__init__()
         self.my_car_number = my_car_number
-        self.peer_buttons = []
+        self.peer_buttons = []     # 고정 버튼 풀 (initUI에서 한 번만 생성)
+        self.cell_state = []       # 셀별 (표시 문자열, 활성 여부) — 바뀐 셀만 갱신
+        self.cell_peers = []       # 셀별 차량 번호 (빈 셀은 None)
+        self.page = 0
         # ─── 전체화면 + 프레임 제거 ───
         self.setWindowFlags(Qt.FramelessWindowHint)
         self.showFullScreen()
 
-        # Whisper 및 TTS 초기화
-        self.whisper_model = whisper.load_model(WHISPER_MODEL_SIZE)
-        self.tts = pyttsx3.init(driverName='espeak')
-        self.tts.setProperty('rate',150)
+        # 시리얼 세션/피어 목록/수신 대기열/음성 파이프라인은 코어가 소유, 화면은 이벤트만 받아 그림
+        self.core = core or CarCore(my_car_number)
+        self.voice_ready = False   # Whisper 및 TTS는 백그라운드에서 로딩 (로딩 전에는 음성 기능 비활성)
+        self.peers = []            # 나 자신을 제외한 전체 차량 목록
+        self.overlay = None        # 현재 표시 중인 오버레이 화면 이름 (없으면 None)
+        self.recording = False
+        self.rec_seq = 0           # 녹음 화면을 열 때마다 증가
+        self.rec_car = None        # 녹음 화면의 상대 차량 / 진행 중인 VoiceRequest
+        self.rec_req = None
+        self.prompt_item = None    # 수신 확인 화면의 (차량, 메시지)
 
         self.initUI()
-        self.init_serial_thread()
+        self.init_core(speech)
+        QTimer.singleShot(0, lambda: log.info(
+            "TIME: UI 표시 %.2fs", time.perf_counter() - STARTUP_T0))
 
     def initUI(self):
         layout = QVBoxLayout(self)
@@ -325,146 +249,307 @@ class MainApp(QWidget):
         center_layout.setContentsMargins(0, 0, 0, 0)
         center_layout.setSpacing(30)
         # GridLayout에 stretch 설정 (5열 × 4행)
-        for col in range(5):
+        for col in range(PEER_GRID_COLS):
             center_layout.setColumnStretch(col, 1)
-        for row in range(4):
+        for row in range(PEER_GRID_ROWS):
             center_layout.setRowStretch(row, 1)
         self.center_layout = center_layout
 
-        center_widget.setLayout(center_layout)
-        container_layout.addWidget(center_widget, alignment=Qt.AlignCenter)
-
-        # center_container를 stretch=1로 추가
-        layout.addWidget(center_container, stretch=1)
-        # 숨겨뒀던 peer_list_widget을 마지막에 추가
-        layout.addWidget(self.peer_list_widget)
-
-    def init_serial_thread(self):
-        self.thread = QThread()
-        self.worker = SerialWorker()
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.port_opened.connect(self.send_initial)
-        self.worker.peer_list_updated.connect(self.update_peers)
-        self.worker.message_received.connect(self.handle_message)
-        self.worker.response_received.connect(self.handle_response)
-        self.worker.log_message.connect(self.log)
-        self.thread.start()
-
-    def send_initial(self):
-        msg = f"0{self.my_car_number}\n"
-        self.worker.send_data(msg)
-        self.log(f"INFO: 초기 차량번호 전송: {self.my_car_number}")
-
-    def update_peers(self, peers):
-        # 기존 버튼 모두 제거
-        for btn in self.peer_buttons:
-            btn.deleteLater()
-        self.peer_buttons.clear()
-
-        # 나 자신(my_car_number) 제외, 최대 20개
-        filtered_peers = [p for p in peers if p and p != self.my_car_number][:20]
-
-        # 5열 × 4행
-        for row in range(4):
-            for col in range(5):
-                idx = row * 5 + col
+        # 차량 버튼은 여기서 한 번만 만들고, 이후에는 바뀐 셀의 글자/활성 상태만 갱신
+        for row in range(PEER_GRID_ROWS):
+            for col in range(PEER_GRID_COLS):
+                idx = row * PEER_GRID_COLS + col
                 btn = QPushButton()
                 # Expanding size policy로 버튼이 균등 확대되도록 설정
                 btn.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
                 btn.setMinimumSize(125, 70)   # ← 여기를 원하는 크기로 조정하세요
                 btn.setFont(QFont("Arial", 18))  # 글씨도 조금 키우면 밸런스가 좋아집니다
                 btn.setStyleSheet("QPushButton { text-align: center; padding: 10px; }")
-
-                if idx < len(filtered_peers):
-                    peer = filtered_peers[idx]
-                    btn.setText(peer)
-                    btn.clicked.connect(lambda _, p=peer: self.on_peer_selected_by_name(p))
-                else:
-                    btn.setEnabled(False)
-
-                self.center_layout.addWidget(btn, row, col, alignment=Qt.AlignCenter)
+                btn.setEnabled(False)
+                btn.clicked.connect(lambda _, i=idx: self.on_peer_cell_clicked(i))
+                center_layout.addWidget(btn, row, col, alignment=Qt.AlignCenter)
                 self.peer_buttons.append(btn)
+                self.cell_state.append(('', False))
+                self.cell_peers.append(None)
 
-        self.log(f"INFO: 차량 목록 업데이트 완료. {len(filtered_peers)}개")
+        center_widget.setLayout(center_layout)
+        container_layout.addWidget(center_widget, alignment=Qt.AlignCenter)
 
-    def show_tts_dialog(self, car, msg):
-        dlg = QDialog(self)
-        dlg.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
-        dlg.showFullScreen()
+        # center_container를 stretch=1로 추가
+        layout.addWidget(center_container, stretch=1)
+
+        # --- 페이지 이동 (한 페이지 20대를 넘을 때만 표시) ---
+        self.page_bar = QWidget()
+        page_layout = QHBoxLayout(self.page_bar)
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        self.btn_prev_page = QPushButton("◀")
+        self.btn_next_page = QPushButton("▶")
+        self.page_label = QLabel()
+        self.page_label.setAlignment(Qt.AlignCenter)
+        for w in (self.btn_prev_page, self.page_label, self.btn_next_page):
+            w.setFont(QFont("Arial", 16))
+            page_layout.addWidget(w)
+        self.btn_prev_page.clicked.connect(lambda: self.set_page(self.page - 1))
+        self.btn_next_page.clicked.connect(lambda: self.set_page(self.page + 1))
+        self.page_bar.hide()
+        layout.addWidget(self.page_bar)
+        # 숨겨뒀던 peer_list_widget을 마지막에 추가
+        layout.addWidget(self.peer_list_widget)
 
-        layout = QVBoxLayout()
-        dlg.setLayout(layout)
+        self.init_overlays()
+
+    def init_overlays(self):
+        # 수신 확인 / 메시지 읽기 / 전송 결과 / 녹음 화면을 전체화면 오버레이 창 하나의 QStackedWidget에
+        # 한 번만 만들어 두고, 표시할 때는 글자만 바꿔 페이지 전환 + 창 보이기/숨기기만 함
+        # (차량 목록 창은 그대로 두므로 오버레이를 닫을 때 다시 그리지 않음)
+        self.overlay_host = QDialog(self)
+        self.overlay_host.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
+        host_layout = QVBoxLayout(self.overlay_host)
+        host_layout.setContentsMargins(0, 0, 0, 0)
+        self.stack = QStackedWidget()
+        host_layout.addWidget(self.stack)
+        # Esc 등으로 창이 닫히면 화면 상태도 정리
+        self.overlay_host.finished.connect(lambda _: self.on_overlay_host_closed())
+        self.overlay_pages = {}
+        self.overlay_timer = QTimer(self)   # 자동 닫힘 타이머 하나를 재사용 (이전 화면의 타이머가 다음 화면을 닫지 않음)
+        self.overlay_timer.setSingleShot(True)
+        self.overlay_timer.timeout.connect(self.close_overlay)
+
+        # --- 수신 확인 ---
+        layout = self._add_overlay_page('prompt')
+        self.prompt_label = QLabel()
+        self.prompt_label.setAlignment(Qt.AlignCenter)
+        self.prompt_label.setFont(QFont("Arial", 18, QFont.Bold))
+        layout.addStretch()
+        layout.addWidget(self.prompt_label)
+        layout.addStretch()
 
-        lbl_car = QLabel(f"송신 차량: {car}", dlg)
-        lbl_car.setAlignment(Qt.AlignCenter)
-        font = lbl_car.font()
+        btn_layout = QHBoxLayout()
+        btn_yes = QPushButton("예")
+        btn_no = QPushButton("아니오")
+        for btn in (btn_yes, btn_no):
+            btn.setFixedHeight(60)
+            btn.setFont(QFont("Arial", 14))
+            btn_layout.addWidget(btn)
+        layout.addLayout(btn_layout)
+        btn_yes.clicked.connect(self.on_prompt_yes)
+        btn_no.clicked.connect(self.on_prompt_no)
+
+        # --- 수신 메시지 읽기 (TTS) ---
+        layout = self._add_overlay_page('tts')
+        self.tts_car_label = QLabel()
+        self.tts_car_label.setAlignment(Qt.AlignCenter)
+        font = self.tts_car_label.font()
         font.setPointSize(12)
         font.setBold(True)
-        lbl_car.setFont(font)
-        layout.addWidget(lbl_car)
+        self.tts_car_label.setFont(font)
+        layout.addWidget(self.tts_car_label)
 
         layout.addStretch()
-        lbl_msg = QLabel(msg)
-        lbl_msg.setWordWrap(True)
-        lbl_msg.setAlignment(Qt.AlignCenter)
-        font_msg = lbl_msg.font()
+        self.tts_msg_label = QLabel()
+        self.tts_msg_label.setWordWrap(True)
+        self.tts_msg_label.setAlignment(Qt.AlignCenter)
+        font_msg = self.tts_msg_label.font()
         font_msg.setPointSize(16)
-        lbl_msg.setFont(font_msg)
-        layout.addWidget(lbl_msg)
+        self.tts_msg_label.setFont(font_msg)
+        layout.addWidget(self.tts_msg_label)
         layout.addStretch()
 
-        threading.Thread(target=self._play_tts, args=(msg,), daemon=True).start()
-        QTimer.singleShot(5000, dlg.accept)
-        dlg.exec_()
-
-    def _play_tts(self, text):
-        try:
-            for i in range(0,len(text),100):
-                self.tts.say(text[i:i+100])
-                self.tts.runAndWait()
-        except Exception as e:
-            self.log(f"ERROR: TTS 오류 - {e}")
-
-    def handle_message(self, car, msg):
-        dlg = QDialog(self)
-        dlg.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
-        dlg.setModal(True)
-        dlg.showFullScreen()
-
-        layout = QVBoxLayout()
-        dlg.setLayout(layout)
-
-        lbl_title = QLabel(f"[{car}]로부터 메시지를 수신하시겠습니까?", dlg)
-        lbl_title.setAlignment(Qt.AlignCenter)
-        lbl_title.setFont(QFont("Arial", 18, QFont.Bold))
+        # --- 전송 결과 ---
+        layout = self._add_overlay_page('response')
+        self.response_label = QLabel()
+        self.response_label.setAlignment(Qt.AlignCenter)
+        self.response_label.setFont(QFont("Arial", 18))
         layout.addStretch()
-        layout.addWidget(lbl_title)
+        layout.addWidget(self.response_label)
         layout.addStretch()
 
-        btn_layout = QHBoxLayout()
-        btn_yes = QPushButton("예")
-        btn_no = QPushButton("아니오")
+        # --- 녹음 ---
+        layout = self._add_overlay_page('record')
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        self.rec_label = QLabel()
+        self.rec_label.setAlignment(Qt.AlignCenter)
+        font = self.rec_label.font(); font.setPointSize(14)
+        self.rec_label.setFont(font)
+        layout.addWidget(self.rec_label)
+
+        # 상용구 버튼: 누르면 녹음을 취소하고 STT 없이 바로 전송
+        if self.core.quick_phrases:
+            quick_grid = QGridLayout()
+            quick_grid.setContentsMargins(10, 10, 10, 10)
+            quick_grid.setSpacing(10)
+            for i, phrase in enumerate(self.core.quick_phrases):
+                btn = QPushButton(phrase)
+                btn.setFixedHeight(60)
+                btn.setFont(QFont("Arial", 14))
+                btn.clicked.connect(lambda _, p=phrase: self.on_quick(p))
+                quick_grid.addWidget(btn, i // QUICK_GRID_COLS, i % QUICK_GRID_COLS)
+            layout.addLayout(quick_grid)
+
+        btn_cancel = QPushButton("취소")
+        btn_cancel.setFixedHeight(60)
+        btn_cancel.setFont(QFont("Arial", 14))
+        btn_cancel.clicked.connect(lambda: self.finish_recording(cancel=True))
+        layout.addWidget(btn_cancel)
+
+        # 녹음 진행 문구/종료 알림은 여기서 한 번만 연결 (녹음마다 connect/disconnect 하지 않음)
+        self.status_update.connect(self.on_rec_status)
+        self.close_rec_dialog.connect(self.on_voice_done)
+
+    def _add_overlay_page(self, name):
+        page = QWidget()
+        self.stack.addWidget(page)
+        self.overlay_pages[name] = page
+        return QVBoxLayout(page)
+
+    def init_core(self, speech=True):
+        self.signals = CoreSignals(self.core)
+        self.signals.peers_changed.connect(self.update_peers)
+        self.signals.inbox_changed.connect(self.pump_inbox)
+        self.signals.speech_ready.connect(self.on_speech_loaded)
+        self.signals.speech_failed.connect(self.on_speech_failed)
+        self.signals.stt_event.connect(self.on_stt_event)
+        self.core.start(speech=speech)
+
+    def on_speech_loaded(self, timings):
+        self.voice_ready = True
+        phases = ', '.join(f"{k} {v:.2f}s" for k, v in timings.items())
+        log.info("TIME: 음성 준비 완료 %.2fs (%s)", time.perf_counter() - STARTUP_T0, phases)
+        self.render_peer_page()
+
+    def on_speech_failed(self, err):
+        log.error("음성 기능 초기화 실패 – %s", err)
+
+    def on_stt_event(self, kind, info):
+        if kind == 'unloaded':
+            log.info("사용이 없어 STT 모델을 메모리에서 해제했습니다")
+        elif kind == 'loaded':
+            phases = ', '.join(f"{k} {v:.2f}s" for k, v in info.items())
+            log.info("TIME: STT 모델 재로딩 (%s)", phases)
+        elif kind == 'error':
+            log.error("STT 프로세스 오류 – %s", info)
+        elif kind == 'restarted':
+            log.warning("STT 프로세스를 다시 시작합니다 – %s", info)
 
-        btn_yes.setFixedHeight(60)
-        btn_no.setFixedHeight(60)
-        btn_yes.setFont(QFont("Arial", 14))
-        btn_no.setFont(QFont("Arial", 14))
-
-        btn_layout.addWidget(btn_yes)
-        btn_layout.addWidget(btn_no)
-        layout.addLayout(btn_layout)
-
-        accepted = []
+    def update_peers(self, peers):
+        # 코어가 내 차량을 빼고, 목록이 바뀐 경우에만 알려줌
+        self.peers = peers
+        t = time.perf_counter()
+        changed = self.render_peer_page()
+        PEER_RENDER.observe(time.perf_counter() - t)
+        log.info("차량 목록 업데이트 완료. %d개 (셀 %d개 갱신)", len(peers), changed)
+
+    def page_count(self):
+        return max(1, -(-len(self.peers) // PEER_PAGE_SIZE))
+
+    def set_page(self, page):
+        page = min(max(page, 0), self.page_count() - 1)
+        if page != self.page:
+            self.page = page
+            self.render_peer_page()
+
+    def render_peer_page(self):
+        # 현재 페이지의 셀 상태를 계산해 이전과 달라진 버튼만 갱신, 갱신한 셀 수 반환
+        pages = self.page_count()
+        self.page = min(self.page, pages - 1)
+        start = self.page * PEER_PAGE_SIZE
+        changed = 0
+        for idx, btn in enumerate(self.peer_buttons):
+            i = start + idx
+            peer = self.peers[i] if i < len(self.peers) else None
+            if peer is None:
+                state = ('', False)
+            elif self.voice_ready:
+                state = (peer, True)
+            else:
+                # 음성 모델 로딩 전에는 상용구만 보낼 수 있음 (상용구가 없으면 선택 불가)
+                state = (f"{peer}\n(음성 준비중)", bool(self.core.quick_phrases))
+            self.cell_peers[idx] = peer
+            if state != self.cell_state[idx]:
+                text, enabled = state
+                if text != self.cell_state[idx][0]:
+                    btn.setText(text)
+                if enabled != self.cell_state[idx][1]:
+                    btn.setEnabled(enabled)
+                self.cell_state[idx] = state
+                changed += 1
+
+        self.page_bar.setVisible(pages > 1)
+        if pages > 1:
+            self.page_label.setText(f"{self.page + 1} / {pages}")
+            self.btn_prev_page.setEnabled(self.page > 0)
+            self.btn_next_page.setEnabled(self.page < pages - 1)
+        return changed
+
+    def on_peer_cell_clicked(self, idx):
+        peer = self.cell_peers[idx]
+        if peer:
+            self.on_peer_selected_by_name(peer)
 
-        btn_yes.clicked.connect(lambda: (accepted.append(True), dlg.accept()))
-        btn_no.clicked.connect(dlg.reject)
+    def show_tts_dialog(self, car, msg):
+        self.tts_car_label.setText(f"송신 차량: {car}")
+        self.tts_msg_label.setText(msg)
+        self._play_tts(msg)
+        self.show_overlay('tts', OVERLAY_TTS_MS)
 
-        if dlg.exec_() == QDialog.Accepted and accepted:
-            self.log(f"MSG: {car} 메시지 수신 수락.")
-            self.show_tts_dialog(car, msg)
+    def _play_tts(self, text):
+        # TTS 스레드에 요청만 넣고 바로 반환 (문장 단위 파이프라인 합성/재생)
+        # 상용구는 시작할 때 미리 합성해 캐시에 고정해 두었으므로 합성 없이 바로 재생됨
+        self.core.speak(text)
+
+    # --- 수신 메시지/응답: 코어 대기열에 쌓인 것을 오버레이 하나로 순서대로 표시 (exec_() 중첩 없음) ---
+    def pump_inbox(self):
+        # 표시 중인 오버레이가 없고 녹음 중이 아닐 때 다음 항목을 꺼내 표시
+        if self.overlay is not None or self.recording:
+            return
+        item = self.core.inbox.pop()
+        if item is None:
+            return
+        if item.kind == 'message':
+            self.show_message_prompt(item.car, item.text)
         else:
-            self.log(f"MSG: {car} 메시지 수신 거부.")
+            self.show_response(item.text)
+
+    def show_overlay(self, name, timeout_ms=0):
+        # 미리 만든 오버레이 페이지로 전환, timeout_ms가 있으면 그 뒤 자동으로 닫힘
+        self.overlay = name
+        self.stack.setCurrentWidget(self.overlay_pages[name])
+        if timeout_ms:
+            self.overlay_timer.start(timeout_ms)
+        else:
+            self.overlay_timer.stop()
+        if not self.overlay_host.isVisible():
+            self.overlay_host.showFullScreen()
+
+    def close_overlay(self):
+        # 오버레이를 숨기고 대기열의 다음 항목으로 진행 (다음 항목이 있으면 창을 숨기지 않고 페이지만 바뀜)
+        self.overlay_timer.stop()
+        self.overlay = None
+        self.pump_inbox()
+        if self.overlay is None:
+            self.overlay_host.hide()
+
+    def on_overlay_host_closed(self):
+        if self.recording:
+            self.finish_recording(cancel=True)
+        elif self.overlay is not None:
+            self.close_overlay()
+
+    def show_message_prompt(self, car, msg):
+        self.prompt_item = (car, msg)
+        self.prompt_label.setText(f"[{car}]로부터 메시지를 수신하시겠습니까?")
+        self.show_overlay('prompt')
+
+    def on_prompt_yes(self):
+        car, msg = self.prompt_item
+        log.info("MSG: %s 메시지 수신 수락.", car)
+        # 차량 목록으로 돌아가지 않고 바로 TTS 화면으로 전환해 다른 항목이 끼어들지 않게 함
+        self.show_tts_dialog(car, msg)
+
+    def on_prompt_no(self):
+        log.info("MSG: %s 메시지 수신 거부.", self.prompt_item[0])
+        self.close_overlay()
 
     def on_peer_selected_by_name(self, car):
         item = QListWidgetItem(car)
@@ -475,103 +560,85 @@ class MainApp(QWidget):
 
     def on_peer_selected(self, item):
         car = item.text()
-        rec_dlg = QDialog(self)
-        rec_dlg.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
-
-        rec_layout = QVBoxLayout()
-        rec_layout.setContentsMargins(0, 0, 0, 0)
-        rec_layout.setSpacing(0)
-        rec_dlg.setLayout(rec_layout)
-
-        label = QLabel("녹음하세요…", rec_dlg)
-        label.setAlignment(Qt.AlignCenter)
-        font = label.font(); font.setPointSize(14)
-        label.setFont(font)
-        rec_layout.addWidget(label)
-
-        self.status_update.connect(label.setText)
-        self.close_rec_dialog.connect(rec_dlg.accept)
-
-        def record_and_send():
-            text = ""
-            try:
-                sd.default.device = 1#편집(성은)
-
-                rec = sd.rec(int(RECORD_DURATION*SAMPLERATE),
-                             samplerate=SAMPLERATE, channels=1, dtype='int16')
-                sd.wait()
-                write(TEMP_WAV, SAMPLERATE, rec)
-
-                self.status_update.emit("변환중…")
-                if os.path.exists(TEMP_WAV):
-                    try:
-                        res = self.whisper_model.transcribe(
-                            TEMP_WAV, language='ko', task='transcribe', fp16=False
-                        )
-                        text = res.get('text', '').strip()
-                    except Exception as e:
-                        self.log(f"ERROR: Whisper 변환 실패 – {e}")
-                else:
-                    self.log("WARN: WAV 파일을 찾을 수 없습니다")
-
-                if text:
-                    msg = f"2{car},{text}\n"
-                    self.worker.send_data(msg)
-                else:
-                    self.log("WARN: 변환된 텍스트가 없습니다")
-            except Exception as e:
-                self.log(f"ERROR in record_and_send – {e}")
-            finally:
-                if os.path.exists(TEMP_WAV):
-                    os.remove(TEMP_WAV)
-                self.close_rec_dialog.emit()
-
-        threading.Thread(target=record_and_send, daemon=True).start()
-
-        rec_dlg.showFullScreen()
-        rec_dlg.exec_()
-
-        self.status_update.disconnect(label.setText)
-        self.close_rec_dialog.disconnect(rec_dlg.accept)
-
-
-    def handle_response(self, car, status):
-        result = f"[{car}] 전송 {'성공' if status=='1' else '실패'}"
-        self.log(f"RESPONSE: {result}")
-
-        dlg = QDialog(self)
-        dlg.setWindowFlags(Qt.FramelessWindowHint | Qt.Dialog)
-        dlg.setModal(True)
-        dlg.showFullScreen()
-
-        layout = QVBoxLayout()
-        dlg.setLayout(layout)
-
-        label = QLabel(result)
-        label.setAlignment(Qt.AlignCenter)
-        label.setFont(QFont("Arial", 18))
-        layout.addStretch()
-        layout.addWidget(label)
-        layout.addStretch()
-
-        QTimer.singleShot(2000, dlg.accept)
-        dlg.exec_()
+        if not self.voice_ready and not self.core.quick_phrases:
+            log.warning("음성 모델 로딩 중이라 녹음할 수 없습니다")
+            return
+        self.rec_seq += 1
+        seq = self.rec_seq
+        self.rec_car = car
+        self.rec_req = None
+        self.rec_label.setText("녹음하세요…" if self.voice_ready else "음성 준비중 – 상용구를 선택하세요")
+        self.recording = True
+        self.show_overlay('record')
+
+        # 녹음 → 변환 → 전송은 코어의 작업 스레드에서 진행, 진행 문구와 종료는 시그널로 받음
+        if self.voice_ready:
+            self.rec_req = self.core.send_voice(car, on_status=lambda text: self.status_update.emit(seq, text),
+                                                on_done=lambda _: self.close_rec_dialog.emit(seq))
+
+    def on_rec_status(self, seq, text):
+        if seq == self.rec_seq and self.recording:
+            self.rec_label.setText(text)
+
+    def on_voice_done(self, seq):
+        if seq == self.rec_seq:
+            self.finish_recording()
+
+    def on_quick(self, phrase):
+        # 전송을 먼저 하고 (탭 → 송신 지연 최소화) 녹음/변환은 그 뒤에 취소
+        self.core.send_quick(self.rec_car, phrase)
+        self.finish_recording(cancel=True)
+
+    def finish_recording(self, cancel=False):
+        if not self.recording:
+            return
+        req, self.rec_req = self.rec_req, None
+        self.recording = False
+        if cancel and req is not None:
+            # 녹음을 멈추고 대기/진행 중인 변환 작업을 취소
+            req.cancel()
+        # 녹음하는 동안 쌓인 수신 메시지 표시
+        self.close_overlay()
+
+    def show_response(self, result):
+        self.response_label.setText(result)
+        self.show_overlay('response', OVERLAY_RESPONSE_MS)
 
+    def closeEvent(self, event):
+        self.core.close()
+        event.accept()
 
+class SignalWakeup(QObject):
+    # 파이썬 시그널 핸들러는 인터프리터로 돌아와야 실행되는데 app.exec_()는 C++ 안에서 대기함
+    # → set_wakeup_fd 소켓에 쓰인 바이트를 QSocketNotifier로 받아 이벤트 루프를 깨우고 핸들러가 바로 돌게 함
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rsock, self._wsock = socket.socketpair()
+        self._rsock.setblocking(False)
+        self._wsock.setblocking(False)
+        signal.set_wakeup_fd(self._wsock.fileno())
+        self._notifier = QSocketNotifier(self._rsock.fileno(), QSocketNotifier.Read, self)
+        self._notifier.activated.connect(self._drain)
 
-    def log(self, msg):
-        print(f"[{time.strftime('%H:%M:%S')}] {msg}")
+    def on(self, signum, fn):
+        signal.signal(signum, lambda *_: fn())
 
-    def closeEvent(self, event):
-        self.worker.stop()
-        self.thread.quit(); self.thread.wait(2000)
-        event.accept()
+    def _drain(self):
+        try:
+            while self._rsock.recv(64):
+                pass
+        except BlockingIOError:
+            pass
 
 # ------------------------------------------------------------------------------------
 # 프로그램 시작 및 가상 키보드 적용
 # ------------------------------------------------------------------------------------
 if __name__ == '__main__':
+    device_log.setup_logging()
     app = QApplication(sys.argv)
+    wakeup = SignalWakeup(app)
+    # kill -USR1 <pid> 로 최근 로그(링 버퍼)를 stderr에 덤프
+    wakeup.on(signal.SIGUSR1, device_log.dump_ring)
     num = None
     if os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE) as f:
@@ -589,4 +656,8 @@ if __name__ == '__main__':
         sys.exit(0)
 
     window = MainApp(num)
-    sys.exit(app.exec_())
+    # kill -USR2 <pid> 로 단계별 지연 시간 p50/p95/p99 요약과 송신 대기열 통계를 로그에 출력
+    wakeup.on(signal.SIGUSR2, window.core.log_stats)
+    ret = app.exec_()
+    device_log.shutdown()
+    sys.exit(ret)
@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import time
+import tty
+import pty
+import random
+import select
+import argparse
+import threading
+
+from car_core import frame_codec
+
+# ------------------------------------------------------------------------------------
+# STM32 + ESP01 장치 시뮬레이터 (하드웨어 없이 Pi 앱 부하 테스트용)
+#  - pty를 열고 slave 경로를 SerialWorker 포트로 사용 (CAR_SERIAL_PORT=<경로>)
+#  - '0' 차량번호 초기화를 받고, '3' 피어 목록 / '2' 메시지 / '4' 응답을 설정한 주기로 송신
+#  - Pi가 보낸 '2' 메시지에는 RESP_DELAY 후 '4' 응답 (펌웨어처럼 "\r\n"으로 끝나는 줄)
+#    binary 프레임에서는 응답에 요청의 메시지 ID를 그대로 실어 보냄, --loss 비율만큼은 응답하지 않음 (무선 손실 흉내)
+#  - 기본은 현재 펌웨어처럼 HELLO에 응답하지 않음 (legacy), --binary면 HELLO에 응답해 binary 프레임 사용
+#  - --record로 송수신 내역을 JSON-lines로 남기고, --replay로 그 내역의 송신 부분을 같은 간격으로 재생
+#
+#   python device_simulator.py --peers 8 --peer-interval 1 --msg-rate 0.5
+#   CAR_SERIAL_PORT=/tmp/car_sim python car_device_gui.py
+# ------------------------------------------------------------------------------------
+SIM_LINK = '/tmp/car_sim'       # pty slave 경로를 가리키는 심볼릭 링크
+SIM_PEER_INTERVAL = 1.0         # '3' 피어 목록 주기 (초, 펌웨어 광고 주기와 비슷하게)
+SIM_RESP_DELAY = 0.05           # '2' 수신 후 '4' 응답까지 지연 (초, 무선 왕복 흉내)
+SIM_SUCCESS_RATIO = 1.0         # '4' 응답 중 성공('1') 비율
+SIM_LOSS_RATIO = 0.0            # '2' 메시지에 '4' 응답을 보내지 않는 비율
+SIM_MESSAGES = ['먼저 가세요', '감사합니다', '트렁크가 열려 있어요', '라이트를 켜 주세요', '안전운전 하세요']
+
+
+def make_plates(count, seed=0):
+    rnd = random.Random(seed)
+    hangul = '가나다라마바사아자하'
+    return [f"{rnd.randint(10, 99)}{rnd.choice(hangul)}{rnd.randint(1000, 9999)}" for _ in range(count)]
+
+
+class DeviceSimulator:
+    def __init__(self, peers=8, peer_interval=SIM_PEER_INTERVAL, msg_rate=0.0, resp_rate=0.0,
+                 resp_delay=SIM_RESP_DELAY, success_ratio=SIM_SUCCESS_RATIO, binary=False,
+                 record_path=None, seed=0, loss_ratio=SIM_LOSS_RATIO):
+        self.peers = make_plates(peers, seed) if isinstance(peers, int) else list(peers)
+        self.peer_interval = peer_interval
+        self.msg_rate = msg_rate              # 초당 '2' 메시지 수 (0이면 송신 안 함)
+        self.resp_rate = resp_rate            # 초당 요청 없는 '4' 응답 수
+        self.resp_delay = resp_delay
+        self.success_ratio = success_ratio
+        self.loss_ratio = loss_ratio
+        self.binary = binary
+        self.rnd = random.Random(seed)
+        self.codec = frame_codec.LegacyCodec()
+        self._probe = frame_codec.BinaryCodec()
+        self.plate = None                     # Pi가 '0'으로 알려준 차량번호
+        self.received = []                    # Pi가 보낸 Message 목록
+        self.sent = 0
+        self._msg_ids = 0
+        self._timers = []                     # (시각, flag, 내용, 메시지 ID) 예약 송신
+        self._write_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._record = open(record_path, 'a', encoding='utf-8') if record_path else None
+        self._t0 = time.monotonic()
+
+        self.master, slave = pty.openpty()
+        tty.setraw(slave)
+        self._slave = slave
+        self.port = os.ttyname(slave)
+
+    # --- 송신 ---
+    def send(self, flag, content, msg_id=None):
+        if msg_id is None:
+            self._msg_ids = (self._msg_ids + 1) & 0xFFFF
+            msg_id = self._msg_ids
+        if self.codec.name == 'legacy':
+            data = f"{flag}{content}\r\n".encode('utf-8')
+        else:
+            data = self.codec.encode(flag, content, msg_id)
+        self.write(data)
+        self._log('tx', flag, content)
+        return len(data)
+
+    def write(self, data):
+        with self._write_lock:
+            view = memoryview(data)
+            while view:
+                n = os.write(self.master, view)
+                view = view[n:]
+            self.sent += 1
+
+    def send_peers(self):
+        return self.send('3', ','.join(self.peers))
+
+    def send_message(self, car=None, text=None):
+        car = car or self.rnd.choice(self.peers)
+        return self.send('2', f"{car},{text or self.rnd.choice(SIM_MESSAGES)}")
+
+    def send_response(self, car=None, ok=None):
+        car = car or self.rnd.choice(self.peers)
+        if ok is None:
+            ok = self.rnd.random() < self.success_ratio
+        return self.send('4', f"{car},{'1' if ok else '0'}")
+
+    # --- 수신 ---
+    def _handle(self, msg):
+        self.received.append(msg)
+        self._log('rx', msg.flag, msg.content)
+        if msg.flag == '0':
+            self.plate = msg.content
+        elif msg.flag == frame_codec.HELLO:
+            if self.binary:
+                # 업그레이드된 펌웨어처럼 HELLO를 되돌려주고 binary 프레임으로 전환
+                self.write(frame_codec.encode_frames(frame_codec.HELLO, bytes((frame_codec.VERSION,)), 0)[0])
+                self.codec, self._probe = frame_codec.BinaryCodec(), None
+        elif msg.flag == '2' and ',' in msg.content:
+            if self.rnd.random() < self.loss_ratio:
+                return
+            car = msg.content.split(',', 1)[0]
+            ok = self.rnd.random() < self.success_ratio
+            self._timers.append((time.monotonic() + self.resp_delay, '4', f"{car},{'1' if ok else '0'}", msg.msg_id))
+
+    def _feed(self, data):
+        if self._probe is not None:
+            # legacy 동안에도 HELLO 프레임은 binary 디코더로 찾아냄 (같은 바이트의 legacy 줄은 버림)
+            for msg in self._probe.feed(data):
+                if msg.flag == frame_codec.HELLO:
+                    self._handle(msg)
+                    if self._probe is None:
+                        return
+        for msg in self.codec.feed(data):
+            if msg.flag in '0234' or self.codec.name == 'binary':
+                self._handle(msg)
+
+    # --- 실행 ---
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(2.0)
+        if self._record:
+            self._record.close()
+            self._record = None
+
+    def close(self):
+        self.stop()
+        os.close(self.master)
+        os.close(self._slave)
+
+    def run(self):
+        now = time.monotonic()
+        next_peer = now
+        next_msg = now + self._interval(self.msg_rate)
+        next_resp = now + self._interval(self.resp_rate)
+        while self._running:
+            now = time.monotonic()
+            due = [t for t in self._timers if t[0] <= now]
+            if due:
+                self._timers = [t for t in self._timers if t[0] > now]
+                for _, flag, content, msg_id in due:
+                    self.send(flag, content, msg_id)
+            if self.peer_interval and now >= next_peer:
+                self.send_peers()
+                next_peer = now + self.peer_interval
+            if now >= next_msg:
+                self.send_message()
+                next_msg = now + self._interval(self.msg_rate)
+            if now >= next_resp:
+                self.send_response()
+                next_resp = now + self._interval(self.resp_rate)
+
+            wake = min([next_peer if self.peer_interval else now + 1.0, next_msg, next_resp, now + 1.0]
+                       + [t[0] for t in self._timers])
+            r, _, _ = select.select([self.master], [], [], max(0.0, wake - time.monotonic()))
+            if r:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    break
+                if data:
+                    self._feed(data)
+
+    def _interval(self, rate):
+        # 포아송 도착 (rate가 0이면 사실상 보내지 않음)
+        return self.rnd.expovariate(rate) if rate > 0 else float('inf')
+
+    # --- 기록/재생 ---
+    def _log(self, direction, flag, content):
+        if self._record:
+            self._record.write(json.dumps({'t': round(time.monotonic() - self._t0, 6), 'dir': direction,
+                                           'flag': flag, 'content': content}, ensure_ascii=False) + '\n')
+
+    def replay(self, path, speed=1.0):
+        # 기록 파일의 'tx' 항목을 원래 간격(/speed)대로 다시 송신, 송신한 건수 반환
+        with open(path, encoding='utf-8') as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        events = [e for e in events if e.get('dir', 'tx') == 'tx']
+        if not events:
+            return 0
+        t0 = time.monotonic() - events[0]['t'] / speed
+        for e in events:
+            delay = t0 + e['t'] / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.send(e['flag'], e['content'])
+        return len(events)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='STM32/ESP01 장치 시뮬레이터 (pty)')
+    ap.add_argument('--link', default=SIM_LINK, help='pty slave를 가리킬 심볼릭 링크')
+    ap.add_argument('--peers', type=int, default=8, help='광고할 피어 수')
+    ap.add_argument('--peer-interval', type=float, default=SIM_PEER_INTERVAL, help="'3' 목록 주기 (초, 0이면 끔)")
+    ap.add_argument('--msg-rate', type=float, default=0.0, help="초당 '2' 메시지 수")
+    ap.add_argument('--resp-rate', type=float, default=0.0, help="초당 요청 없는 '4' 응답 수")
+    ap.add_argument('--resp-delay', type=float, default=SIM_RESP_DELAY, help="'2' 수신 후 '4' 응답 지연 (초)")
+    ap.add_argument('--success', type=float, default=SIM_SUCCESS_RATIO, help="'4' 응답 성공 비율")
+    ap.add_argument('--loss', type=float, default=SIM_LOSS_RATIO, help="'2'에 '4' 응답을 보내지 않는 비율")
+    ap.add_argument('--binary', action='store_true', help='HELLO에 응답해 binary 프레임 사용')
+    ap.add_argument('--record', help='송수신 내역을 JSON-lines로 기록')
+    ap.add_argument('--replay', help='기록 파일의 송신 내역을 재생')
+    ap.add_argument('--speed', type=float, default=1.0, help='재생 배속')
+    ap.add_argument('--seed', type=int, default=0)
+    args = ap.parse_args()
+
+    sim = DeviceSimulator(peers=args.peers, peer_interval=0 if args.replay else args.peer_interval,
+                          msg_rate=args.msg_rate, resp_rate=args.resp_rate, resp_delay=args.resp_delay,
+                          success_ratio=args.success, binary=args.binary, record_path=args.record,
+                          seed=args.seed, loss_ratio=args.loss)
+    if args.link:
+        if os.path.islink(args.link):
+            os.remove(args.link)
+        os.symlink(sim.port, args.link)
+    print(f"시뮬레이터 포트: {sim.port}" + (f" (-> {args.link})" if args.link else ''), flush=True)
+    sim.start()
+    try:
+        if args.replay:
+            print(f"재생 완료: {sim.replay(args.replay, args.speed)}건", flush=True)
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.close()
+        if args.link and os.path.islink(args.link):
+            os.remove(args.link)
+    print(f"송신 {sim.sent}건, 수신 {len(sim.received)}건 (차량번호 {sim.plate})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())